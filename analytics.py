@@ -0,0 +1,88 @@
+import os
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_WINDOWS = [int(w) for w in os.getenv("ANALYTICS_WINDOWS", "7,30,90").split(",") if w.strip()]
+MAX_WINDOW = int(os.getenv("ANALYTICS_MAX_WINDOW", "365"))
+
+
+def rolling_block(src: pd.DataFrame, window: int) -> pd.DataFrame:
+    """kimchi_pct의 이동 평균/표준편차/z-score와 greed와의 이동 상관계수 (창이 다 차기 전은 NaN)."""
+    x = src["kimchi_pct"].astype("float64")
+    g = src["greed"].astype("float64")
+    roll = x.rolling(window, min_periods=window)
+    mean = roll.mean()
+    std = roll.std()
+    z = (x - mean) / std.where(std > 0)
+    corr = roll.corr(g).replace([np.inf, -np.inf], np.nan)
+    return pd.DataFrame({
+        f"mean_{window}": mean.to_numpy(),
+        f"std_{window}": std.to_numpy(),
+        f"z_{window}": z.to_numpy(),
+        f"corr_greed_{window}": corr.to_numpy(),
+    })
+
+
+def first_change(old: pd.DataFrame, new: pd.DataFrame) -> int:
+    """두 원본 프레임(date, kimchi_pct, greed)이 처음 달라지는 행 위치. 겹치는 구간이 같으면 짧은 쪽 길이."""
+    n = min(len(old), len(new))
+    same = old["date"].to_numpy()[:n] == new["date"].to_numpy()[:n]
+    for col in ("kimchi_pct", "greed"):
+        a = old[col].to_numpy(dtype="float64")[:n]
+        b = new[col].to_numpy(dtype="float64")[:n]
+        same &= (a == b) | (np.isnan(a) & np.isnan(b))
+    return n if same.all() else int(np.argmin(same))
+
+
+class _State:
+    __slots__ = ("version", "source", "result")
+
+    def __init__(self, version: Optional[str], source: pd.DataFrame, result: pd.DataFrame):
+        self.version = version
+        self.source = source
+        self.result = result
+
+
+class RollingAnalytics:
+    """(심볼, 창 크기)별 이동 통계를 데이터셋 버전마다 보관한다.
+    새 버전이 오면 이전 원본과 비교해 처음 달라진 행 p를 찾고, p-window+1 이후만 다시 계산해 앞부분 결과에 이어 붙인다
+    (일일 갱신처럼 끝부분만 바뀌면 재계산량은 변경 행 수 + 창 크기).
+    """
+
+    def __init__(self):
+        self._states: dict[tuple[str, int], _State] = {}
+        self._lock = threading.Lock()
+
+    def _window_stats(self, symbol: str, version: Optional[str], source: pd.DataFrame, window: int) -> pd.DataFrame:
+        key = (symbol, window)
+        state = self._states.get(key)
+        if state is not None and state.version == version:
+            return state.result
+        p = first_change(state.source, source) if state is not None else 0
+        if state is not None and p == len(source) == len(state.source):
+            result = state.result
+        else:
+            lo = max(0, p - window + 1)
+            tail = rolling_block(source.iloc[lo:], window).iloc[p - lo:]
+            result = pd.concat([state.result.iloc[:p], tail], ignore_index=True) if p > 0 else tail.reset_index(drop=True)
+        self._states[key] = _State(version, source, result)
+        return result
+
+    def compute(self, symbol: str, version: Optional[str], frame: pd.DataFrame, windows: list[int]) -> pd.DataFrame:
+        """전체 저장 프레임에 대한 [date, kimchi_pct, greed, mean_w, std_w, z_w, corr_greed_w...]."""
+        symbol = symbol.upper()
+        source = frame[["date", "kimchi_pct", "greed"]].reset_index(drop=True)
+        with self._lock:
+            blocks = [self._window_stats(symbol, version, source, w) for w in windows]
+        return pd.concat([source] + blocks, axis=1)
+
+
+_ANALYTICS = RollingAnalytics()
+
+
+def get_rolling_analytics() -> RollingAnalytics:
+    return _ANALYTICS
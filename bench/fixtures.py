@@ -0,0 +1,201 @@
+"""업스트림 응답 픽스처와 스텁.
+
+픽스처는 저장소 data/ 의 CSV(심볼별 데이터셋, usdkrw_daily, btc_dominance)에서 만든다.
+install()은 ccxt(binanceusdm), pyupbit, requests(Fixer, smbs.biz, alternative.me, CMC)를
+픽스처를 돌려주는 스텁으로 바꾸고, 호출 수를 CALLS에 센다.
+"""
+import os
+import re
+import time
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlparse
+
+import pandas as pd
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DATA_DIR = os.path.join(REPO_DIR, "data")
+SYMBOLS = ["BTC", "ETH", "SOL", "DOGE", "XRP", "ADA"]
+
+CALLS: Counter = Counter()
+_calls_lock = threading.Lock()
+
+
+def _count(name: str, latency: float) -> None:
+    with _calls_lock:
+        CALLS[name] += 1
+    if latency > 0:
+        time.sleep(latency)
+
+
+class Fixtures:
+    """저장소 CSV에서 읽은 업스트림 원본 시계열."""
+
+    def __init__(self, data_dir: str = REPO_DATA_DIR):
+        self.datasets: dict[str, pd.DataFrame] = {}
+        for sym in SYMBOLS:
+            path = os.path.join(data_dir, f"kimchi_premium_daily_{sym}.csv")
+            if os.path.exists(path):
+                df = pd.read_csv(path, parse_dates=["date"])
+                self.datasets[sym] = df.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
+        self.usd = pd.read_csv(os.path.join(data_dir, "usdkrw_daily.csv"), parse_dates=["date"]).drop_duplicates(subset=["date"], keep="last")
+        btc = self.datasets["BTC"]
+        self.greed = btc.loc[~btc["greed_ffill"].astype(bool), ["date", "greed"]].reset_index(drop=True)
+        dom_path = os.path.join(data_dir, "btc_dominance.csv")
+        self.btc_dominance = float(pd.read_csv(dom_path)["btc_dominance"].iloc[-1]) if os.path.exists(dom_path) else 55.0
+        self.first_date = min(df["date"].iloc[0] for df in self.datasets.values())
+        self.last_date = max(df["date"].iloc[-1] for df in self.datasets.values())
+
+        self._usd_by_date = {d.strftime("%Y-%m-%d"): (float(r), bool(f)) for d, r, f in zip(self.usd["date"], self.usd["usd_rate"], self.usd["usd_ffill"])}
+        # Fixer는 휴일에 직전 영업일을 date로 돌려준다 → usd_ffill=True 행은 직전 비-ffill 날짜로 기록
+        self._usd_api_date = {}
+        last_business = None
+        for d, f in zip(self.usd["date"], self.usd["usd_ffill"]):
+            key = d.strftime("%Y-%m-%d")
+            if not bool(f):
+                last_business = key
+            self._usd_api_date[key] = last_business or key
+
+    def closes(self, sym: str, col: str) -> pd.Series:
+        df = self.datasets.get(sym)
+        if df is None:
+            return pd.Series(dtype="float64")
+        return df.set_index("date")[col]
+
+    def usd_rate(self, day: str) -> Optional[tuple[float, str]]:
+        got = self._usd_by_date.get(day)
+        if got is None:
+            return None
+        return got[0], self._usd_api_date[day]
+
+
+class _Response:
+    def __init__(self, payload=None, text: str = "", status_code: int = 200):
+        self._payload = payload
+        self.text = text
+        self.status_code = status_code
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class _FakeBinance:
+    """ccxt.binanceusdm 대역: load_markets / fetch_ohlcv / fetch_tickers."""
+
+    id = "binanceusdm"
+
+    def __init__(self, fx: Fixtures, latency: float):
+        self._fx = fx
+        self._latency = latency
+        self.markets = {}
+
+    def load_markets(self, reload: bool = False):
+        _count("binance.load_markets", self._latency)
+        self.markets = {f"{s}/USDT:USDT": {"id": f"{s}USDT", "symbol": f"{s}/USDT:USDT"} for s in self._fx.datasets}
+        return self.markets
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1d", since: Optional[int] = None, limit: Optional[int] = None):
+        _count("binance.fetch_ohlcv", self._latency)
+        closes = self._fx.closes(symbol.split("/")[0], "usdt_close")
+        if since is not None:
+            closes = closes[closes.index >= pd.to_datetime(since, unit="ms")]
+        if limit:
+            closes = closes.iloc[:limit]
+        ts = closes.index.asi8 // 10**6
+        return [[int(t), c, c, c, c, 0.0] for t, c in zip(ts, closes.to_numpy())]
+
+    def fetch_tickers(self, symbols: list):
+        _count("binance.fetch_tickers", self._latency)
+        out = {}
+        for market in symbols:
+            closes = self._fx.closes(market.split("/")[0], "usdt_close")
+            if not closes.empty:
+                out[market] = {"last": float(closes.iloc[-1])}
+        return out
+
+
+def _stub_upbit(fx: Fixtures, latency: float):
+    def get_ohlcv(ticker="KRW-BTC", interval="day", count=200, to=None, period=0.1):
+        _count("upbit.get_ohlcv", latency)
+        closes = fx.closes(ticker.split("-")[1], "krw_close")
+        if to is not None:
+            # to는 배타적 UTC 시각, D일 캔들의 UTC 시작은 D 00:00
+            closes = closes[closes.index < pd.to_datetime(to)]
+        closes = closes.iloc[-count:]
+        if closes.empty:
+            return None
+        # pyupbit와 같이 이름 없는 KST 캔들 시작 시각 인덱스
+        index = (closes.index + pd.Timedelta(hours=9)).rename(None)
+        return pd.DataFrame({"open": closes.to_numpy(), "high": closes.to_numpy(), "low": closes.to_numpy(), "close": closes.to_numpy(), "volume": 0.0, "value": 0.0}, index=index)
+
+    def get_current_price(ticker="KRW-BTC", **kwargs):
+        _count("upbit.get_current_price", latency)
+        markets = ticker if isinstance(ticker, list) else [ticker]
+        prices = {}
+        for market in markets:
+            closes = fx.closes(market.split("-")[1], "krw_close")
+            if not closes.empty:
+                prices[market] = float(closes.iloc[-1])
+        return prices if isinstance(ticker, list) else prices.get(ticker)
+
+    return get_ohlcv, get_current_price
+
+
+def _route(fx: Fixtures, latency: float, url: str, params: Optional[dict]) -> _Response:
+    parsed = urlparse(url)
+    host = parsed.netloc
+    if host.endswith("fixer.io"):
+        _count("fixer", latency)
+        got = fx.usd_rate(parsed.path.rsplit("/", 1)[-1])
+        if got is None:
+            return _Response({"success": False, "error": {"code": 106}})
+        rate, api_date = got
+        return _Response({"success": True, "date": api_date, "base": "EUR", "rates": {"USD": 1.0, "KRW": rate}})
+    if host.endswith("smbs.biz"):
+        _count("smbs", latency)
+        m = re.search(r"tr_date=(\d{4}-\d{2}-\d{2})", url)
+        got = fx.usd_rate(m.group(1)) if m else None
+        if got is None or got[1] != m.group(1):
+            return _Response(text="")
+        return _Response(text=f"USD={got[0]:,.2f}&JPY=900.00")
+    if host.endswith("alternative.me"):
+        _count("alternative.me", latency)
+        limit = int((params or {}).get("limit", 1))
+        rows = fx.greed if limit == 0 else fx.greed.iloc[-limit:]
+        items = [{"value": str(int(v)), "timestamp": d.strftime("%m-%d-%Y")} for d, v in zip(rows["date"], rows["greed"])]
+        return _Response({"data": items[::-1]})
+    if host.endswith("coinmarketcap.com"):
+        _count("cmc", latency)
+        ts = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return _Response({"data": {"btc_dominance": fx.btc_dominance}, "status": {"timestamp": ts}})
+    raise RuntimeError(f"unexpected upstream request in benchmark: {url}")
+
+
+def install(fx: Fixtures, latency_ms: float = 0.0) -> None:
+    """업스트림 클라이언트를 스텁으로 교체. 앱 모듈 import 전/후 어느 쪽에서 호출해도 된다."""
+    import ccxt
+    import pyupbit
+    import requests
+
+    latency = latency_ms / 1000.0
+    os.environ.setdefault("FIXER_API_KEY", "bench")
+    os.environ.setdefault("CMC_API_KEY", "bench")
+
+    ccxt.binanceusdm = lambda config=None: _FakeBinance(fx, latency)
+    pyupbit.get_ohlcv, pyupbit.get_current_price = _stub_upbit(fx, latency)
+
+    def session_get(self, url, params=None, **kwargs):
+        return _route(fx, latency, url, params)
+
+    def module_get(url, params=None, **kwargs):
+        return _route(fx, latency, url, params)
+
+    requests.Session.get = session_get
+    requests.get = module_get
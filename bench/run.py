@@ -0,0 +1,230 @@
+"""오프라인 벤치마크 실행기.
+
+    python bench/run.py [--scenarios cold_build,warm_hit,...] [--repeat 3] [--out result.json]
+                        [--compare baseline.json] [--threshold 1.25] [--latency-ms 0] [--keep-throttle]
+
+- 업스트림(ccxt, pyupbit, Fixer, smbs.biz, alternative.me, CMC)은 bench/fixtures.py 스텁으로 대체 (네트워크 없음)
+- 시나리오마다 임시 샌드박스(앱 모듈 복사본 + 빈 data/)를 만들어 새 프로세스에서 실행 → 저장소 data/는 건드리지 않음
+- 시간 측정 프로세스 repeat회 + tracemalloc 할당 측정 프로세스 1회 (추적 오버헤드가 시간에 섞이지 않도록 분리)
+- 결과 JSON: {meta, results: {시나리오: {op: {n, min_ms, median_ms, mean_ms, p95_ms, max_ms, upstream_calls, alloc_peak_kib, alloc_net_kib}}}}
+- --compare로 이전 결과와 median 비율을 비교하고 threshold를 넘는 op가 있으면 종료 코드 1
+"""
+import os
+import sys
+import glob
+import json
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# 측정 대상이 아닌 대기(토큰 버킷, 재검증 예약, TTL 만료)를 끄는 기본 환경
+QUIET_ENV = {
+    "USD_FETCH_RATE": "0",
+    "BINANCE_WEIGHT_PER_MINUTE": "0",
+    "UPBIT_QUOTATION_RATE": "0",
+    "DATASET_REVALIDATE_TTL": "1e9",
+    "GREED_CACHE_TTL": "1e9",
+    "REALTIME_TTL": "0",
+}
+
+
+def _make_sandbox() -> str:
+    """앱 모듈(최상위 *.py) 복사본과 빈 data/를 가진 임시 디렉터리."""
+    root = tempfile.mkdtemp(prefix="kimchi-bench-")
+    app_dir = os.path.join(root, "app")
+    os.makedirs(os.path.join(app_dir, "data"))
+    for path in glob.glob(os.path.join(REPO_DIR, "*.py")):
+        if os.path.basename(path) != "__init__.py":
+            shutil.copy2(path, app_dir)
+    return root
+
+
+def _measure(fn, iterations: int, mode: str) -> dict:
+    from fixtures import CALLS
+
+    if mode == "alloc":
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"alloc_peak_kib": round((peak - before) / 1024, 1), "alloc_net_kib": round((current - before) / 1024, 1)}
+
+    calls_before = CALLS.copy()
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    calls = CALLS - calls_before
+    return {"samples_ms": samples, "upstream_calls": {k: v / iterations for k, v in sorted(calls.items())}}
+
+
+def _child(scenario: str, mode: str, sandbox: str, result_path: str, scale: float, latency_ms: float) -> None:
+    """샌드박스 앱을 import해 시나리오 하나를 측정하고 결과를 result_path에 기록."""
+    sys.path.insert(0, os.path.join(sandbox, "app"))
+    from fixtures import Fixtures, install
+    from scenarios import SCENARIOS
+
+    fx = Fixtures()
+    install(fx, latency_ms)
+    results = {}
+    for name, fn, iterations in SCENARIOS[scenario](fx, scale):
+        results[name] = _measure(fn, iterations, mode)
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+
+
+def _run_child(scenario: str, mode: str, args, env: dict) -> dict:
+    sandbox = _make_sandbox()
+    result_path = os.path.join(sandbox, "result.json")
+    try:
+        cmd = [
+            sys.executable, os.path.abspath(__file__), "--child", scenario, "--mode", mode,
+            "--sandbox", sandbox, "--result", result_path,
+            "--scale", str(args.scale), "--latency-ms", str(args.latency_ms),
+        ]
+        proc = subprocess.run(cmd, env=env, cwd=sandbox, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{scenario} ({mode}) failed:\n{proc.stderr[-4000:]}")
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+
+def _summarize(time_runs: list[dict], alloc_run: dict) -> dict:
+    out = {}
+    for op in time_runs[0]:
+        samples = sorted(s for run in time_runs for s in run[op]["samples_ms"])
+        calls = {}
+        for run in time_runs:
+            for k, v in run[op]["upstream_calls"].items():
+                calls[k] = calls.get(k, 0.0) + v / len(time_runs)
+        out[op] = {
+            "n": len(samples),
+            "min_ms": round(samples[0], 3),
+            "median_ms": round(statistics.median(samples), 3),
+            "mean_ms": round(statistics.fmean(samples), 3),
+            "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+            "max_ms": round(samples[-1], 3),
+            "upstream_calls": {k: round(v, 2) for k, v in calls.items()},
+            **alloc_run.get(op, {}),
+        }
+    return out
+
+
+def _meta(args) -> dict:
+    versions = {}
+    for mod in ("pandas", "numpy", "fastapi", "pyarrow", "orjson", "brotli"):
+        try:
+            versions[mod] = getattr(__import__(mod), "__version__", "installed")
+        except ImportError:
+            versions[mod] = None
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        rev = None
+    sys.path.insert(0, BENCH_DIR)
+    from fixtures import Fixtures
+    fx = Fixtures()
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "packages": versions,
+        "storage_backend": os.getenv("DATA_STORAGE_BACKEND", "auto"),
+        "fixtures": {"first_date": fx.first_date.strftime("%Y-%m-%d"), "last_date": fx.last_date.strftime("%Y-%m-%d"), "symbols": sorted(fx.datasets)},
+        "repeat": args.repeat,
+        "scale": args.scale,
+        "latency_ms": args.latency_ms,
+        "throttled": args.keep_throttle,
+    }
+
+
+def _compare(current: dict, baseline: dict, threshold: float) -> tuple[list[dict], bool]:
+    rows = []
+    regressed = False
+    for scenario, ops in current["results"].items():
+        for op, stats in ops.items():
+            base = baseline.get("results", {}).get(scenario, {}).get(op)
+            if not base or not base.get("median_ms"):
+                continue
+            ratio = stats["median_ms"] / base["median_ms"]
+            flag = ratio > threshold
+            regressed = regressed or flag
+            rows.append({"scenario": scenario, "op": op, "baseline_ms": base["median_ms"], "current_ms": stats["median_ms"], "ratio": round(ratio, 3), "regressed": flag})
+    return rows, regressed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks against recorded upstream fixtures")
+    parser.add_argument("--scenarios", default="cold_build,warm_hit,incremental,serialization,handlers")
+    parser.add_argument("--repeat", type=int, default=3, help="시간 측정 프로세스 실행 횟수 (시나리오별)")
+    parser.add_argument("--scale", type=float, default=1.0, help="op별 반복 횟수 배율")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="업스트림 호출마다 더할 지연(ms)")
+    parser.add_argument("--keep-throttle", action="store_true", help="토큰 버킷/TTL 설정을 그대로 둠")
+    parser.add_argument("--out", help="결과 JSON 경로 (없으면 stdout)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    parser.add_argument("--threshold", type=float, default=1.25, help="median 비율이 이 값을 넘으면 회귀로 표시")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="time", help=argparse.SUPPRESS)
+    parser.add_argument("--sandbox", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.mode, args.sandbox, args.result, args.scale, args.latency_ms)
+        return 0
+
+    from scenarios import SCENARIOS
+
+    names = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in names if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (choose from {', '.join(SCENARIOS)})")
+
+    env = dict(os.environ)
+    if not args.keep_throttle:
+        env.update(QUIET_ENV)
+    env["PYTHONPATH"] = BENCH_DIR
+
+    output = {"meta": _meta(args), "results": {}}
+    for name in names:
+        print(f"[bench] {name} ...", file=sys.stderr)
+        time_runs = [_run_child(name, "time", args, env) for _ in range(max(1, args.repeat))]
+        alloc_run = _run_child(name, "alloc", args, env)
+        output["results"][name] = _summarize(time_runs, alloc_run)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            rows, regressed = _compare(output, json.load(f), args.threshold)
+        output["comparison"] = {"baseline": args.compare, "threshold": args.threshold, "ops": rows}
+        for row in rows:
+            mark = "  REGRESSED" if row["regressed"] else ""
+            print(f"[bench] {row['scenario']:<14} {row['op']:<52} {row['baseline_ms']:>10.3f} -> {row['current_ms']:>10.3f} ms  x{row['ratio']:.2f}{mark}", file=sys.stderr)
+        exit_code = 1 if regressed else 0
+
+    text = json.dumps(output, ensure_ascii=False, indent=1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""벤치마크 시나리오.
+
+각 시나리오는 (fx, iterations 배율)을 받아 준비 작업을 한 뒤 (op 이름, 호출 함수, 반복 횟수)를 yield 하는 제너레이터다.
+run.py가 yield된 op를 시간/할당 측정하고, 다음 op는 앞선 op가 남긴 상태(캐시 등)에서 이어진다.
+앱 모듈은 run.py가 샌드박스 복사본 경로를 sys.path에 넣은 뒤에 import 한다.
+"""
+import os
+from typing import Callable, Iterator
+
+import pandas as pd
+
+from fixtures import SYMBOLS, Fixtures
+
+
+Op = tuple[str, Callable[[], object], int]
+
+
+def _day(ts: pd.Timestamp) -> str:
+    return ts.strftime("%Y-%m-%d")
+
+
+def _symbol_path(sym: str) -> str:
+    import main
+    return os.path.abspath(main._symbol_csv_path(sym))
+
+
+def _seed(fx: Fixtures, symbols: list[str], end: pd.Timestamp) -> None:
+    """샌드박스 data/에 end까지의 심볼 데이터셋, USD/KRW, Greed 캐시를 저장 백엔드로 기록."""
+    import dollar_scraper
+    import greed_index
+    import pipeline
+
+    for sym in symbols:
+        df = fx.datasets[sym]
+        pipeline.save_csv(df[df["date"] <= end], _symbol_path(sym), base_symbol=sym)
+    dollar_scraper._write_usd_cache(fx.usd[fx.usd["date"] <= end])
+    greed_index._write_greed_cache(fx.greed[fx.greed["date"] <= end])
+
+
+def cold_build(fx: Fixtures, scale: float) -> Iterator[Op]:
+    """빈 data/에서 BTC 전체 구간 빌드 (거래소 원본, USD/KRW 일자별 조회, Greed 전체 이력 포함)."""
+    import pipeline
+
+    start, end = _day(fx.datasets["BTC"]["date"].iloc[0]), _day(fx.last_date)
+    yield "load_or_build_dataset[BTC, full, empty cache]", lambda: pipeline.load_or_build_dataset(
+        start, end, cache_path=_symbol_path("BTC"), base_symbol="BTC"
+    ), 1
+
+
+def warm_hit(fx: Fixtures, scale: float) -> Iterator[Op]:
+    """모든 캐시가 요청 구간을 덮고 있을 때의 조회 경로."""
+    import dollar_scraper
+    import pipeline
+    from dataset_store import get_dataset_store
+
+    end = fx.last_date
+    _seed(fx, ["BTC"], end)
+    start = _day(fx.datasets["BTC"]["date"].iloc[0])
+    path = _symbol_path("BTC")
+    # 거래소 원본 캐시/Greed 메모를 채워 둔다 (최근 3일 재확인 구간)
+    pipeline.load_or_build_dataset(start, _day(end), cache_path=path, base_symbol="BTC")
+    year_ago = _day(end - pd.Timedelta(days=364))
+
+    store = get_dataset_store()
+    yield "dataset_store.slice[BTC, 1y]", lambda: store.slice("BTC", path, year_ago, _day(end)), max(1, int(200 * scale))
+    yield "load_or_build_dataset[BTC, full, warm]", lambda: pipeline.load_or_build_dataset(
+        start, _day(end), cache_path=path, base_symbol="BTC"
+    ), max(1, int(20 * scale))
+    yield "get_usd_rates_df[1y, cached]", lambda: dollar_scraper.get_usd_rates_df(year_ago, _day(end)), max(1, int(50 * scale))
+
+
+def incremental(fx: Fixtures, scale: float) -> Iterator[Op]:
+    """캐시가 7일 뒤처진 상태에서의 증분 확장, 이후 1행 저장과 변경 없는 재갱신."""
+    import pipeline
+    from dataset_store import get_dataset_store
+
+    end = fx.last_date
+    _seed(fx, ["BTC"], end - pd.Timedelta(days=7))
+    start = _day(fx.datasets["BTC"]["date"].iloc[0])
+    path = _symbol_path("BTC")
+
+    yield "load_or_build_dataset[BTC, +7d extension]", lambda: pipeline.load_or_build_dataset(
+        start, _day(end), cache_path=path, base_symbol="BTC"
+    ), 1
+
+    store = get_dataset_store()
+    bump = {"n": 0}
+
+    def _save_one_changed_row():
+        bump["n"] += 1
+        df = store.get("BTC", path).copy()
+        df.loc[df.index[-1], "kimchi_pct"] += 1e-6 * bump["n"]
+        pipeline.save_csv(df, path, base_symbol="BTC")
+
+    yield "save_csv[BTC, 1 changed row]", _save_one_changed_row, max(1, int(20 * scale))
+    yield "load_or_build_dataset[BTC, refresh, nothing new]", lambda: pipeline.load_or_build_dataset(
+        start, _day(end), cache_path=path, base_symbol="BTC"
+    ), max(1, int(10 * scale))
+
+
+def serialization(fx: Fixtures, scale: float) -> Iterator[Op]:
+    """전체 BTC 프레임의 응답 직렬화/압축/집계 경로."""
+    from analytics import RollingAnalytics
+    from dataset_store import clean_dataset_frame
+    from downsample import lttb_indices, resample_ohlc
+    from exports import iter_csv_chunks, iter_gzip
+    from range_stats import RangeStatsIndex
+    from response_cache import arrow_available, compress, serialize_arrow, serialize_frame
+
+    df = clean_dataset_frame(fx.datasets["BTC"])
+    n = max(1, int(20 * scale))
+    body = serialize_frame(df, "records", None)
+
+    yield "serialize_frame[records]", lambda: serialize_frame(df, "records", None), n
+    yield "serialize_frame[columnar]", lambda: serialize_frame(df, "columnar", None), n
+    yield "serialize_frame[records, decimals=4]", lambda: serialize_frame(df, "records", 4), n
+    if arrow_available():
+        yield "serialize_arrow", lambda: serialize_arrow(df, None), n
+    yield "compress[gzip]", lambda: compress(body, "gzip"), n
+    try:
+        import brotli  # noqa: F401
+        yield "compress[br]", lambda: compress(body, "br"), n
+    except ImportError:
+        pass
+    yield "iter_csv_chunks", lambda: b"".join(iter_csv_chunks(df)), n
+    yield "iter_gzip(iter_csv_chunks)", lambda: b"".join(iter_gzip(iter_csv_chunks(df))), n
+    yield "resample_ohlc[weekly]", lambda: resample_ohlc(df, "weekly"), n
+    yield "lttb_indices[500]", lambda: lttb_indices(df["kimchi_pct"].to_numpy(), 500), n
+    yield "RangeStatsIndex.update[full]", lambda: RangeStatsIndex().update(df), n
+    index = RangeStatsIndex()
+    index.update(df)
+    yield "RangeStatsIndex.query[1y, 5 percentiles]", lambda: index.query(df["date"].iloc[-365], df["date"].iloc[-1]), max(1, int(200 * scale))
+    yield "RollingAnalytics.compute[7,30,90, cold]", lambda: RollingAnalytics().compute("BTC", None, df, [7, 30, 90]), n
+
+
+def handlers(fx: Fixtures, scale: float) -> Iterator[Op]:
+    """FastAPI 핸들러 (TestClient, 시작 이벤트 없이). 응답 캐시 적중/미스, 304, 다중 심볼 경로."""
+    from fastapi.testclient import TestClient
+
+    import main
+    from freshness import get_revalidator
+    from response_cache import get_response_cache
+
+    end = fx.last_date
+    symbols = [s for s in SYMBOLS if s in fx.datasets]
+    _seed(fx, symbols, end)
+    revalidator = get_revalidator()
+    for sym in symbols:
+        # 백그라운드 재검증이 측정 중에 끼어들지 않도록
+        revalidator.mark_fresh(sym)
+
+    client = TestClient(main.app)
+    start, stop = "2020-01-01", _day(end)
+    n = max(1, int(30 * scale))
+    routes = [
+        ("GET /dataset[BTC, full]", f"/dataset?symbol=BTC&start={start}&end={stop}", {}),
+        ("GET /dataset[BTC, full, gzip]", f"/dataset?symbol=BTC&start={start}&end={stop}", {"Accept-Encoding": "gzip"}),
+        ("GET /dataset[BTC, columnar]", f"/dataset?symbol=BTC&start={start}&end={stop}&format=columnar", {}),
+        ("GET /dataset[BTC, weekly]", f"/dataset?symbol=BTC&start={start}&end={stop}&resolution=weekly", {}),
+        ("GET /dataset[BTC, max_points=300]", f"/dataset?symbol=BTC&start={start}&end={stop}&max_points=300", {}),
+        ("GET /dataset/panel[all, kimchi_pct]", f"/dataset/panel?start={start}&end={stop}", {}),
+        ("GET /analytics/BTC", f"/analytics/BTC?start={start}&end={stop}", {}),
+        ("GET /stats/BTC[1y]", f"/stats/BTC?start={_day(end - pd.Timedelta(days=364))}&end={stop}", {}),
+        ("GET /download[BTC]", f"/download?symbol=BTC&start={start}&end={stop}", {}),
+        ("GET /download[all, zip]", f"/download?symbols={','.join(symbols)}&start={start}&end={stop}", {}),
+    ]
+    if main.arrow_available():
+        routes.append(("GET /datasets[all, arrow]", f"/datasets?start={start}&end={stop}", {}))
+
+    def _get(url: str, headers: dict):
+        resp = client.get(url, headers=headers)
+        if resp.status_code not in (200, 304):
+            raise RuntimeError(f"{url} -> {resp.status_code}: {resp.text[:200]}")
+        return resp
+
+    dataset_url = routes[0][1]
+
+    def _miss():
+        get_response_cache().clear()
+        return _get(dataset_url, {})
+
+    yield "GET /dataset[BTC, full, response cache miss]", _miss, n
+    for name, url, headers in routes:
+        _get(url, headers)
+        yield name, (lambda u=url, h=headers: _get(u, h)), n
+    etag = _get(dataset_url, {}).headers["ETag"]
+    yield "GET /dataset[BTC, If-None-Match -> 304]", lambda: _get(dataset_url, {"If-None-Match": etag}), n
+    yield "GET /realtime[upstream every call]", lambda: _get("/realtime", {}), n
+
+
+SCENARIOS = {
+    "cold_build": cold_build,
+    "warm_hit": warm_hit,
+    "incremental": incremental,
+    "serialization": serialization,
+    "handlers": handlers,
+}
@@ -0,0 +1,149 @@
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from locks import file_write_lock
+from storage import get_storage
+
+
+DATASET_COLUMNS = ["date", "usdt_close", "krw_close", "usdkrw", "usd_ffill", "greed", "greed_ffill", "kimchi_pct"]
+FFILL_COLUMNS = ["usdkrw", "greed", "usdt_close", "krw_close", "kimchi_pct"]
+
+
+def clean_dataset_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """날짜 정규화 → 중복 제거(keep=last) → 정렬 → ffill 까지 적용한 사본을 반환."""
+    out = df.copy()
+    out["date"] = pd.to_datetime(out["date"]).dt.normalize()
+    out = out.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
+    # 빈 값들을 이전 값으로 채우기 (forward fill)
+    for col in FFILL_COLUMNS:
+        if col in out.columns:
+            out[col] = out[col].ffill()
+    return out
+
+
+def slice_by_date(df: pd.DataFrame, start, end) -> pd.DataFrame:
+    """date 기준 정렬된 프레임에서 [start, end] 구간을 이진 탐색으로 잘라 반환."""
+    if df.empty:
+        return df.reset_index(drop=True)
+    dates = df["date"].values
+    lo = np.searchsorted(dates, pd.to_datetime(start).normalize().to_datetime64(), side="left")
+    hi = np.searchsorted(dates, pd.to_datetime(end).normalize().to_datetime64(), side="right")
+    return df.iloc[lo:hi].reset_index(drop=True)
+
+
+def panel_frame(frames: dict[str, pd.DataFrame], fields: list[str]) -> pd.DataFrame:
+    """심볼별 프레임을 date 기준 한 번의 outer join으로 정렬한 패널 [date, {SYM}_{field}...].
+    어떤 심볼에 없는 날짜는 NaN (예: 2021년 이전 SOL)."""
+    parts = [df.set_index("date")[fields] for df in frames.values()]
+    if not parts:
+        return pd.DataFrame(columns=["date"])
+    panel = pd.concat(parts, axis=1, keys=list(frames.keys()), join="outer").sort_index()
+    panel.columns = [f"{sym}_{field}" for sym, field in panel.columns]
+    return panel.rename_axis("date").reset_index()
+
+
+def _file_signature(path: str) -> Optional[tuple[int, int]]:
+    # 저장 백엔드(CSV/Parquet)별 변경 감지용 시그니처
+    return get_storage().signature(path)
+
+
+def _version_token(sig: tuple[int, int]) -> str:
+    return f"{sig[0]:x}-{sig[1]:x}"
+
+
+class _Entry:
+    __slots__ = ("path", "signature", "frame")
+
+    def __init__(self, path: str, signature: tuple[int, int], frame: pd.DataFrame):
+        self.path = path
+        self.signature = signature
+        self.frame = frame
+
+
+class DatasetStore:
+    """심볼별로 정제된 데이터셋 프레임을 메모리에 유지한다.
+    - 파일 mtime/size가 바뀌면 다음 조회 시 다시 읽는다
+    - 반환 프레임은 공유 객체이므로 호출 측에서 수정하지 않는다 (수정 시 copy)
+    """
+
+    def __init__(self):
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, path: str) -> Optional[pd.DataFrame]:
+        return self.get_versioned(symbol, path)[0]
+
+    def get_versioned(self, symbol: str, path: str) -> tuple[Optional[pd.DataFrame], Optional[str]]:
+        """(프레임, 그 프레임의 버전 토큰)을 한 번에 반환한다. 캐시가 없으면 (None, None).
+        버전은 프레임을 읽은(또는 등록한) 시점의 시그니처에서 만들므로 백그라운드 저장과 경합해도 둘이 어긋나지 않는다."""
+        sym = symbol.upper()
+        sig = _file_signature(path)
+        if sig is None:
+            with self._lock:
+                self._entries.pop(sym, None)
+            return None, None
+        with self._lock:
+            entry = self._entries.get(sym)
+            if entry is not None and entry.path == path and entry.signature == sig:
+                return entry.frame, _version_token(entry.signature)
+        # 저장(save_csv)은 같은 파일 락 안에서 쓰고 등록하므로, 락 안에서 시그니처와 내용을 함께 읽는다
+        with file_write_lock(path):
+            sig = _file_signature(path)
+            if sig is None:
+                return None, None
+            try:
+                frame = clean_dataset_frame(get_storage().read(path))
+            except Exception:
+                return None, None
+            with self._lock:
+                self._entries[sym] = _Entry(path, sig, frame)
+        return frame, _version_token(sig)
+
+    def put(self, symbol: str, path: str, df: pd.DataFrame) -> None:
+        """방금 저장한 프레임을 파일 재파싱 없이 등록한다 (df는 이미 정제된 상태여야 함)."""
+        sig = _file_signature(path)
+        with self._lock:
+            if sig is None:
+                self._entries.pop(symbol.upper(), None)
+            else:
+                self._entries[symbol.upper()] = _Entry(path, sig, df)
+
+    def version(self, symbol: str, path: str) -> Optional[str]:
+        """데이터셋 버전 토큰(파일 시그니처 기반). 캐시가 없으면 None.
+        프레임과 함께 쓸 버전은 get_versioned로 받는다 (따로 부르면 그 사이 저장과 어긋날 수 있음)."""
+        sig = _file_signature(path)
+        if sig is None:
+            return None
+        return _version_token(sig)
+
+    def updated_at(self, path: str) -> Optional[datetime]:
+        """캐시의 마지막 갱신 시각(UTC). 응답의 staleness 표시용."""
+        sig = _file_signature(path)
+        if sig is None:
+            return None
+        return datetime.fromtimestamp(sig[0] / 1e9, tz=timezone.utc)
+
+    def slice(self, symbol: str, path: str, start, end) -> Optional[pd.DataFrame]:
+        frame = self.get(symbol, path)
+        if frame is None:
+            return None
+        return slice_by_date(frame, start, end)
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol.upper(), None)
+
+
+_STORE = DatasetStore()
+
+
+def get_dataset_store() -> DatasetStore:
+    return _STORE
@@ -2,7 +2,16 @@ import os
 import requests
 import datetime
 import re
+import threading
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+from requests.adapters import HTTPAdapter
+
+from locks import file_write_lock
+from ratelimit import TokenBucket
+from storage import diff_rows, get_storage
 
 def validate_date(date_str: str) -> datetime.date:
     """날짜 문자열(YYYY-MM-DD)이 올바른지 검사하고 date 객체로 반환"""
@@ -14,12 +23,48 @@ def validate_date(date_str: str) -> datetime.date:
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 USDKRW_CSV_PATH = os.path.join(DATA_DIR, "usdkrw_daily.csv")
 
+# 일자별 환율 조회 동시 실행 수 / 초당 요청 상한 (Fixer, smbs.biz 각각 적용)
+USD_FETCH_CONCURRENCY = int(os.getenv("USD_FETCH_CONCURRENCY", "8"))
+USD_FETCH_RATE = float(os.getenv("USD_FETCH_RATE", "10"))
+
+_session_lock = threading.Lock()
+_session: requests.Session | None = None
+_fixer_bucket = TokenBucket(USD_FETCH_RATE)
+_smbs_bucket = TokenBucket(USD_FETCH_RATE)
+
+
+def _http() -> requests.Session:
+    """커넥션 풀을 공유하는 세션 (일자별 요청마다 새 연결을 맺지 않도록)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(USD_FETCH_CONCURRENCY, 1))
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            _session = s
+        return _session
+
+
+def _fetch_days(fetch_one, start: datetime.date, end: datetime.date) -> list:
+    """[start, end] 각 일자에 fetch_one을 동시에 호출하고 결과를 날짜 순서대로 반환."""
+    days = []
+    cur = start
+    while cur <= end:
+        days.append(cur)
+        cur += datetime.timedelta(days=1)
+    if len(days) <= 1 or USD_FETCH_CONCURRENCY <= 1:
+        return [(d, fetch_one(d)) for d in days]
+    with ThreadPoolExecutor(max_workers=USD_FETCH_CONCURRENCY, thread_name_prefix="usd-fetch") as pool:
+        return list(zip(days, pool.map(fetch_one, days)))
+
 
 def _read_usd_cache() -> pd.DataFrame:
-    if not os.path.exists(USDKRW_CSV_PATH) or os.path.getsize(USDKRW_CSV_PATH) == 0:
+    storage = get_storage()
+    if not storage.exists(USDKRW_CSV_PATH):
         return pd.DataFrame(columns=["date", "usd_rate", "usd_ffill"])
     try:
-        df = pd.read_csv(USDKRW_CSV_PATH, parse_dates=["date"])  # ensure datetime
+        df = storage.read(USDKRW_CSV_PATH)  # ensure datetime
         # 정렬 및 컬럼 보정
         base_cols = ["date", "usd_rate", "usd_ffill"]
         for c in base_cols:
@@ -35,15 +80,20 @@ def _read_usd_cache() -> pd.DataFrame:
         return pd.DataFrame(columns=["date", "usd_rate", "usd_ffill"])
 
 
-def _write_usd_cache(df: pd.DataFrame) -> None:
-    os.makedirs(DATA_DIR, exist_ok=True)
+def _write_usd_cache(df: pd.DataFrame, prev: Optional[pd.DataFrame] = None) -> None:
+    """prev(직전에 읽은 캐시)가 주어지면 추가/변경된 행만 저널에 기록, 아니면 전체 저장."""
     out = df.copy()
     out = out.sort_values("date").drop_duplicates(subset=["date"], keep="last").reset_index(drop=True)
     
     # 빈 값들을 이전 값으로 채우기 (forward fill)
     out['usd_rate'] = out['usd_rate'].ffill()
     
-    out.to_csv(USDKRW_CSV_PATH, index=False)
+    storage = get_storage()
+    changed = diff_rows(prev, out)
+    if changed is None:
+        storage.write(out, USDKRW_CSV_PATH)
+    else:
+        storage.upsert(changed, USDKRW_CSV_PATH)
 
 
 def _load_dotenv() -> None:
@@ -80,7 +130,8 @@ def _fetch_fixer_usdkrw_for_date(d: datetime.date) -> tuple[float, str] | None:
         return None
     url = f"https://data.fixer.io/api/{d.strftime('%Y-%m-%d')}"
     try:
-        res = requests.get(url, params={"access_key": api_key, "symbols": "USD,KRW"}, timeout=10)
+        _fixer_bucket.acquire()
+        res = _http().get(url, params={"access_key": api_key, "symbols": "USD,KRW"}, timeout=10)
         data = res.json()
         if not data or not data.get("success"):
             return None
@@ -96,16 +147,36 @@ def _fetch_fixer_usdkrw_for_date(d: datetime.date) -> tuple[float, str] | None:
         return None
 
 
+def _combine_usd_sources(primary: pd.DataFrame, fallback: pd.DataFrame) -> pd.DataFrame:
+    """우선 소스(Fixer) 값을 쓰고, 환율이 비어 있는 날짜만 폴백(smbs) 값으로 채운다.
+    - usd_ffill: 우선 소스 값이 있으면 그것, 없으면 폴백 값, 둘 다 없으면 False
+    - date 인덱스 정렬 기반 벡터화 (폴백에 같은 날짜가 여러 번 있으면 첫 값 사용)
+    """
+    pri = primary.assign(date=pd.to_datetime(primary["date"])).sort_values("date", kind="stable")
+    fb = fallback.assign(date=pd.to_datetime(fallback["date"])).drop_duplicates(subset=["date"], keep="first").set_index("date")
+    fb = fb.reindex(pd.DatetimeIndex(pri["date"]))
+    pri_rate = pd.to_numeric(pri["usd_rate"], errors="coerce").to_numpy(dtype="float64")
+    fb_rate = fb["usd_rate"].to_numpy(dtype="float64")
+    pri_ffill = pri["usd_ffill"].to_numpy(dtype=object)
+    fb_ffill = fb["usd_ffill"].to_numpy(dtype=object)
+    pri_has_ffill = pd.notna(pri_ffill)
+    fb_has_ffill = pd.notna(fb_ffill)
+    ffill = np.where(pri_has_ffill, pri_ffill, np.where(fb_has_ffill, fb_ffill, False)).astype(bool)
+    return pd.DataFrame({
+        "date": pri["date"].to_numpy(),
+        "usd_rate": np.where(np.isnan(pri_rate), fb_rate, pri_rate),
+        "usd_ffill": ffill,
+    })
+
+
 def _scrape_usd_rates_range_fixer(start: datetime.date, end: datetime.date) -> pd.DataFrame:
     """Fixer를 이용해 [start, end] 일자별 USD/KRW를 조회.
     - 공휴일 등으로 API의 date가 과거로 나올 수 있음 → 요청일에 기록하고 usd_ffill=True로 표기
     """
-    delta = datetime.timedelta(days=1)
-    cur = start
     rows = []  # (date, usd_rate, usd_ffill)
     last_rate = None
-    while cur <= end:
-        got = _fetch_fixer_usdkrw_for_date(cur)
+    # 일자별 조회는 동시에, 결과 처리는 날짜 순서대로
+    for cur, got in _fetch_days(_fetch_fixer_usdkrw_for_date, start, end):
         if got is not None:
             rate, api_date = got
             # 요청일과 API가 보고한 기준일이 다르면 ffill로 간주
@@ -115,7 +186,6 @@ def _scrape_usd_rates_range_fixer(start: datetime.date, end: datetime.date) -> p
         else:
             # Fixer 실패: 일단 빈 칸으로 두고 폴백 로직에서 처리
             rows.append([cur, None, None])
-        cur += delta
 
     # 누락된 날짜(값 None)는 폴백 스크래퍼로 채움
     # 연속 구간으로 묶어서 최소 호출
@@ -143,24 +213,7 @@ def _scrape_usd_rates_range_fixer(start: datetime.date, end: datetime.date) -> p
             fb_all = fb_all.sort_values("date").reset_index(drop=True)
             # Fixer 결과와 병합: Fixer 우선, 폴백은 None만 채움
             fix_df = pd.DataFrame(rows, columns=["date", "usd_rate", "usd_ffill"])
-            fix_df["date"] = pd.to_datetime(fix_df["date"])
-            fix_df = fix_df.sort_values("date").reset_index(drop=True)
-            # where로 None 채우기
-            merged = fix_df.merge(fb_all, on="date", how="left", suffixes=("_fix", "_fb"))
-            def _pick_rate(row):
-                return row["usd_rate_fix"] if pd.notna(row["usd_rate_fix"]) else row["usd_rate_fb"]
-            def _pick_ffill(row):
-                # Fixer가 제공한 ffill 정보가 우선. 없으면 폴백의 ffill 사용
-                if pd.notna(row.get("usd_ffill_fix")):
-                    return bool(row["usd_ffill_fix"]) if not pd.isna(row["usd_ffill_fix"]) else False
-                if pd.notna(row.get("usd_ffill_fb")):
-                    return bool(row["usd_ffill_fb"]) if not pd.isna(row["usd_ffill_fb"]) else False
-                return False
-            merged["usd_rate"] = merged.apply(_pick_rate, axis=1)
-            merged["usd_ffill"] = merged.apply(_pick_ffill, axis=1)
-            out = merged[["date", "usd_rate", "usd_ffill"]].copy()
-            out["date"] = pd.to_datetime(out["date"])  # normalize
-            return out
+            return _combine_usd_sources(fix_df, fb_all)
 
     # Fixer 결과를 DataFrame으로 변환
     df = pd.DataFrame(rows, columns=["date", "usd_rate", "usd_ffill"])
@@ -170,20 +223,11 @@ def _scrape_usd_rates_range_fixer(start: datetime.date, end: datetime.date) -> p
     
     # None 값이 있는 경우 폴백 스크래퍼로 채우기
     if df["usd_rate"].isna().any():
-        missing_mask = df["usd_rate"].isna()
-        missing_dates = df[missing_mask]["date"].dt.date.tolist()
-        if missing_dates:
-            min_missing = min(missing_dates)
-            max_missing = max(missing_dates)
-            fb_data = _scrape_usd_rates_range(min_missing, max_missing)
-            if not fb_data.empty:
-                # 폴백 데이터로 None 값만 채우기
-                for _, fb_row in fb_data.iterrows():
-                    fb_date = fb_row["date"].date()
-                    mask = df["date"].dt.date == fb_date
-                    if mask.any() and df.loc[mask, "usd_rate"].isna().any():
-                        df.loc[mask, "usd_rate"] = fb_row["usd_rate"]
-                        df.loc[mask, "usd_ffill"] = fb_row["usd_ffill"]
+        missing_dates = df.loc[df["usd_rate"].isna(), "date"]
+        fb_data = _scrape_usd_rates_range(missing_dates.min().date(), missing_dates.max().date())
+        if not fb_data.empty:
+            # 폴백 데이터로 None 값만 채우기
+            df = _combine_usd_sources(df, fb_data)
     
     # 여전히 None이 있는 경우 ffill로 채우기
     if df["usd_rate"].isna().any():
@@ -199,43 +243,45 @@ def _scrape_usd_rates_range_fixer(start: datetime.date, end: datetime.date) -> p
     return df.sort_values("date").reset_index(drop=True)
 
 
+def _fetch_smbs_text(d: datetime.date) -> tuple[str | None, Exception | None]:
+    url = "http://www.smbs.biz/Flash/TodayExRate_flash.jsp?tr_date={}".format(d.strftime("%Y-%m-%d"))
+    try:
+        _smbs_bucket.acquire()
+        resp = _http().get(url, timeout=5)
+        return resp.text.strip(), None
+    except Exception as e:
+        return None, e
+
+
 def _scrape_usd_rates_range(start: datetime.date, end: datetime.date) -> pd.DataFrame:
-    base_url = "http://www.smbs.biz/Flash/TodayExRate_flash.jsp?tr_date={}"
-    delta = datetime.timedelta(days=1)
-    current = start
     data = []  # (date, rate, usd_ffill)
     last_rate = None
     pending_dates = []
     
-    while current <= end:
-        url = base_url.format(current.strftime("%Y-%m-%d"))
-        try:
-            resp = requests.get(url, timeout=5)
-            text = resp.text.strip()
-            
-            if "오류가 발생하였습니다" in text:
-                print(f"[ERROR] {current} : 잘못된 요청")
-                current += delta
-                continue
-            
-            if "USD=" not in text:
-                pending_dates.append(current)
-                current += delta
-                continue
-            
-            match = re.search(r"USD=([\d,]+\.\d+)", text)
-            if match:
-                rate = float(match.group(1).replace(",", ""))
-                last_rate = rate
-                for pd_date in pending_dates:
-                    data.append([pd_date, rate, True])
-                pending_dates = []
-                data.append([current, rate, False])
-            else:
-                print(f"[WARN] {current} : USD 환율을 찾을 수 없음")
-        except Exception as e:
-            print(f"[EXCEPTION] {current} : {e}")
-        current += delta
+    # 페이지 조회는 동시에, ffill 판단(pending_dates)은 날짜 순서대로 처리
+    for current, (text, err) in _fetch_days(_fetch_smbs_text, start, end):
+        if err is not None:
+            print(f"[EXCEPTION] {current} : {err}")
+            continue
+        
+        if "오류가 발생하였습니다" in text:
+            print(f"[ERROR] {current} : 잘못된 요청")
+            continue
+        
+        if "USD=" not in text:
+            pending_dates.append(current)
+            continue
+        
+        match = re.search(r"USD=([\d,]+\.\d+)", text)
+        if match:
+            rate = float(match.group(1).replace(",", ""))
+            last_rate = rate
+            for pd_date in pending_dates:
+                data.append([pd_date, rate, True])
+            pending_dates = []
+            data.append([current, rate, False])
+        else:
+            print(f"[WARN] {current} : USD 환율을 찾을 수 없음")
     
     if pending_dates and last_rate is not None:
         for pd_date in pending_dates:
@@ -247,23 +293,9 @@ def _scrape_usd_rates_range(start: datetime.date, end: datetime.date) -> pd.Data
     return df
 
 
-def get_usd_rates_df(start_date: str, end_date: str) -> pd.DataFrame:
-    """
-    특정 기간(start_date ~ end_date) 동안의 KRW/USD 환율을 반환.
-    - 내부적으로 CSV 캐시(data/usdkrw_daily.csv)를 사용하여 "가장 최신 저장일+1"부터만 스크래핑하여 증분 갱신.
-    - 캐시가 비어 있으면 전체 구간을 스크래핑하여 저장.
-    - 반환 컬럼: [date, usd_rate, usd_ffill]
-    """
-    # 날짜 유효성 검사
-    start = validate_date(start_date)
-    end = validate_date(end_date)
-    if start > end:
-        raise ValueError(f"❌ 시작일({start})이 종료일({end})보다 이후일 수 없습니다.")
-
-    # 1) 캐시 로드
-    cache_df = _read_usd_cache()
-
-    # 2) 증분 스크래핑 범위 결정 (캐시가 있으면 마지막 날짜 + 1일부터 end까지)
+def _scrape_and_extend_cache(cache_df: pd.DataFrame, start: datetime.date, end: datetime.date) -> pd.DataFrame:
+    """캐시 마지막일+1 ~ end 구간(캐시가 비면 start ~ end)을 스크래핑해 캐시에 반영하고 갱신된 캐시를 반환."""
+    # 증분 스크래핑 범위 결정 (캐시가 있으면 마지막 날짜 + 1일부터 end까지)
     need_scrape = False
     scrape_start = None
     scrape_end = None
@@ -278,7 +310,7 @@ def get_usd_rates_df(start_date: str, end_date: str) -> pd.DataFrame:
             scrape_start = (last_cached + datetime.timedelta(days=1))
             scrape_end = end
 
-    # 3) 필요한 경우에만 스크래핑 후 캐시 갱신
+    # 필요한 경우에만 스크래핑 후 캐시 갱신
     if need_scrape and scrape_start is not None and scrape_start <= scrape_end:
         # 1차: Fixer로 시도
         try:
@@ -291,8 +323,33 @@ def get_usd_rates_df(start_date: str, end_date: str) -> pd.DataFrame:
             scraped_df = _scrape_usd_rates_range(scrape_start, scrape_end)
         if not scraped_df.empty:
             merged = pd.concat([cache_df, scraped_df], ignore_index=True)
-            _write_usd_cache(merged)
+            _write_usd_cache(merged, prev=cache_df)
+            cache_df = _read_usd_cache()
+    return cache_df
+
+
+def get_usd_rates_df(start_date: str, end_date: str) -> pd.DataFrame:
+    """
+    특정 기간(start_date ~ end_date) 동안의 KRW/USD 환율을 반환.
+    - 내부적으로 CSV 캐시(data/usdkrw_daily.csv)를 사용하여 "가장 최신 저장일+1"부터만 스크래핑하여 증분 갱신.
+    - 캐시가 비어 있으면 전체 구간을 스크래핑하여 저장.
+    - 반환 컬럼: [date, usd_rate, usd_ffill]
+    """
+    # 날짜 유효성 검사
+    start = validate_date(start_date)
+    end = validate_date(end_date)
+    if start > end:
+        raise ValueError(f"❌ 시작일({start})이 종료일({end})보다 이후일 수 없습니다.")
+
+    # 1) 캐시 로드
+    cache_df = _read_usd_cache()
+
+    # 2~3) 캐시가 요청 종료일을 덮지 못할 때만 락을 잡고 증분 스크래핑
+    #      (동시 빌드가 같은 날짜를 중복 스크래핑하거나 캐시를 덮어쓰지 않도록 락 안에서 캐시를 다시 확인)
+    if cache_df.empty or end > pd.to_datetime(cache_df["date"].max()).to_pydatetime().date():
+        with file_write_lock(USDKRW_CSV_PATH):
             cache_df = _read_usd_cache()
+            cache_df = _scrape_and_extend_cache(cache_df, start, end)
 
     # 4) 요청 구간 슬라이싱 후 반환 (캐시 기반)
     if cache_df.empty:
@@ -0,0 +1,88 @@
+import os
+from typing import Hashable, Optional
+
+import numpy as np
+import pandas as pd
+
+from response_cache import ResponseCache
+
+
+RESOLUTIONS = ("daily", "weekly", "monthly")
+# OHLC로 집계하는 컬럼. 집계 결과에서 원래 이름은 종가(close)를 뜻한다
+OHLC_COLUMNS = ["kimchi_pct", "usdt_close", "krw_close"]
+# (심볼, 버전, 구간, resolution, max_points)별 다운샘플 결과 보관 개수
+DOWNSAMPLE_CACHE_SIZE = int(os.getenv("DOWNSAMPLE_CACHE_SIZE", "128"))
+
+_PERIODS = {"weekly": "W-SUN", "monthly": "M"}
+
+_MEMO = ResponseCache(DOWNSAMPLE_CACHE_SIZE)
+
+
+def resample_ohlc(df: pd.DataFrame, resolution: str) -> pd.DataFrame:
+    """일별 프레임을 주/월 단위로 집계한다.
+    - date: 구간 시작일 (주는 월요일, 월은 1일)
+    - kimchi_pct/usdt_close/krw_close: 종가, 그리고 *_open/*_high/*_low
+    - 그 외 컬럼: 구간 마지막 값, days: 구간 내 일수
+    """
+    if resolution == "daily" or df.empty:
+        return df
+    period = df["date"].dt.to_period(_PERIODS[resolution])
+    grouped = df.groupby(period, sort=True)
+    agg = {}
+    for col in df.columns:
+        if col == "date":
+            continue
+        if col in OHLC_COLUMNS:
+            agg[f"{col}_open"] = (col, "first")
+            agg[f"{col}_high"] = (col, "max")
+            agg[f"{col}_low"] = (col, "min")
+        agg[col] = (col, "last")
+    agg["days"] = ("date", "size")
+    out = grouped.agg(**agg)
+    out.insert(0, "date", out.index.start_time)
+    return out.reset_index(drop=True)
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets로 고를 행 인덱스 (x는 등간격 행 번호).
+    첫/마지막 점은 항상 포함, 버킷별 삼각형 넓이 계산은 numpy로 한 번에 처리한다."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype="float64")
+    # NaN은 넓이 비교에서 제외되도록 앞 값으로 채움 (없으면 0)
+    if np.isnan(y).any():
+        y = pd.Series(y).ffill().fillna(0.0).to_numpy()
+    x = np.arange(n, dtype="float64")
+    # 1..n-2 구간을 n_out-2개 버킷으로 분할
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    # 다음 버킷의 평균점 (마지막 버킷의 다음은 마지막 점)
+    csum = np.concatenate([[0.0], np.cumsum(y)])
+    nxt_lo = np.append(edges[1:-1], n - 1)
+    nxt_hi = np.append(edges[2:], n)
+    avg_y = (csum[nxt_hi] - csum[nxt_lo]) / (nxt_hi - nxt_lo)
+    avg_x = (nxt_lo + nxt_hi - 1) / 2.0
+
+    out = np.empty(n_out, dtype=int)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample(df: pd.DataFrame, resolution: str = "daily", max_points: Optional[int] = None, y_col: str = "kimchi_pct") -> pd.DataFrame:
+    out = resample_ohlc(df, resolution)
+    if max_points is not None and len(out) > max_points:
+        out = out.iloc[lttb_indices(out[y_col].to_numpy(), max_points)].reset_index(drop=True)
+    return out
+
+
+def get_downsampled(key: Hashable, df: pd.DataFrame, resolution: str, max_points: Optional[int]) -> pd.DataFrame:
+    """key(데이터셋 버전 포함)별로 메모이즈한 다운샘플 결과. 반환 프레임은 공유 객체이므로 수정하지 않는다."""
+    return _MEMO.get_or_build((key, resolution, max_points), lambda: downsample(df, resolution, max_points))
@@ -0,0 +1,93 @@
+import os
+import time
+import threading
+from typing import Callable, Optional
+
+import ccxt
+
+
+# 마켓 메타데이터(load_markets) 재로딩 주기(초). 상장/폐지 반영용이므로 길게 잡는다.
+MARKETS_TTL_SECONDS = float(os.getenv("EXCHANGE_MARKETS_TTL", str(6 * 3600)))
+
+
+class ExchangeClient:
+    """프로세스 전역으로 공유하는 ccxt 클라이언트.
+    - load_markets()는 최초 1회 + TTL 경과 시에만 호출
+    - 기준 심볼(BTC) → 마켓 심볼(BTC/USDT:USDT) 매핑을 미리 계산해 둔다
+    """
+
+    def __init__(self, factory: Callable[[], ccxt.Exchange], quote: str = "USDT", markets_ttl: float = MARKETS_TTL_SECONDS):
+        self._factory = factory
+        self.quote = quote
+        self.markets_ttl = markets_ttl
+        self._exchange: Optional[ccxt.Exchange] = None
+        self._base_map: dict[str, str] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def exchange(self) -> ccxt.Exchange:
+        self._ensure_markets()
+        return self._exchange
+
+    def warm(self) -> None:
+        """서버 기동 시 마켓을 미리 로드."""
+        self._ensure_markets()
+
+    def _ensure_markets(self) -> None:
+        now = time.time()
+        if self._loaded_at is not None and now - self._loaded_at < self.markets_ttl:
+            return
+        with self._lock:
+            if self._loaded_at is not None and time.time() - self._loaded_at < self.markets_ttl:
+                return
+            if self._exchange is None:
+                self._exchange = self._factory()
+            try:
+                self._exchange.load_markets(reload=self._loaded_at is not None)
+            except Exception:
+                # 재로딩 실패 시 기존 마켓으로 계속 서비스 (최초 로딩 실패는 호출 측으로 전파)
+                if self._loaded_at is None:
+                    raise
+                self._loaded_at = time.time()
+                return
+            self._base_map = self._build_base_map(self._exchange.markets)
+            self._loaded_at = time.time()
+
+    def _build_base_map(self, markets: dict) -> dict[str, str]:
+        # 정확한 마켓 id('BTCUSDT')를 우선, 같은 id가 여러 개면 먼저 나온 마켓 사용
+        base_map: dict[str, str] = {}
+        for m in markets.values():
+            mid = m.get("id") or ""
+            if mid.endswith(self.quote) and len(mid) > len(self.quote):
+                base_map.setdefault(mid[: -len(self.quote)], m["symbol"])
+        return base_map
+
+    def resolve_symbol(self, base: str) -> str:
+        """기준 심볼에 해당하는 마켓 심볼. 없으면 ValueError."""
+        self._ensure_markets()
+        base = base.upper()
+        symbol = self._base_map.get(base)
+        if symbol is not None:
+            return symbol
+        for cand in [f"{base}/{self.quote}:{self.quote}", f"{base}/{self.quote}"]:
+            if cand in self._exchange.markets:
+                return cand
+        raise ValueError(f"{self._exchange.id} market {base}{self.quote} not found")
+
+
+_CLIENTS: dict[str, ExchangeClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_exchange_client(name: str) -> ExchangeClient:
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(name)
+        if client is None:
+            factory = getattr(ccxt, name)
+            client = _CLIENTS[name] = ExchangeClient(lambda: factory({"enableRateLimit": True}))
+        return client
+
+
+def get_binance_usdm() -> ExchangeClient:
+    return get_exchange_client("binanceusdm")
@@ -0,0 +1,66 @@
+import io
+import os
+import zlib
+import zipfile
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+
+# CSV 스트리밍 시 한 번에 직렬화할 행 수
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "500"))
+
+
+def iter_csv_chunks(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[bytes]:
+    """메모리 프레임을 chunk_rows 행씩 CSV 바이트로 (첫 청크에만 헤더). df.to_csv(index=False)와 같은 내용."""
+    if df.empty:
+        yield df.to_csv(index=False).encode("utf-8")
+        return
+    for i in range(0, len(df), chunk_rows):
+        yield df.iloc[i:i + chunk_rows].to_csv(index=False, header=(i == 0)).encode("utf-8")
+
+
+def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """청크 스트림을 gzip 파일 형식으로 점진 압축."""
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip 헤더/트레일러
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    yield comp.flush()
+
+
+class _StreamSink(io.RawIOBase):
+    """zipfile이 쓰는 바이트를 모아 두었다가 제너레이터가 꺼내 가도록 하는 쓰기 전용 버퍼 (seek 불가)."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buf.extend(b)
+        return len(b)
+
+    def drain(self) -> bytes:
+        out = bytes(self._buf)
+        self._buf.clear()
+        return out
+
+
+def iter_zip(files: Iterable[tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """(파일명, 청크 스트림) 목록을 하나의 zip 아카이브로 스트리밍 (임시 파일 없이)."""
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, chunks in files:
+            with zf.open(name, mode="w") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
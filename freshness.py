@@ -0,0 +1,67 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+
+# 심볼별 백그라운드 재검증 최소 간격(초). 요청 경로는 로컬 저장소만 읽는다.
+REVALIDATE_TTL_SECONDS = float(os.getenv("DATASET_REVALIDATE_TTL", "300"))
+
+
+class Revalidator:
+    """stale-while-revalidate 정책: 심볼당 TTL 내 최대 1회의 비동기 재검증만 수행한다."""
+
+    def __init__(self, ttl_seconds: float = REVALIDATE_TTL_SECONDS, max_workers: int = 2):
+        self.ttl_seconds = ttl_seconds
+        self._last_started: dict[str, float] = {}
+        self._last_finished: dict[str, float] = {}
+        self._inflight: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="revalidate")
+
+    def mark_fresh(self, symbol: str) -> None:
+        """동기 빌드 등으로 방금 갱신된 경우 TTL 창을 새로 시작한다."""
+        now = time.time()
+        with self._lock:
+            self._last_started[symbol] = now
+            self._last_finished[symbol] = now
+
+    def last_refreshed(self, symbol: str) -> Optional[datetime]:
+        with self._lock:
+            ts = self._last_finished.get(symbol)
+        return datetime.fromtimestamp(ts, tz=timezone.utc) if ts is not None else None
+
+    def maybe_revalidate(self, symbol: str, refresh: Callable[[], object]) -> bool:
+        """TTL이 지났고 진행 중인 재검증이 없으면 refresh를 백그라운드로 실행. 예약 여부 반환."""
+        now = time.time()
+        with self._lock:
+            if symbol in self._inflight:
+                return False
+            last = self._last_started.get(symbol)
+            if last is not None and now - last < self.ttl_seconds:
+                return False
+            self._inflight.add(symbol)
+            self._last_started[symbol] = now
+        self._executor.submit(self._run, symbol, refresh)
+        return True
+
+    def _run(self, symbol: str, refresh: Callable[[], object]) -> None:
+        try:
+            refresh()
+            with self._lock:
+                self._last_finished[symbol] = time.time()
+        except Exception as e:
+            # 실패해도 다음 TTL 이후 다시 시도 (기존 캐시는 그대로 서빙)
+            print(f"[WARN] {symbol} 재검증 실패: {e}")
+        finally:
+            with self._lock:
+                self._inflight.discard(symbol)
+
+
+_REVALIDATOR = Revalidator()
+
+
+def get_revalidator() -> Revalidator:
+    return _REVALIDATOR
@@ -0,0 +1,109 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from locks import file_write_lock
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+GAP_LEDGER_PATH = os.path.join(DATA_DIR, "gap_ledger.json")
+# 채우지 못한 갭의 첫 재시도 대기(시간). 실패할 때마다 2배, 최대 GAP_RETRY_MAX_DAYS
+GAP_RETRY_BASE_HOURS = float(os.getenv("GAP_RETRY_BASE_HOURS", "6"))
+GAP_RETRY_MAX_DAYS = float(os.getenv("GAP_RETRY_MAX_DAYS", "30"))
+# 이 횟수만큼 연속으로 비어 있으면 채울 수 없는 갭(거래소 점검, 상장 공백, inner join 누락 등)으로 표시
+GAP_UNFILLABLE_AFTER = int(os.getenv("GAP_UNFILLABLE_AFTER", "3"))
+
+
+def _gap_key(start, end) -> str:
+    return f"{pd.Timestamp(start):%Y-%m-%d}:{pd.Timestamp(end):%Y-%m-%d}"
+
+
+class GapLedger:
+    """심볼별 내부 갭 채우기 시도 기록 (data/gap_ledger.json).
+    - 빈 결과가 나온 갭은 지수 백오프로 다음 시도 시각을 미룬다
+    - GAP_UNFILLABLE_AFTER회 연속 실패하면 unfillable로 표시하고 최대 간격으로만 재시도
+    - 채워졌거나 더 이상 감지되지 않는 갭은 기록에서 제거
+    """
+
+    def __init__(self, path: str = GAP_LEDGER_PATH):
+        self.path = path
+        self._entries: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with file_write_lock(self.path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+    def should_attempt(self, symbol: str, start, end, now: Optional[datetime] = None) -> bool:
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            entry = self._load().get(symbol.upper(), {}).get(_gap_key(start, end))
+        if entry is None:
+            return True
+        return now >= datetime.fromisoformat(entry["next_retry"])
+
+    def record(self, symbol: str, start, end, filled: bool, now: Optional[datetime] = None) -> None:
+        now = now or datetime.now(timezone.utc)
+        key = _gap_key(start, end)
+        with self._lock:
+            entries = self._load()
+            sym_entries = entries.setdefault(symbol.upper(), {})
+            if filled:
+                if sym_entries.pop(key, None) is None:
+                    return
+            else:
+                entry = sym_entries.get(key, {"attempts": 0})
+                attempts = entry["attempts"] + 1
+                delay = min(timedelta(hours=GAP_RETRY_BASE_HOURS * (2 ** (attempts - 1))), timedelta(days=GAP_RETRY_MAX_DAYS))
+                unfillable = attempts >= GAP_UNFILLABLE_AFTER
+                if unfillable:
+                    delay = timedelta(days=GAP_RETRY_MAX_DAYS)
+                sym_entries[key] = {
+                    "attempts": attempts,
+                    "last_attempt": now.isoformat(),
+                    "next_retry": (now + delay).isoformat(),
+                    "unfillable": unfillable,
+                }
+            self._save()
+
+    def prune(self, symbol: str, active: Iterable[tuple]) -> None:
+        """현재 감지된 갭(active)에 없는 기록 제거 (다른 경로로 채워진 경우)."""
+        keep = {_gap_key(s, e) for s, e in active}
+        with self._lock:
+            sym_entries = self._load().get(symbol.upper())
+            if not sym_entries:
+                return
+            stale = [k for k in sym_entries if k not in keep]
+            if not stale:
+                return
+            for k in stale:
+                del sym_entries[k]
+            self._save()
+
+    def entries(self, symbol: str) -> dict:
+        with self._lock:
+            return dict(self._load().get(symbol.upper(), {}))
+
+
+_LEDGER = GapLedger()
+
+
+def get_gap_ledger() -> GapLedger:
+    return _LEDGER
@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+import pandas as pd
+import requests
+
+from locks import file_write_lock
+from storage import diff_rows, get_storage
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+GREED_CSV_PATH = os.path.join(DATA_DIR, "greed_daily.csv")
+FNG_URL = "https://api.alternative.me/fng/"
+# 같은 프로세스에서 이 시간(초) 안에는 원격 확인 없이 메모리 캐시를 재사용
+GREED_TTL_SECONDS = float(os.getenv("GREED_CACHE_TTL", "3600"))
+
+_memo_lock = threading.Lock()
+_memo: dict = {"df": None, "checked_at": 0.0}
+
+
+def _parse_fng_items(items: list) -> pd.DataFrame:
+    rows = []
+    for it in items:
+        ts_str = it.get("timestamp"); val_str = it.get("value")
+        if val_str is None or ts_str is None:
+            continue
+        try:
+            dt = pd.to_datetime(ts_str)
+        except Exception:
+            try:
+                dt = pd.to_datetime(int(ts_str), unit="s", utc=True).tz_convert("UTC").tz_localize(None)
+            except Exception:
+                continue
+        rows.append((dt.normalize(), int(val_str)))
+    return pd.DataFrame(rows, columns=["date", "greed"]).drop_duplicates(subset=["date"]).sort_values("date").reset_index(drop=True)
+
+
+def _fetch_fng(limit: int) -> pd.DataFrame:
+    """alternative.me에서 최근 limit일(0이면 전체 이력)을 가져온다."""
+    resp = requests.get(FNG_URL, params={"limit": limit, "date_format": "us"}, timeout=15)
+    resp.raise_for_status()
+    return _parse_fng_items(resp.json().get("data", []))
+
+
+def _read_greed_cache() -> pd.DataFrame:
+    storage = get_storage()
+    if not storage.exists(GREED_CSV_PATH):
+        return pd.DataFrame(columns=["date", "greed"])
+    try:
+        df = storage.read(GREED_CSV_PATH)
+        return df[["date", "greed"]].sort_values("date").drop_duplicates(subset=["date"], keep="last").reset_index(drop=True)
+    except Exception:
+        return pd.DataFrame(columns=["date", "greed"])
+
+
+def _write_greed_cache(df: pd.DataFrame, prev: Optional[pd.DataFrame] = None) -> None:
+    out = df.sort_values("date").drop_duplicates(subset=["date"], keep="last").reset_index(drop=True)
+    storage = get_storage()
+    changed = diff_rows(prev, out)
+    if changed is None:
+        storage.write(out, GREED_CSV_PATH)
+    else:
+        storage.upsert(changed, GREED_CSV_PATH)
+
+
+def get_greed_history() -> pd.DataFrame:
+    """Fear & Greed 일별 이력 [date, greed] (ffill 전 원본).
+    - 로컬 캐시(data/greed_daily.csv)가 없으면 전체 이력(limit=0)을 1회 다운로드
+    - 있으면 캐시 마지막일 이후 일수만큼만 limit으로 증분 조회
+    - GREED_CACHE_TTL 안에서는 원격 확인 없이 메모리 값을 심볼/호출 간 공유
+    """
+    with _memo_lock:
+        if _memo["df"] is not None and time.time() - _memo["checked_at"] < GREED_TTL_SECONDS:
+            return _memo["df"]
+
+    with file_write_lock(GREED_CSV_PATH):
+        # 락을 기다리는 사이 다른 호출이 갱신했을 수 있으므로 다시 확인
+        with _memo_lock:
+            if _memo["df"] is not None and time.time() - _memo["checked_at"] < GREED_TTL_SECONDS:
+                return _memo["df"]
+        cache_df = _read_greed_cache()
+        today = pd.Timestamp(datetime.now(timezone.utc).date())
+        try:
+            if cache_df.empty:
+                fetched = _fetch_fng(0)
+            elif cache_df["date"].max() < today:
+                # 여유 2일 포함 (지연 갱신/시간대 차이)
+                days = int((today - cache_df["date"].max()).days) + 2
+                fetched = _fetch_fng(days)
+            else:
+                fetched = None
+            if fetched is not None and not fetched.empty:
+                prev_df = cache_df
+                if not cache_df.empty:
+                    fetched = pd.concat([cache_df, fetched], ignore_index=True)
+                cache_df = fetched.sort_values("date").drop_duplicates(subset=["date"], keep="last").reset_index(drop=True)
+                _write_greed_cache(cache_df, prev=prev_df)
+        except Exception:
+            # 원격 실패: 캐시가 있으면 그대로 사용하고, 없으면 호출 측으로 전파
+            if cache_df.empty:
+                raise
+        with _memo_lock:
+            _memo["df"] = cache_df
+            _memo["checked_at"] = time.time()
+        return cache_df
@@ -1,16 +1,28 @@
 import os
 import asyncio
 import json
-from fastapi import FastAPI, Query, Path
+from fastapi import FastAPI, Query, Path, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from datetime import date, timedelta, datetime, timezone
+from typing import Optional
 from zoneinfo import ZoneInfo
 import pandas as pd
-import ccxt
-import pyupbit
 
-from pipeline import load_or_build_dataset, save_csv
+from pipeline import load_or_build_dataset, load_or_build_datasets, raw_covered_from, save_csv
+from dataset_store import DATASET_COLUMNS, get_dataset_store, panel_frame, slice_by_date
+from freshness import get_revalidator
+from exchange_clients import get_binance_usdm
+from snapshots import PinnedRangeSnapshots
+from downsample import RESOLUTIONS, get_downsampled
+from analytics import DEFAULT_WINDOWS, MAX_WINDOW, get_rolling_analytics
+from range_stats import DEFAULT_PERCENTILES, get_range_stats
+from exports import iter_csv_chunks, iter_gzip, iter_zip
+from response_cache import (
+	ARROW_MEDIA_TYPE, CACHE_CONTROL, RESPONSE_FORMATS, arrow_available, dumps, etag_matches, get_response_cache,
+	iter_arrow_stream, make_etag, negotiate_encoding, serialize_arrow, serialize_frame, wants_arrow,
+)
+from realtime import REALTIME_SYMBOLS, get_realtime_hub, get_realtime_quote, get_realtime_snapshot
 from cmc_dominance import get_btc_dominance
 from dollar_scraper import get_usd_rates_df
 
@@ -23,6 +35,7 @@ app.add_middleware(
 	allow_credentials=True,
 	allow_methods=["*"],
 	allow_headers=["*"],
+	expose_headers=["ETag", "Content-Disposition", "X-Data-As-Of", "X-Data-Latest-Date", "X-Data-Stale"],
 )
 
 BACKEND_DIR = os.path.dirname(__file__)
@@ -65,6 +78,103 @@ def _effective_end_date(requested_end: str) -> str:
     return pd.Timestamp(eff_end).strftime("%Y-%m-%d")
 
 
+def _revalidate_symbol(symbol: str, start: str) -> None:
+    """백그라운드 재검증: 최근 구간 재확인 + 컷오프까지 뒤쪽 결손 보충."""
+    eff_end = _effective_end_date(datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d"))
+    csv_path = os.path.abspath(_symbol_csv_path(symbol))
+    load_or_build_dataset(start, eff_end, cache_path=csv_path, use_cache=True, base_symbol=symbol)
+
+
+def _has_front_gap(symbol: str, cached: pd.DataFrame, start: str) -> bool:
+    """저장된 첫 행 이전에 채울 수 있는 결손이 있는지.
+    첫 행이 요청 시작일보다 늦어도, 거래소 원본이 시작일부터 확인되었다면(상장 전 구간) 결손이 아니다."""
+    start_ts = pd.to_datetime(start)
+    if cached["date"].iloc[0] <= start_ts:
+        return False
+    covered_from = raw_covered_from(symbol)
+    return covered_from is None or covered_from > start_ts
+
+
+def _serve_dataset(symbol: str, start: str, end: str) -> tuple[pd.DataFrame, dict, Optional[str]]:
+    """로컬 저장소에서 [start, end] 구간을 반환하고 staleness 헤더와 데이터 버전을 함께 돌려준다.
+    - 캐시가 없으면(최초 요청) 동기 빌드
+    - 캐시가 있으면 즉시 반환하고, 심볼당 TTL 내 1회만 백그라운드 재검증을 예약
+    - 버전은 반환 프레임과 같은 읽기에서 얻은 것 (응답 캐시 키용, 백그라운드 저장과 어긋나지 않음)
+    """
+    csv_path = os.path.abspath(_symbol_csv_path(symbol))
+    store = get_dataset_store()
+    revalidator = get_revalidator()
+    cached, version = store.get_versioned(symbol, csv_path)
+    if cached is None or cached.empty:
+        df = load_or_build_dataset(start, end, cache_path=csv_path, use_cache=True, base_symbol=symbol)
+        revalidator.mark_fresh(symbol)
+        cached, version = store.get_versioned(symbol, csv_path)
+        if cached is not None and not cached.empty:
+            df = slice_by_date(cached, start, end)
+    else:
+        df = slice_by_date(cached, start, end)
+        # 앞쪽 결손이 있으면 재검증 시 요청 시작일부터 보충 (상장 전 구간은 다시 빌드하지 않음)
+        refresh_from = pd.to_datetime(start) if _has_front_gap(symbol, cached, start) else cached["date"].iloc[0]
+        refresh_start = refresh_from.strftime("%Y-%m-%d")
+        revalidator.maybe_revalidate(symbol, lambda: _revalidate_symbol(symbol, refresh_start))
+
+    headers = {}
+    updated_at = store.updated_at(csv_path)
+    if updated_at is not None:
+        headers["X-Data-As-Of"] = updated_at.isoformat().replace("+00:00", "Z")
+    if cached is not None and not cached.empty:
+        latest = cached["date"].iloc[-1]
+        headers["X-Data-Latest-Date"] = latest.strftime("%Y-%m-%d")
+        # 뒤쪽(종료일 미달)뿐 아니라 앞쪽이 채울 수 있는 결손으로 잘린 응답도 stale (상장 전 공백은 제외)
+        truncated = latest < pd.to_datetime(end) or _has_front_gap(symbol, cached, start)
+        headers["X-Data-Stale"] = "true" if truncated else "false"
+    return df, headers, version
+
+
+def _cached_response(request: Request, key: tuple, build, headers: dict, media_type: str = "application/json") -> Response:
+    """버전 키로 직렬화 결과(및 압축본)를 캐시하고 ETag/Cache-Control을 붙인다.
+    - Accept-Encoding에 따라 br/gzip 압축 (압축본도 캐시)
+    - If-None-Match가 맞으면 304
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    # 인코딩마다 표현이 다르므로 ETag도 인코딩별로 구분
+    etag = make_etag((key, encoding))
+    headers = dict(headers, ETag=etag)
+    headers["Cache-Control"] = CACHE_CONTROL
+    headers["Vary"] = "Accept, Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body, applied = get_response_cache().get_encoded(key, build, encoding)
+    if applied is not None:
+        headers["Content-Encoding"] = applied
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def _check_format(format: str, decimals: Optional[int]) -> Optional[JSONResponse]:
+    if format not in RESPONSE_FORMATS:
+        return JSONResponse(status_code=400, content={"error": f"format must be one of {', '.join(RESPONSE_FORMATS)}"})
+    if decimals is not None and not 0 <= decimals <= 12:
+        return JSONResponse(status_code=400, content={"error": "decimals must be between 0 and 12"})
+    if format == "arrow" and not arrow_available():
+        return JSONResponse(status_code=400, content={"error": "format=arrow requires pyarrow"})
+    return None
+
+
+def _frame_response(request: Request, key: tuple, get_frame, format: str, decimals: Optional[int], headers: dict) -> Response:
+    """format(또는 Accept 헤더)에 맞춰 JSON(records/columnar) 또는 Arrow IPC로 캐시 응답.
+    get_frame은 캐시 미스일 때만 호출된다."""
+    if arrow_available() and wants_arrow(format, request.headers.get("accept")):
+        return _cached_response(request, key + ("arrow", decimals), lambda: serialize_arrow(get_frame(), decimals), headers, media_type=ARROW_MEDIA_TYPE)
+    return _cached_response(request, key + (format, decimals), lambda: serialize_frame(get_frame(), format, decimals), headers)
+
+
+def _refresh_all_symbols(symbols: list[str], eff_end: str) -> dict[str, pd.DataFrame]:
+    """Incrementally refresh several symbols from their listing start with shared USDKRW/Greed fetches."""
+    starts = {sym: _SYMBOL_LISTING_START.get(sym, "2020-01-01") for sym in symbols}
+    cache_paths = {sym: os.path.abspath(_symbol_csv_path(sym)) for sym in symbols}
+    return load_or_build_datasets(starts, eff_end, cache_paths)
+
+
 # --- Daily auto-refresh at 09:35 KST (Fixer + dataset incremental backfill) ---
 async def _auto_refresh_task():
     """Run once per day after 09:35 KST to refresh USDKRW and symbol datasets.
@@ -81,16 +191,10 @@ async def _auto_refresh_task():
             if (kst_now >= cutoff) and (last_run_kst_date != today_kst):
                 # Execute refresh for all symbols
                 eff_end = _effective_end_date(kst_now.strftime("%Y-%m-%d"))
-                for sym in all_symbols:
-                    try:
-                        start = _SYMBOL_LISTING_START.get(sym, "2020-01-01")
-                        csv_path = os.path.abspath(_symbol_csv_path(sym))
-                        df = load_or_build_dataset(start, eff_end, cache_path=csv_path, use_cache=True, base_symbol=sym)
-                        # Ensure persisted
-                        save_csv(df, csv_path)
-                    except Exception:
-                        # continue with next symbol on failure
-                        pass
+                # One shared USDKRW/Greed fetch for all symbols; blocking work runs off the event loop
+                refreshed = await asyncio.to_thread(_refresh_all_symbols, all_symbols, eff_end)
+                for sym in refreshed:
+                    get_revalidator().mark_fresh(sym)
                 last_run_kst_date = today_kst
         except Exception:
             # Ignore scheduler errors and continue loop
@@ -106,6 +210,11 @@ async def _on_startup_schedule():
         asyncio.create_task(_auto_refresh_task())
     except Exception:
         pass
+    # Pre-load Binance markets so the first realtime/build call skips load_markets()
+    try:
+        asyncio.create_task(asyncio.to_thread(get_binance_usdm().warm))
+    except Exception:
+        pass
 
 
 @app.get("/health")
@@ -124,180 +233,366 @@ def btc_dominance():
 
 
 @app.get("/dataset")
-def get_dataset(start: str = Query(...), end: str = Query(...), symbol: str = Query("BTC")):
+def get_dataset(
+	request: Request,
+	start: str = Query(...),
+	end: str = Query(...),
+	symbol: str = Query("BTC"),
+	format: str = Query("records", description="records | columnar | arrow"),
+	decimals: Optional[int] = Query(None, description="float 컬럼 반올림 자릿수(0~12)"),
+	resolution: str = Query("daily", description="daily | weekly | monthly (OHLC 집계)"),
+	max_points: Optional[int] = Query(None, description="LTTB로 줄일 최대 포인트 수(3 이상)"),
+):
+	invalid = _check_format(format, decimals)
+	if invalid is not None:
+		return invalid
+	if resolution not in RESOLUTIONS:
+		return JSONResponse(status_code=400, content={"error": f"resolution must be one of {', '.join(RESOLUTIONS)}"})
+	if max_points is not None and max_points < 3:
+		return JSONResponse(status_code=400, content={"error": "max_points must be >= 3"})
 	try:
 		# KST 09:30 컷오프 반영 및 심볼별 CSV 경로
 		symbol = (symbol or "BTC").upper()
 		eff_end = _effective_end_date(end)
 		eff_start = _clamp_start_by_symbol(symbol, start)
-		csv_path = os.path.abspath(_symbol_csv_path(symbol))
-		# 항상 증분 캐시 로직을 사용(앞/뒤/소규모 중간 결손 보충)
-		df = load_or_build_dataset(eff_start, eff_end, cache_path=csv_path, use_cache=True, base_symbol=symbol)
-		df = df.copy()
-		df["date"] = df["date"].dt.strftime("%Y-%m-%d")
-		return JSONResponse(content=df.to_dict(orient="records"))
+		# 로컬 저장소에서 즉시 응답, 증분 보충은 백그라운드 재검증이 담당
+		df, headers, version = _serve_dataset(symbol, eff_start, eff_end)
+		# 같은 (심볼, 구간, 데이터 버전)이면 직렬화된 바이트를 재사용
+		key = ("dataset", symbol, eff_start, eff_end, version)
+		if resolution == "daily" and max_points is None:
+			return _frame_response(request, key, lambda: df, format, decimals, headers)
+		# 다운샘플 결과는 데이터 버전별로 메모이즈 (형식이 달라도 재계산하지 않음)
+		return _frame_response(
+			request, key + (resolution, max_points),
+			lambda: get_downsampled(key, df, resolution, max_points),
+			format, decimals, headers,
+		)
 	except Exception as e:
 		return JSONResponse(status_code=500, content={"error": str(e)})
 
 
-def _cache_json_path(symbol: str) -> str:
-	return os.path.join(DATA_DIR, f"dataset_{symbol.upper()}_2025.json")
+@app.get("/dataset/panel")
+def get_dataset_panel(
+	request: Request,
+	start: str = Query(...),
+	end: str = Query(...),
+	symbols: str = Query("BTC,ETH,SOL,DOGE,XRP,ADA", description="쉼표 구분 심볼"),
+	fields: str = Query("kimchi_pct", description="쉼표 구분 컬럼 (예: kimchi_pct,greed)"),
+	format: str = Query("records", description="records | columnar | arrow"),
+	decimals: Optional[int] = Query(None, description="float 컬럼 반올림 자릿수(0~12)"),
+):
+	"""여러 심볼을 날짜 기준으로 정렬한 패널. 컬럼명은 {SYM}_{field} (예: BTC_kimchi_pct)."""
+	invalid = _check_format(format, decimals)
+	if invalid is not None:
+		return invalid
+	wanted = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+	field_list = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+	bad_symbols = [s for s in wanted if s not in _SYMBOL_LISTING_START]
+	if bad_symbols:
+		return JSONResponse(status_code=400, content={"error": f"unsupported symbols: {', '.join(bad_symbols)} (allowed: {', '.join(_SYMBOL_LISTING_START)})"})
+	unknown = [f for f in field_list if f not in DATASET_COLUMNS or f == "date"]
+	if not wanted or not field_list or unknown:
+		return JSONResponse(status_code=400, content={"error": f"invalid symbols/fields: {', '.join(unknown) or 'empty'}"})
+	try:
+		eff_end = _effective_end_date(end)
+		frames = {}
+		versions = []
+		stale = False
+		for sym in wanted:
+			eff_start = _clamp_start_by_symbol(sym, start)
+			df, headers, version = _serve_dataset(sym, eff_start, eff_end)
+			stale = stale or headers.get("X-Data-Stale") == "true"
+			frames[sym] = df
+			versions.append((sym, eff_start, version))
+		key = ("panel", tuple(versions), eff_end, tuple(field_list))
+		panel_headers = {"X-Data-Stale": "true" if stale else "false"}
+		# 패널 조립도 캐시 미스일 때만 수행
+		return _frame_response(request, key, lambda: panel_frame(frames, field_list), format, decimals, panel_headers)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={"error": str(e)})
 
 
-def _load_cache_json(path: str):
-	if os.path.exists(path):
-		try:
-			with open(path, "r", encoding="utf-8") as f:
-				return json.load(f)
-		except Exception:
-			return None
-	return None
+@app.get("/analytics/{symbol}")
+def get_analytics(
+	request: Request,
+	symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP|ADA"),
+	start: str = Query("2020-01-01"),
+	end: str = Query(None),
+	windows: str = Query(",".join(str(w) for w in DEFAULT_WINDOWS), description="쉼표 구분 창 크기(일)"),
+	format: str = Query("records", description="records | columnar | arrow"),
+	decimals: Optional[int] = Query(None, description="float 컬럼 반올림 자릿수(0~12)"),
+):
+	"""kimchi_pct 이동 평균/표준편차/z-score 및 greed와의 이동 상관계수.
+	창은 요청 시작일 이전 이력까지 포함해 계산하고 [start, end]로 잘라 반환한다."""
+	invalid = _check_format(format, decimals)
+	if invalid is not None:
+		return invalid
+	try:
+		window_list = sorted({int(w) for w in windows.split(",") if w.strip()})
+	except ValueError:
+		window_list = []
+	if not window_list or window_list[0] < 2 or window_list[-1] > MAX_WINDOW:
+		return JSONResponse(status_code=400, content={"error": f"windows must be integers between 2 and {MAX_WINDOW}"})
+	try:
+		symbol = symbol.upper()
+		eff_end = _effective_end_date(end or datetime.now(ZoneInfo("Asia/Seoul")).strftime("%Y-%m-%d"))
+		eff_start = _clamp_start_by_symbol(symbol, start)
+		_, headers, _ = _serve_dataset(symbol, eff_start, eff_end)
+		# 이동 창은 요청 시작일 이전 이력도 쓰므로 전체 프레임을 버전과 함께 한 번에 읽는다
+		full, version = get_dataset_store().get_versioned(symbol, os.path.abspath(_symbol_csv_path(symbol)))
+		key = ("analytics", symbol, eff_start, eff_end, version, tuple(window_list))
 
+		def _build():
+			stats = get_rolling_analytics().compute(symbol, version, full, window_list)
+			return slice_by_date(stats, eff_start, eff_end)
 
-def _save_cache_json(path: str, content):
-	os.makedirs(os.path.dirname(path), exist_ok=True)
-	with open(path, "w", encoding="utf-8") as f:
-		json.dump(content, f, ensure_ascii=False)
+		return _frame_response(request, key, _build, format, decimals, headers)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={"error": str(e)})
 
 
-@app.get("/dataset_{symbol}_2025")
-def get_dataset_symbol_2025(symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP|ADA"), refresh: bool = Query(False)):
+@app.get("/stats/{symbol}")
+def get_stats(
+	request: Request,
+	symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP|ADA"),
+	start: str = Query(...),
+	end: str = Query(...),
+	percentiles: str = Query(",".join(str(q) for q in DEFAULT_PERCENTILES), description="쉼표 구분 백분위(0~100)"),
+):
+	"""[start, end] 구간의 kimchi_pct 평균/표준편차/최소/최대/백분위와 greed 평균·상관계수.
+	심볼별 구간 통계 인덱스(누적합, sparse table, merge-sort tree)로 구간 길이와 무관하게 계산한다."""
+	try:
+		q_list = [float(q) for q in percentiles.split(",") if q.strip()]
+	except ValueError:
+		q_list = [-1.0]
+	if any(not 0 <= q <= 100 for q in q_list):
+		return JSONResponse(status_code=400, content={"error": "percentiles must be numbers between 0 and 100"})
+	try:
+		inverted = pd.to_datetime(start) > pd.to_datetime(end)
+	except (ValueError, TypeError):
+		inverted = True
+	if inverted:
+		return JSONResponse(status_code=400, content={"error": "start and end must be dates with start <= end"})
 	try:
-		start = "2025-01-01"; end = "2025-09-30"
 		symbol = symbol.upper()
-		csv_path = os.path.abspath(_symbol_csv_path(symbol))
-		df = load_or_build_dataset(start, end, cache_path=csv_path, use_cache=True, base_symbol=symbol)
-		df = df.copy()
-		df["upbit_usdt"] = df["krw_close"] / df["usdkrw"]
-		records = []
-		for _, row in df.iterrows():
-			ts = row["date"].strftime("%Y-%m-%d") if isinstance(row["date"], pd.Timestamp) else str(row["date"]) 
-			records.append({
-				"timestamp": ts,
-				"binance_usdt": float(row["usdt_close"]),
-				"upbit_usdt": float(row["upbit_usdt"]),
-				"kimchi_pct": float(row["kimchi_pct"]),
-				"usdkrw": float(row["usdkrw"]),
-				"greed": int(row["greed"]) if pd.notna(row["greed"]) else None,
-				"usd_ffill": bool(row.get("usd_ffill", False)) if "usd_ffill" in row else False,
-				"greed_ffill": bool(row.get("greed_ffill", False)) if "greed_ffill" in row else False,
-			})
-		return JSONResponse(content=records)
+		eff_end = _effective_end_date(end)
+		eff_start = _clamp_start_by_symbol(symbol, start)
+		_, headers, _ = _serve_dataset(symbol, eff_start, eff_end)
+		full, version = get_dataset_store().get_versioned(symbol, os.path.abspath(_symbol_csv_path(symbol)))
+		index = get_range_stats(symbol, version, full)
+		key = ("stats", symbol, eff_start, eff_end, version, tuple(q_list))
+		return _cached_response(request, key, lambda: dumps(dict(index.query(eff_start, eff_end, q_list), symbol=symbol)), headers)
 	except Exception as e:
 		return JSONResponse(status_code=500, content={"error": str(e)})
 
-@app.get("/dataset/2025/{symbol}")
-def get_dataset_symbol_2025_alt(symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP|ADA"), refresh: bool = Query(False)):
+
+@app.get("/datasets")
+def get_datasets_arrow(
+	start: str = Query(...),
+	end: str = Query(...),
+	symbols: str = Query("BTC,ETH,SOL,DOGE,XRP,ADA", description="쉼표 구분 심볼"),
+	decimals: Optional[int] = Query(None, description="float 컬럼 반올림 자릿수(0~12)"),
+):
+	"""여러 심볼을 하나의 Arrow IPC 스트림으로 (symbol 컬럼 포함, 심볼당 레코드 배치 1개)."""
+	invalid = _check_format("arrow", decimals)
+	if invalid is not None:
+		return invalid
 	try:
-		start = "2025-01-01"; end = "2025-09-30"
-		symbol = symbol.upper()
-		csv_path = os.path.abspath(_symbol_csv_path(symbol))
-		df = load_or_build_dataset(start, end, cache_path=csv_path, use_cache=True, base_symbol=symbol)
-		df = df.copy()
-		df["upbit_usdt"] = df["krw_close"] / df["usdkrw"]
-		records = []
-		for _, row in df.iterrows():
-			ts = row["date"].strftime("%Y-%m-%d") if isinstance(row["date"], pd.Timestamp) else str(row["date"]) 
-			records.append({
-				"timestamp": ts,
-				"binance_usdt": float(row["usdt_close"]),
-				"upbit_usdt": float(row["upbit_usdt"]),
-				"kimchi_pct": float(row["kimchi_pct"]),
-				"usdkrw": float(row["usdkrw"]),
-				"greed": int(row["greed"]) if pd.notna(row["greed"]) else None,
-				"usd_ffill": bool(row.get("usd_ffill", False)) if "usd_ffill" in row else False,
-				"greed_ffill": bool(row.get("greed_ffill", False)) if "greed_ffill" in row else False,
-			})
-		return JSONResponse(content=records)
+		wanted = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+		eff_end = _effective_end_date(end)
+		frames = []
+		stale = False
+		for sym in wanted:
+			df, headers, _ = _serve_dataset(sym, _clamp_start_by_symbol(sym, start), eff_end)
+			stale = stale or headers.get("X-Data-Stale") == "true"
+			frames.append((sym, df))
+		return StreamingResponse(
+			iter_arrow_stream(frames, decimals),
+			media_type=ARROW_MEDIA_TYPE,
+			headers={"X-Data-Stale": "true" if stale else "false"},
+		)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+def _frame_2025(df: pd.DataFrame) -> pd.DataFrame:
+	"""2025 차트용 컬럼 구성 (timestamp, binance_usdt, upbit_usdt, kimchi_pct, usdkrw, greed, usd_ffill, greed_ffill)."""
+	return pd.DataFrame({
+		"timestamp": df["date"],
+		"binance_usdt": df["usdt_close"].astype(float),
+		"upbit_usdt": df["krw_close"] / df["usdkrw"],
+		"kimchi_pct": df["kimchi_pct"].astype(float),
+		"usdkrw": df["usdkrw"].astype(float),
+		"greed": df["greed"].round().astype("Int64"),
+		"usd_ffill": df["usd_ffill"].astype(bool) if "usd_ffill" in df.columns else False,
+		"greed_ffill": df["greed_ffill"].astype(bool) if "greed_ffill" in df.columns else False,
+	})
+
+
+def _snapshot_source(symbol: str, start: str, end: str) -> tuple[pd.DataFrame, Optional[str]]:
+	df, _, version = _serve_dataset(symbol, start, end)
+	return df, version
+
+
+# 2025 차트 구간은 고정이므로 심볼별로 한 번 만든 스냅샷을 두 라우트가 공유
+_SNAPSHOTS_2025 = PinnedRangeSnapshots(
+	name="2025",
+	start="2025-01-01",
+	end="2025-09-30",
+	source=_snapshot_source,
+	to_frame=_frame_2025,
+	version_fn=lambda sym: get_dataset_store().version(sym, os.path.abspath(_symbol_csv_path(sym))),
+	data_dir=DATA_DIR,
+	date_col="timestamp",
+)
+
+
+def _dataset_2025_response(request: Request, symbol: str, refresh: bool, format: str, decimals: Optional[int]) -> Response:
+	invalid = _check_format(format, decimals)
+	if invalid is not None:
+		return invalid
+	try:
+		snap = _SNAPSHOTS_2025.get(symbol, refresh=refresh)
+		key = ("dataset_2025", symbol.upper(), _SNAPSHOTS_2025.start, _SNAPSHOTS_2025.end, snap.built_at)
+		return _frame_response(request, key, lambda: snap.frame, format, decimals, _SNAPSHOTS_2025.headers(snap))
 	except Exception as e:
 		return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.get("/dataset_{symbol}_2025")
+def get_dataset_symbol_2025(
+	request: Request,
+	symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP|ADA"),
+	refresh: bool = Query(False),
+	format: str = Query("records", description="records | columnar | arrow"),
+	decimals: Optional[int] = Query(None, description="float 컬럼 반올림 자릿수(0~12)"),
+):
+	return _dataset_2025_response(request, symbol, refresh, format, decimals)
+
+@app.get("/dataset/2025/{symbol}")
+def get_dataset_symbol_2025_alt(
+	request: Request,
+	symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP|ADA"),
+	refresh: bool = Query(False),
+	format: str = Query("records", description="records | columnar | arrow"),
+	decimals: Optional[int] = Query(None, description="float 컬럼 반올림 자릿수(0~12)"),
+):
+	return _dataset_2025_response(request, symbol, refresh, format, decimals)
+
+
 @app.get("/download")
-def download_csv(start: str, end: str, symbol: str = Query("BTC")):
-	symbol = (symbol or "BTC").upper()
-	eff_end = _effective_end_date(end)
-	eff_start = _clamp_start_by_symbol(symbol, start)
-	csv_path = os.path.abspath(_symbol_csv_path(symbol))
-	# 캐시를 증분 갱신(보존)하고, 다운로드는 별도 임시 파일로 제공합니다.
-	df = load_or_build_dataset(eff_start, eff_end, cache_path=csv_path, use_cache=True, base_symbol=symbol)
-	# 임시 파일 경로
-	from tempfile import NamedTemporaryFile
-	import shutil
-	with NamedTemporaryFile(delete=False, suffix=f"_{symbol}.csv") as tmp:
-		# 요청 구간만 저장
-		df.to_csv(tmp.name, index=False)
-		tmp_path = tmp.name
-	# 응답으로 임시 파일 제공(원본 캐시는 유지)
-	return FileResponse(tmp_path, media_type="text/csv", filename=f"kimchi_premium_daily_{symbol}.csv")
+def download_csv(
+	start: str,
+	end: str,
+	symbol: str = Query("BTC"),
+	symbols: str = Query("", description="쉼표 구분 심볼. 2개 이상이면 zip으로 묶어서 제공"),
+	gzip: bool = Query(False, description="단일 심볼 CSV를 .csv.gz로 압축"),
+):
+	try:
+		wanted = [s.strip().upper() for s in symbols.split(",") if s.strip()] or [(symbol or "BTC").upper()]
+		eff_end = _effective_end_date(end)
+		# 로컬 저장소 기준으로 제공(증분 갱신은 백그라운드), 임시 파일 없이 메모리 프레임에서 바로 스트리밍
+		frames = []
+		for sym in wanted:
+			df, headers, _ = _serve_dataset(sym, _clamp_start_by_symbol(sym, start), eff_end)
+			frames.append((sym, df, headers))
+
+		if len(frames) == 1:
+			sym, df, headers = frames[0]
+			filename = f"kimchi_premium_daily_{sym}.csv"
+			body = iter_csv_chunks(df)
+			media_type = "text/csv"
+			if gzip:
+				body = iter_gzip(body)
+				filename += ".gz"
+				media_type = "application/gzip"
+			headers = dict(headers, **{"Content-Disposition": f'attachment; filename="{filename}"'})
+			return StreamingResponse(body, media_type=media_type, headers=headers)
+
+		files = [(f"kimchi_premium_daily_{sym}.csv", iter_csv_chunks(df)) for sym, df, _ in frames]
+		stale = any(h.get("X-Data-Stale") == "true" for _, _, h in frames)
+		return StreamingResponse(
+			iter_zip(files),
+			media_type="application/zip",
+			headers={
+				"Content-Disposition": 'attachment; filename="kimchi_premium_daily.zip"',
+				"X-Data-Stale": "true" if stale else "false",
+			},
+		)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={"error": str(e)})
 
 
-@app.get("/realtime/{symbol}")
-def get_realtime(symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP|ADA")):
+@app.get("/realtime")
+def get_realtime_batch(symbols: str = Query("", description="쉼표 구분 심볼 필터(비우면 전체)")):
+	"""설정된 전체 심볼의 실시간 김프. 짧은 TTL 스냅샷을 모든 클라이언트가 공유한다."""
 	try:
-		symbol = symbol.upper()
-		# Binance USD-M Futures last price
-		ex = ccxt.binanceusdm({"enableRateLimit": True})
-		market_id = f"{symbol}USDT"
-		ex.load_markets()
-		sym = None
-		for m in ex.markets.values():
-			if m.get("id") == market_id:
-				sym = m["symbol"]; break
-		if sym is None:
-			for cand in [f"{symbol}/USDT:USDT", f"{symbol}/USDT"]:
-				if cand in ex.markets:
-					sym = cand; break
-		if sym is None:
-			raise ValueError("market not found")
-		binance_ticker = ex.fetch_ticker(sym)
-		binance_usdt = float(binance_ticker.get("last"))
-		# Upbit KRW market last price
-		upbit_market = f"KRW-{symbol}"
-		upbit_ticker = pyupbit.get_current_price(upbit_market)
-		if upbit_ticker is None:
-			raise ValueError("upbit price unavailable")
-		upbit_krw = float(upbit_ticker)
-		# USDKRW: 최근 영업일 값 (캐시 파일이 있으면 마지막 값 사용, 없으면 스크래퍼로 오늘~오늘 호출)
-		usdkrw = None
-		# CSV 캐시에서 최근 usdkrw 사용(우선 BTC, 없으면 아무 심볼)
-		preferred = os.path.abspath(_symbol_csv_path("BTC"))
-		csv_paths = []
-		if os.path.exists(preferred):
-			csv_paths.append(preferred)
-		csv_paths.extend([os.path.join(DATA_DIR, p) for p in os.listdir(DATA_DIR) if p.startswith("kimchi_premium_daily_") and p.endswith(".csv")])
-		for p in csv_paths:
-			try:
-				csv_df = pd.read_csv(p)
-				if "usdkrw" in csv_df.columns and not csv_df.empty:
-					usdkrw = float(csv_df.iloc[-1]["usdkrw"])  # 마지막 행
+		snap = get_realtime_snapshot()
+		wanted = [s.strip().upper() for s in symbols.split(",") if s.strip()]
+		if wanted:
+			snap = dict(snap, quotes={k: v for k, v in snap["quotes"].items() if k in wanted})
+		return snap
+	except Exception as e:
+		return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/realtime/stream")
+async def stream_realtime(request: Request, symbols: str = Query("", description="쉼표 구분 심볼(비우면 전체)")):
+	"""Server-Sent Events 실시간 김프 스트림.
+	- 심볼당 백그라운드 폴러 1개가 계산한 틱을 모든 구독자에게 브로드캐스트
+	- 느린 클라이언트는 오래된 틱이 버려지고 최신 틱을 받음
+	(/realtime/{symbol}보다 먼저 등록해야 'stream'이 심볼로 매칭되지 않음)
+	"""
+	wanted = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip())) or list(REALTIME_SYMBOLS)
+	# 공유 스냅샷에 없는 심볼은 폴러마다 업스트림을 따로 호출하게 되므로 거부
+	unknown = [s for s in wanted if s not in REALTIME_SYMBOLS]
+	if unknown:
+		return JSONResponse(status_code=400, content={"error": f"unsupported symbols: {', '.join(unknown)} (allowed: {', '.join(REALTIME_SYMBOLS)})"})
+	hub = get_realtime_hub()
+	sub = hub.subscribe(wanted)
+
+	async def _events():
+		try:
+			while True:
+				if await request.is_disconnected():
 					break
-			except Exception:
-				usdkrw = None
-		# 3) 최근 14일 구간 스크래핑 후 가장 최근 값 사용(주말/휴일 포함, ffill 허용)
-		if usdkrw is None:
-			from dollar_scraper import get_usd_rates_df
-			from datetime import date, timedelta
-			today = date.today()
-			start = (today - timedelta(days=14)).strftime("%Y-%m-%d")
-			end = today.strftime("%Y-%m-%d")
-			df = get_usd_rates_df(start, end)
-			if not df.empty:
 				try:
-					usdkrw = float(df.iloc[-1]["usd_rate"])  # 마지막 가용값(주말이면 ffill된 값)
-				except Exception:
-					usdkrw = None
-		# 4) 최종 폴백(비상용)
-		if usdkrw is None:
-			usdkrw = 1300.0
-		# kimchi premium in real-time
-		kimchi_pct = (upbit_krw / (binance_usdt * usdkrw) - 1.0) * 100.0
+					tick = await asyncio.wait_for(sub.queue.get(), timeout=15.0)
+				except asyncio.TimeoutError:
+					# 프록시 타임아웃 방지용 keep-alive 주석
+					yield ": keep-alive\n\n"
+					continue
+				if sub.dropped:
+					tick = dict(tick, dropped=sub.dropped)
+				yield f"event: tick\ndata: {json.dumps(tick)}\n\n"
+		finally:
+			hub.unsubscribe(sub)
+
+	return StreamingResponse(_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/realtime/{symbol}")
+def get_realtime(symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP|ADA")):
+	try:
+		# Binance/Upbit 현재가는 공유 스냅샷(배치 조회)에서 가져옴
+		return get_realtime_quote(symbol)
+	except Exception as e:
+		return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/backfill/2020")
+def backfill_all_from_2020():
+	"""모든 심볼을 심볼별 시작일부터 오늘(KST 09:30 컷오프 반영)까지 백필한다.
+	- 환율/Greed는 한 번만 수집해 전 심볼이 공유, 거래소 시세는 심볼별로 동시 수집
+	"""
+	try:
+		eff_end = _effective_end_date(datetime.now().strftime("%Y-%m-%d"))
+		refreshed = _refresh_all_symbols(list(_SYMBOL_LISTING_START.keys()), eff_end)
+		for sym in refreshed:
+			get_revalidator().mark_fresh(sym)
 		return {
-			"timestamp": datetime.utcnow().isoformat(),
-			"binance_usdt": binance_usdt,
-			"upbit_krw": upbit_krw,
-			"usdkrw": usdkrw,
-			"kimchi_pct": kimchi_pct,
+			"end": eff_end,
+			"symbols": {sym: {"start": _SYMBOL_LISTING_START[sym], "rows": int(len(df))} for sym, df in refreshed.items()},
 		}
 	except Exception as e:
 		return JSONResponse(status_code=500, content={"error": str(e)})
@@ -318,7 +613,8 @@ def backfill_from_2020(symbol: str = Path(..., description="BTC|ETH|SOL|DOGE|XRP
 		# 증분 캐시를 활용하여 전체 구간을 보장
 		df = load_or_build_dataset(start, eff_end, cache_path=csv_path, use_cache=True, base_symbol=symbol)
 		# 캐시에 이미 저장되었지만, 확실히 저장
-		save_csv(df, csv_path)
+		save_csv(df, csv_path, base_symbol=symbol)
+		get_revalidator().mark_fresh(symbol)
 		return {"symbol": symbol, "start": start, "end": eff_end, "rows": int(len(df))}
 	except Exception as e:
 		return JSONResponse(status_code=500, content={"error": str(e)})
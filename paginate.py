@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from ratelimit import TokenBucket
+
+
+# 거래소별 페이지당 최대 일봉 수 (Binance USD-M klines limit, Upbit candles count)
+BINANCE_KLINES_LIMIT = 1500
+UPBIT_CANDLES_LIMIT = 200
+# 거래소 공개 한도: Binance USD-M은 IP당 분당 요청 weight 2400, Upbit 시세(candles) API는 초당 10회
+BINANCE_WEIGHT_PER_MINUTE = float(os.getenv("BINANCE_WEIGHT_PER_MINUTE", "2400"))
+UPBIT_QUOTATION_RATE = float(os.getenv("UPBIT_QUOTATION_RATE", "10"))
+# 한 구간 조회에서 동시에 받는 페이지 수 (실제 속도는 위 토큰 버킷이 결정)
+PAGE_FETCH_CONCURRENCY = int(os.getenv("EXCHANGE_PAGE_CONCURRENCY", "4"))
+
+# 프로세스 전역 거래소별 버킷 (심볼/스레드와 무관하게 공유)
+BINANCE_BUCKET = TokenBucket(BINANCE_WEIGHT_PER_MINUTE / 60.0)
+UPBIT_BUCKET = TokenBucket(UPBIT_QUOTATION_RATE)
+
+
+def binance_klines_weight(limit: int) -> int:
+    """GET /fapi/v1/klines 요청 weight (limit 구간별)."""
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+def page_ranges(start_date, end_date, page_days: int) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    """[start, end] 일 단위 구간을 page_days일 이하 페이지들로 나눈 경계 (양 끝 포함, 오래된 순).
+    3일 갱신은 1페이지, start > end면 빈 목록."""
+    start = pd.to_datetime(start_date).normalize()
+    end = pd.to_datetime(end_date).normalize()
+    days = (end - start).days + 1
+    pages = []
+    for offset in range(0, max(days, 0), page_days):
+        p0 = start + pd.Timedelta(days=offset)
+        p1 = min(end, p0 + pd.Timedelta(days=page_days - 1))
+        pages.append((p0, p1))
+    return pages
+
+
+def fetch_pages(
+    pages: list[tuple[pd.Timestamp, pd.Timestamp]],
+    fetch_page: Callable[[pd.Timestamp, pd.Timestamp], Any],
+    bucket: TokenBucket,
+    cost: Optional[Callable[[pd.Timestamp, pd.Timestamp], float]] = None,
+    concurrency: int = PAGE_FETCH_CONCURRENCY,
+) -> list:
+    """페이지별 fetch_page(p0, p1) 결과를 pages 순서대로 반환.
+    페이지마다 bucket에서 cost(없으면 1)만큼 토큰을 받은 뒤 호출하고, 2페이지 이상이면 동시에 받는다.
+    어느 페이지든 예외가 나면 호출 측으로 전파."""
+
+    def _one(page):
+        bucket.acquire(cost(*page) if cost is not None else 1.0)
+        return fetch_page(*page)
+
+    if len(pages) <= 1 or concurrency <= 1:
+        return [_one(page) for page in pages]
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(pages)), thread_name_prefix="page-fetch") as pool:
+        return list(pool.map(_one, pages))
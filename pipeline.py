@@ -1,15 +1,36 @@
 import os
-import time
 import json
 import math
-import ccxt
+import time
 import pyupbit
+import numpy as np
 import pandas as pd
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
 from dollar_scraper import get_usd_rates_df
+from exchange_clients import get_binance_usdm
+from gap_ledger import get_gap_ledger
+from greed_index import get_greed_history
+from dataset_store import clean_dataset_frame, get_dataset_store, slice_by_date
+from locks import SingleFlight, file_write_lock
+from paginate import (
+	BINANCE_BUCKET, BINANCE_KLINES_LIMIT, UPBIT_BUCKET, UPBIT_CANDLES_LIMIT, binance_klines_weight, fetch_pages, page_ranges,
+)
+from source_cache import RawSeriesCache
+from storage import diff_rows, get_storage
+
+
+# 다중 심볼 빌드 시 거래소 시세 동시 수집 개수
+EXCHANGE_FETCH_CONCURRENCY = int(os.getenv("EXCHANGE_FETCH_CONCURRENCY", "4"))
+# pyupbit가 None을 돌려준(상장 전으로 확인되지 않은) 페이지 재시도 횟수와 첫 대기(초, 회차마다 2배)
+UPBIT_PAGE_RETRIES = int(os.getenv("UPBIT_PAGE_RETRIES", "2"))
+UPBIT_RETRY_BACKOFF = float(os.getenv("UPBIT_RETRY_BACKOFF", "0.5"))
+
+# 동일 (심볼, 구간) 빌드를 하나로 합치기 위한 single-flight 그룹
+_build_flight = SingleFlight()
+_load_flight = SingleFlight()
 
 
 def _to_date(dt_like) -> pd.Timestamp:
@@ -36,86 +57,124 @@ def _validate_base_symbol(symbol: str) -> str:
 
 
 def fetch_binance_usdt_perp_daily(start_date: str, end_date: str, base_symbol: str = "BTC") -> pd.DataFrame:
-	"""Fetch {BASE}USDT (Binance USD-M Futures) daily close prices. Return [date, <base>_usdt as close]."""
+	"""Fetch {BASE}USDT (Binance USD-M Futures) daily close prices. Return [date, <base>_usdt as close].
+	구간을 1500일 페이지로 미리 나눠 동시에 받고, 요청 weight는 프로세스 전역 Binance 버킷으로 제한한다.
+	"""
+	return _fetch_binance_closes(start_date, end_date, base_symbol)[0]
+
+
+def _fetch_binance_closes(start_date: str, end_date: str, base_symbol: str = "BTC") -> Tuple[pd.DataFrame, Optional[pd.Timestamp]]:
+	"""(fetch_binance_usdt_perp_daily 결과, 상장일). 실패는 ccxt 예외로 전파.
+	since가 상장 전이면 Binance는 상장일 캔들부터 돌려주므로, 첫 캔들이 start 이후면 그 날짜가 상장일."""
 	base = _validate_base_symbol(base_symbol)
-	exchange = ccxt.binanceusdm({"enableRateLimit": True})
-	exchange.load_markets()
-	# Prefer exact market id like 'BTCUSDT'
-	market_id = f"{base}USDT"
-	symbol = None
-	for m in exchange.markets.values():
-		if m.get("id") == market_id:
-			symbol = m["symbol"]
-			break
-	if symbol is None:
-		for cand in [f"{base}/USDT:USDT", f"{base}/USDT"]:
-			if cand in exchange.markets:
-				symbol = cand
-				break
-	if symbol is None:
-		raise ValueError(f"Binance USDT-M futures market {market_id} not found")
-
-	timeframe = "1d"
-	since = _date_range_to_since_ms(start_date)
-	all_rows = []
-	limit = 1500
-	while True:
-		batch = exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
-		if not batch:
-			break
-		all_rows.extend(batch)
-		last_ts = batch[-1][0]
-		next_ts = last_ts + 1
-		if pd.to_datetime(last_ts, unit="ms", utc=True).date() >= pd.to_datetime(end_date).date():
-			break
-		since = next_ts
-		time.sleep(0.2)
+	# 공유 클라이언트: 마켓 메타데이터는 프로세스에서 한 번만 로드
+	client = get_binance_usdm()
+	exchange = client.exchange
+	symbol = client.resolve_symbol(base)
+
+	def _page_limit(p0: pd.Timestamp, p1: pd.Timestamp) -> int:
+		return (p1 - p0).days + 1
+
+	def _fetch_page(p0: pd.Timestamp, p1: pd.Timestamp) -> list:
+		since = _date_range_to_since_ms(p0.strftime("%Y-%m-%d"))
+		return exchange.fetch_ohlcv(symbol, timeframe="1d", since=since, limit=_page_limit(p0, p1))
+
+	pages = page_ranges(start_date, end_date, BINANCE_KLINES_LIMIT)
+	batches = fetch_pages(pages, _fetch_page, BINANCE_BUCKET, cost=lambda p0, p1: binance_klines_weight(_page_limit(p0, p1)))
+	all_rows = [row for batch in batches if batch for row in batch]
 
 	df = pd.DataFrame(all_rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
 	if df.empty:
-		return pd.DataFrame(columns=["date", "usdt_close"]) 
+		return pd.DataFrame(columns=["date", "usdt_close"]), None
 
 	df["date"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True).dt.tz_convert("UTC").dt.date
 	df = df[["date", "close"]].rename(columns={"close": "usdt_close"})
 	df["date"] = pd.to_datetime(df["date"])
+	first_candle = df["date"].min()
+	listed_from = first_candle if first_candle > pd.to_datetime(start_date) else None
 	mask = (df["date"] >= pd.to_datetime(start_date)) & (df["date"] <= pd.to_datetime(end_date))
 	df = df.loc[mask].drop_duplicates(subset=["date"]).sort_values("date").reset_index(drop=True)
-	return df
+	return df, listed_from
 
 
 def fetch_upbit_krw_daily(start_date: str, end_date: str, base_symbol: str = "BTC") -> pd.DataFrame:
-	"""Fetch Upbit KRW-{BASE} daily close. Return [date, krw_close]."""
+	"""Fetch Upbit KRW-{BASE} daily close. Return [date, krw_close].
+	Upbit는 호출당 최대 200개라 구간을 200일 페이지로 미리 나눠 동시에 받고, 프로세스 전역 Upbit 버킷(초당 10회)으로 제한한다.
+	"""
+	return _fetch_upbit_closes(start_date, end_date, base_symbol)[0]
+
+
+def _upbit_first_date(part: Optional[pd.DataFrame]) -> Optional[pd.Timestamp]:
+	# 인덱스는 KST 캔들 시작 시각(D일 09:00) → D일
+	if part is None or part.empty:
+		return None
+	return pd.Timestamp(part.index.min().date())
+
+
+def _fetch_upbit_closes(start_date: str, end_date: str, base_symbol: str = "BTC") -> Tuple[pd.DataFrame, Optional[pd.Timestamp]]:
+	"""(fetch_upbit_krw_daily 결과, 상장일).
+	pyupbit는 상장 전 구간(빈 응답)과 429/타임아웃/5xx를 모두 None으로 돌려주므로 None 페이지는 상장일로 가른다.
+	- 상장일: 데이터가 있는 가장 이른 페이지가 p0보다 늦게 시작하면(count개를 못 채움) 그 첫 날짜.
+	  구간 전체가 None이면 end 이후 페이지를 차례로 조회해 찾는다
+	- 상장일 이전 페이지만 버리고, 나머지 None 페이지는 UPBIT_PAGE_RETRIES회 다시 받은 뒤에도 None이면 예외
+	"""
 	base = _validate_base_symbol(base_symbol)
 	market = f"KRW-{base}"
-	# Upbit 단일 호출로 긴 기간(count가 매우 클 때)이 실패하는 경우가 있어, 200일 단위로 백필 페이징
-	end_dt = pd.to_datetime(end_date) + pd.Timedelta(days=1)
 	start_dt = pd.to_datetime(start_date)
-	to_ptr = end_dt
-	chunks = []
-	max_batch = 200
-	max_iters = 200  # 안전장치(최대 ~ 40,000일)
-	for _ in range(max_iters):
-		# 최신에서 과거로 200개 단위 페이징
-		part = pyupbit.get_ohlcv(
+
+	def _fetch_page(p0: pd.Timestamp, p1: pd.Timestamp) -> Optional[pd.DataFrame]:
+		# to는 배타적 UTC 시각: p1+1일 00:00 UTC 이전 캔들(= p1일 09:00 KST 캔들까지) count개
+		return pyupbit.get_ohlcv(
 			market,
 			interval="day",
-			count=max_batch,
-			to=to_ptr.strftime("%Y-%m-%d %H:%M:%S"),
+			count=(p1 - p0).days + 1,
+			to=(p1 + pd.Timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S"),
 		)
-		if part is None or part.empty:
+
+	def _listing_date(found: dict) -> Optional[pd.Timestamp]:
+		for page in sorted(found):
+			first = _upbit_first_date(found[page])
+			if first is not None:
+				return first if first > page[0] else None
+		return _probe_listing_after(pd.to_datetime(end_date).normalize())
+
+	def _probe_listing_after(end: pd.Timestamp) -> Optional[pd.Timestamp]:
+		# 요청 구간이 통째로 None: end 이후 페이지에서 처음 데이터가 나오는 곳을 찾는다 (오늘까지)
+		today = pd.Timestamp(datetime.now(timezone.utc).date())
+		p0 = end + pd.Timedelta(days=1)
+		while p0 <= today:
+			p1 = p0 + pd.Timedelta(days=UPBIT_CANDLES_LIMIT - 1)
+			UPBIT_BUCKET.acquire()
+			first = _upbit_first_date(_fetch_page(p0, p1))
+			if first is not None:
+				return first if first > p0 else None
+			p0 = p1 + pd.Timedelta(days=1)
+		return None
+
+	pages = page_ranges(start_date, end_date, UPBIT_CANDLES_LIMIT)
+	found = dict(zip(pages, fetch_pages(pages, _fetch_page, UPBIT_BUCKET)))
+	listed_from = None
+	for attempt in range(UPBIT_PAGE_RETRIES + 1):
+		missing = [page for page, part in found.items() if part is None or part.empty]
+		if not missing:
 			break
-		chunks.append(part)
-		oldest_ts = pd.to_datetime(part.index.min())
-		# 다음 루프용 포인터를 가장 오래된 캔들 직전 시각으로 이동
-		to_ptr = oldest_ts - pd.Timedelta(minutes=1)
-		# 이미 수집한 가장 오래된 날짜가 시작일 이전이면 중단
-		if oldest_ts.date() <= start_dt.date():
+		listed_from = _listing_date(found)
+		# 상장일 이전 페이지는 빈 결과가 정상
+		missing = [page for page in missing if listed_from is None or page[1] >= listed_from]
+		if not missing:
 			break
-		# API 과호출 방지
-		time.sleep(0.2)
+		if attempt == UPBIT_PAGE_RETRIES:
+			p0, p1 = missing[0]
+			raise RuntimeError(
+				f"Upbit {market} daily candles unavailable for {p0:%Y-%m-%d}~{p1:%Y-%m-%d} "
+				f"({len(missing)} page(s), {UPBIT_PAGE_RETRIES} retries)"
+			)
+		time.sleep(UPBIT_RETRY_BACKOFF * (2 ** attempt))
+		found.update(zip(missing, fetch_pages(missing, _fetch_page, UPBIT_BUCKET)))
+	chunks = [part for part in found.values() if part is not None and not part.empty]
 
 	if not chunks:
-		return pd.DataFrame(columns=["date", "krw_close"]) 
+		return pd.DataFrame(columns=["date", "krw_close"]), listed_from
 
 	# 수집한 조각 병합 후 정제
 	merged = pd.concat(chunks, axis=0)
@@ -126,31 +185,14 @@ def fetch_upbit_krw_daily(start_date: str, end_date: str, base_symbol: str = "BT
 	res = res[["date", "close"]].rename(columns={"close": "krw_close"})
 	mask = (res["date"] >= start_dt) & (res["date"] <= pd.to_datetime(end_date))
 	res = res.loc[mask].drop_duplicates(subset=["date"]).sort_values("date").reset_index(drop=True)
-	return res
+	return res, listed_from
 
 
 def fetch_greed_index_daily(start_date: str, end_date: str) -> pd.DataFrame:
-	"""Fetch Crypto Fear & Greed Index daily. Columns: [date, greed, greed_ffill]"""
-	url = "https://api.alternative.me/fng/?limit=0&date_format=us"
-	resp = requests.get(url, timeout=15)
-	resp.raise_for_status()
-	payload = resp.json()
-	items = payload.get("data", [])
-	rows = []
-	for it in items:
-		ts_str = it.get("timestamp"); val_str = it.get("value")
-		if val_str is None or ts_str is None:
-			continue
-		try:
-			dt = pd.to_datetime(ts_str)
-		except Exception:
-			try:
-				dt = pd.to_datetime(int(ts_str), unit="s", utc=True).tz_convert("UTC").tz_localize(None)
-			except Exception:
-				continue
-		rows.append((dt.normalize(), int(val_str)))
-	
-	df = pd.DataFrame(rows, columns=["date", "greed"]).drop_duplicates(subset=["date"]).sort_values("date")
+	"""Fetch Crypto Fear & Greed Index daily. Columns: [date, greed, greed_ffill]
+	원본 이력은 greed_index의 로컬 캐시(TTL)에서 가져온다.
+	"""
+	df = get_greed_history()
 	if df.empty:
 		return pd.DataFrame(columns=["date", "greed", "greed_ffill"]) 
 	
@@ -163,14 +205,51 @@ def fetch_greed_index_daily(start_date: str, end_date: str) -> pd.DataFrame:
 	return df
 
 
+# 거래소 원본 종가 캐시: 확정 캔들은 다시 받지 않고 워터마크 이후(오늘 잠정 캔들 포함)만 조회
+_BINANCE_CLOSES = RawSeriesCache("binance", "usdt_close", _fetch_binance_closes)
+_UPBIT_CLOSES = RawSeriesCache("upbit", "krw_close", _fetch_upbit_closes)
+
+
+def get_binance_closes(start_date: str, end_date: str, base_symbol: str = "BTC") -> pd.DataFrame:
+	"""[date, usdt_close] (원본 캐시 경유)."""
+	return _BINANCE_CLOSES.get(start_date, end_date, _validate_base_symbol(base_symbol))
+
+
+def get_upbit_closes(start_date: str, end_date: str, base_symbol: str = "BTC") -> pd.DataFrame:
+	"""[date, krw_close] (원본 캐시 경유)."""
+	return _UPBIT_CLOSES.get(start_date, end_date, _validate_base_symbol(base_symbol))
+
+
+def raw_covered_from(base_symbol: str) -> Optional[pd.Timestamp]:
+	"""두 거래소 원본이 모두 확인한 시작일. 이 날짜 이후에 시작하는 데이터셋의 앞쪽 공백은 상장 전이라 채울 것이 없다.
+	한쪽이라도 워터마크가 없으면 None."""
+	base = _validate_base_symbol(base_symbol)
+	firsts = [_BINANCE_CLOSES.covered_from(base), _UPBIT_CLOSES.covered_from(base)]
+	if any(first is None for first in firsts):
+		return None
+	return max(firsts)
+
+
 def build_dataset(start_date: str, end_date: str, base_symbol: str = "BTC") -> pd.DataFrame:
-	"""Build joined DF with columns: date, usdt_close, krw_close, usdkrw, usd_ffill, greed, greed_ffill, kimchi_pct"""
+	"""Build joined DF with columns: date, usdt_close, krw_close, usdkrw, usd_ffill, greed, greed_ffill, kimchi_pct
+	동시에 같은 (심볼, 구간)을 요청하면 한 번만 빌드하고 결과를 공유한다.
+	"""
 	base = _validate_base_symbol(base_symbol)
-	binance_df = fetch_binance_usdt_perp_daily(start_date, end_date, base)
-	upbit_df = fetch_upbit_krw_daily(start_date, end_date, base)
+	df, shared = _build_flight.do((base, start_date, end_date), lambda: _build_dataset(start_date, end_date, base))
+	return df.copy() if shared else df
+
+
+def _build_dataset(start_date: str, end_date: str, base: str) -> pd.DataFrame:
+	# 4개 소스 모두 각자의 로컬 캐시(거래소 원본 종가, USD/KRW, Greed)에서 읽고, 조인/김프 계산만 여기서 수행
+	binance_df = get_binance_closes(start_date, end_date, base)
+	upbit_df = get_upbit_closes(start_date, end_date, base)
 	usd_df = get_usd_rates_df(start_date, end_date).rename(columns={"usd_rate": "usdkrw"})
 	greed_df = fetch_greed_index_daily(start_date, end_date)
-	
+	return _join_sources(binance_df, upbit_df, usd_df, greed_df)
+
+
+def _join_sources(binance_df: pd.DataFrame, upbit_df: pd.DataFrame, usd_df: pd.DataFrame, greed_df: pd.DataFrame) -> pd.DataFrame:
+	"""4개 소스를 inner join하고 kimchi_pct를 계산한다."""
 	for df in (binance_df, upbit_df, usd_df, greed_df):
 		if not df.empty:
 			df["date"] = pd.to_datetime(df["date"]).dt.normalize()
@@ -191,57 +270,130 @@ def build_dataset(start_date: str, end_date: str, base_symbol: str = "BTC") -> p
 	return df[["date", "usdt_close", "krw_close", "usdkrw", "usd_ffill", "greed", "greed_ffill", "kimchi_pct"]].sort_values("date").reset_index(drop=True)
 
 
-def save_csv(df: pd.DataFrame, path: str) -> None:
-    """원자적 저장: 임시 파일에 쓰고 교체하여 부분 손상 방지."""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    tmp_path = f"{path}.tmp"
-    
-    # 빈 값들을 이전 값으로 채우기 (forward fill)
-    df_copy = df.copy()
-    for col in ["usdkrw", "greed", "usdt_close", "krw_close", "kimchi_pct"]:
-        if col in df_copy.columns:
-            df_copy[col] = df_copy[col].ffill()
-    
-    df_copy.to_csv(tmp_path, index=False)
-    try:
-        os.replace(tmp_path, path)
-    except Exception:
-        # 교체 실패 시라도 최후 수단으로 직접 저장
-        df_copy.to_csv(path, index=False)
+def build_datasets(symbols: list[str], start_date: str, end_date: str) -> dict[str, pd.DataFrame]:
+	"""여러 심볼을 한 번에 빌드한다.
+	- 심볼과 무관한 USD/KRW, Greed는 한 번만 가져옴
+	- 심볼별 거래소 시세는 EXCHANGE_FETCH_CONCURRENCY 개씩 동시에 수집
+	- 수집 실패한 심볼은 결과에서 빠진다 (호출 측에서 개별 빌드로 폴백)
+	"""
+	bases = list(dict.fromkeys(_validate_base_symbol(s) for s in symbols))
+	usd_df = get_usd_rates_df(start_date, end_date).rename(columns={"usd_rate": "usdkrw"})
+	greed_df = fetch_greed_index_daily(start_date, end_date)
+
+	with ThreadPoolExecutor(max_workers=EXCHANGE_FETCH_CONCURRENCY, thread_name_prefix="exchange-fetch") as pool:
+		futures = {
+			base: (
+				pool.submit(get_binance_closes, start_date, end_date, base),
+				pool.submit(get_upbit_closes, start_date, end_date, base),
+			)
+			for base in bases
+		}
+	results: dict[str, pd.DataFrame] = {}
+	for base, (binance_f, upbit_f) in futures.items():
+		try:
+			binance_df, upbit_df = binance_f.result(), upbit_f.result()
+		except Exception as e:
+			print(f"[WARN] {base} 거래소 시세 수집 실패: {e}")
+			continue
+		results[base] = _join_sources(binance_df, upbit_df, usd_df.copy(), greed_df.copy())
+	return results
+
+
+def _prefetched_builder(prefetched: dict[str, pd.DataFrame], start_date: str, end_date: str):
+	"""build_datasets 결과 범위 안의 빌드 요청은 슬라이스로 대체하는 builder를 만든다."""
+	lo, hi = pd.to_datetime(start_date), pd.to_datetime(end_date)
+
+	def _builder(s: str, e: str, base_symbol: str = "BTC") -> pd.DataFrame:
+		pre = prefetched.get(base_symbol.upper())
+		if pre is not None and lo <= pd.to_datetime(s) and pd.to_datetime(e) <= hi:
+			return slice_by_date(pre, s, e)
+		return build_dataset(s, e, base_symbol=base_symbol)
+
+	return _builder
+
+
+def load_or_build_datasets(starts: dict[str, str], end_date: str, cache_paths: dict[str, str]) -> dict[str, pd.DataFrame]:
+	"""여러 심볼의 증분 갱신을 한 번의 공유 수집으로 처리한다.
+	- 심볼별로 필요한 구간(최근 3일 재확인 ~ end, 캐시가 없으면 시작일 ~ end)의 합집합을 build_datasets로 한 번에 빌드
+	- 이후 각 심볼은 기존 load_or_build_dataset 증분 로직을 그대로 타되, 합집합 안의 빌드는 미리 받은 결과를 사용
+	- 반환: {심볼: [start, end] 구간 DF}. 실패한 심볼은 빠진다
+	"""
+	store = get_dataset_store()
+	end_dt = pd.to_datetime(end_date).normalize()
+	union_start = end_dt
+	for sym, start in starts.items():
+		cached = store.get(sym, cache_paths[sym])
+		if cached is None or cached.empty:
+			need_from = pd.to_datetime(start).normalize()
+		else:
+			need_from = max(cached["date"].iloc[0], cached["date"].iloc[-1] - pd.Timedelta(days=2))
+		union_start = min(union_start, need_from)
+	union_start_str = union_start.strftime("%Y-%m-%d")
+
+	prefetched = build_datasets(list(starts), union_start_str, end_date)
+	builder = _prefetched_builder(prefetched, union_start_str, end_date)
+	results: dict[str, pd.DataFrame] = {}
+	for sym, start in starts.items():
+		try:
+			results[sym] = load_or_build_dataset(start, end_date, cache_path=cache_paths[sym], use_cache=True, base_symbol=sym, builder=builder)
+		except Exception as e:
+			print(f"[WARN] {sym} 데이터셋 갱신 실패: {e}")
+	return results
 
 
-def load_or_build_dataset(start_date: str, end_date: str, cache_path: Optional[str] = None, use_cache: bool = True, base_symbol: str = "BTC") -> pd.DataFrame:
+def save_csv(df: pd.DataFrame, path: str, base_symbol: Optional[str] = None) -> None:
+    """원자적 저장: 임시 파일에 쓰고 교체하여 부분 손상 방지.
+    - 실제 파일 형식은 저장 백엔드(storage.get_storage: CSV 또는 연도별 Parquet)가 결정, path는 논리 경로
+    - base_symbol이 주어지면 저장소의 이전 프레임과 비교해 바뀐 행만 저널에 추가 (전체 재작성 회피)
+    - base_symbol이 주어지면 저장한 프레임을 데이터셋 저장소에도 등록 (재파싱 방지)
+    """
+    # 정렬/중복 제거 + 빈 값들을 이전 값으로 채우기 (forward fill)
+    df_copy = clean_dataset_frame(df)
+    
+    # 같은 파일에 대한 동시 저장이 .tmp를 공유하지 않도록 파일별 락
+    with file_write_lock(path):
+        storage = get_storage()
+        prev = get_dataset_store().get(base_symbol, path) if base_symbol else None
+        changed = diff_rows(prev, df_copy)
+        if changed is None:
+            storage.write(df_copy, path)
+        else:
+            storage.upsert(changed, path)
+        if base_symbol:
+            get_dataset_store().put(base_symbol, path, df_copy)
+
+
+def load_or_build_dataset(start_date: str, end_date: str, cache_path: Optional[str] = None, use_cache: bool = True, base_symbol: str = "BTC", builder: Optional[Callable[..., pd.DataFrame]] = None) -> pd.DataFrame:
     """증분 캐시를 사용해 데이터셋을 반환한다.
     - 캐시가 있으면 앞뒤 결손 구간만 빌드하여 append/prepend 후 저장
     - 캐시가 없으면 전체 구간 빌드 후 저장
     - 최근 3일 데이터는 항상 다시 확인하여 업데이트 (데이터 정확도 보장)
     - 항상 [start_date, end_date] 구간으로 슬라이싱하여 반환
+    - 같은 (심볼, 구간) 동시 호출은 하나의 빌드 결과를 공유 (single-flight)
+    - builder: 구간 빌드 함수 (기본 build_dataset, 다중 심볼 갱신 시 미리 수집한 결과를 재사용)
     """
+    builder = builder or build_dataset
+    key = (base_symbol.upper(), start_date, end_date, cache_path, use_cache)
+    df, shared = _load_flight.do(key, lambda: _load_or_build_dataset(start_date, end_date, cache_path, use_cache, base_symbol, builder))
+    return df.copy() if shared else df
+
+
+def _load_or_build_dataset(start_date: str, end_date: str, cache_path: Optional[str], use_cache: bool, base_symbol: str, builder: Callable[..., pd.DataFrame]) -> pd.DataFrame:
     req_start_dt = pd.to_datetime(start_date).normalize()
     req_end_dt = pd.to_datetime(end_date).normalize()
 
     cache_df: Optional[pd.DataFrame] = None
-    if cache_path and use_cache and os.path.exists(cache_path) and os.path.getsize(cache_path) > 0:
-        try:
-            cache_df = pd.read_csv(cache_path, parse_dates=["date"])  # columns: date, usdt_close, krw_close, usdkrw, usd_ffill, greed, greed_ffill, kimchi_pct
-            cache_df["date"] = pd.to_datetime(cache_df["date"]).dt.normalize()
-            cache_df = cache_df.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
-            
-            # 빈 값들을 이전 값으로 채우기 (forward fill)
-            for col in ["usdkrw", "greed", "usdt_close", "krw_close", "kimchi_pct"]:
-                if col in cache_df.columns:
-                    cache_df[col] = cache_df[col].ffill()
-        except Exception:
-            cache_df = None
+    if cache_path and use_cache:
+        # 정제된 프레임을 메모리 저장소에서 가져옴 (파일이 바뀐 경우에만 재파싱)
+        cache_df = get_dataset_store().get(base_symbol, cache_path)
 
     # 캐시가 없으면 전체 빌드 후 저장
     if cache_df is None or cache_df.empty:
-        built = build_dataset(start_date, end_date, base_symbol=base_symbol)
+        built = builder(start_date, end_date, base_symbol=base_symbol)
         if cache_path:
-            save_csv(built, cache_path)
+            save_csv(built, cache_path, base_symbol=base_symbol)
         # 반환은 요청 구간 그대로
-        mask = (built["date"] >= req_start_dt) & (built["date"] <= req_end_dt)
-        return built.loc[mask].reset_index(drop=True)
+        return slice_by_date(built, req_start_dt, req_end_dt)
 
     # 앞/뒤 결손 구간 보정 + 소규모 중간 결손 보정
     earliest_cached = pd.to_datetime(cache_df["date"].min()).normalize()
@@ -256,7 +408,7 @@ def load_or_build_dataset(start_date: str, end_date: str, cache_path: Optional[s
     if recent_start <= recent_end:
         recent_start_str = recent_start.strftime("%Y-%m-%d")
         recent_end_str = recent_end.strftime("%Y-%m-%d")
-        recent_df = build_dataset(recent_start_str, recent_end_str, base_symbol=base_symbol)
+        recent_df = builder(recent_start_str, recent_end_str, base_symbol=base_symbol)
         
         if not recent_df.empty:
             # 기존 캐시에서 최근 3일 데이터 제거
@@ -270,58 +422,69 @@ def load_or_build_dataset(start_date: str, end_date: str, cache_path: Optional[s
     if req_end_dt > updated_latest:
         gap_start = (updated_latest + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
         gap_end = req_end_dt.strftime("%Y-%m-%d")
-        gap_df = build_dataset(gap_start, gap_end, base_symbol=base_symbol)
+        gap_df = builder(gap_start, gap_end, base_symbol=base_symbol)
         if not gap_df.empty:
             updated_df = pd.concat([updated_df, gap_df], ignore_index=True)
             updated_df = updated_df.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
             # 내부 소규모 갭도 함께 메움
-            updated_df = _fill_small_internal_gaps(updated_df, base_symbol)
+            updated_df = _fill_small_internal_gaps(updated_df, base_symbol, builder)
 
     # 앞쪽 결손: req_start_dt ~ (earliest_cached-1)
     updated_earliest = pd.to_datetime(updated_df["date"].min()).normalize()
     if req_start_dt < updated_earliest:
         pre_end = (updated_earliest - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
         pre_start = req_start_dt.strftime("%Y-%m-%d")
-        pre_df = build_dataset(pre_start, pre_end, base_symbol=base_symbol)
+        pre_df = builder(pre_start, pre_end, base_symbol=base_symbol)
         if not pre_df.empty:
             updated_df = pd.concat([pre_df, updated_df], ignore_index=True)
             updated_df = updated_df.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
             # 내부 소규모 갭도 함께 메움
-            updated_df = _fill_small_internal_gaps(updated_df, base_symbol)
+            updated_df = _fill_small_internal_gaps(updated_df, base_symbol, builder)
 
     # 캐시 파일 갱신
     if cache_path and use_cache:
-        save_csv(updated_df, cache_path)
+        with file_write_lock(cache_path):
+            # 다른 구간의 빌드가 그 사이 먼저 저장했다면 그 행들을 잃지 않도록 병합 (이번 결과 우선)
+            latest_df = get_dataset_store().get(base_symbol, cache_path)
+            if latest_df is not None and latest_df is not cache_df:
+                updated_df = pd.concat([latest_df, updated_df], ignore_index=True)
+                updated_df = updated_df.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
+            save_csv(updated_df, cache_path, base_symbol=base_symbol)
 
     # 요청 구간 슬라이스 반환
-    mask = (updated_df["date"] >= req_start_dt) & (updated_df["date"] <= req_end_dt)
-    return updated_df.loc[mask].reset_index(drop=True)
+    return slice_by_date(updated_df, req_start_dt, req_end_dt)
 
 
 def _detect_small_gaps(dates: pd.Series, max_gap_days: int = 7) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
-    """연속 일자에서 소규모 결손 구간들을 탐지한다."""
+    """연속 일자에서 소규모 결손 구간들을 탐지한다 (인접 날짜 차이를 한 번에 계산)."""
     if dates.empty:
         return []
-    ds = pd.to_datetime(dates).sort_values().drop_duplicates().reset_index(drop=True)
-    gaps = []
-    for i in range(1, len(ds)):
-        prev = ds.iloc[i - 1]
-        curr = ds.iloc[i]
-        if (curr - prev).days > 1:
-            gap_len = (curr - prev).days - 1
-            if gap_len <= max_gap_days:
-                gaps.append((prev + pd.Timedelta(days=1), curr - pd.Timedelta(days=1)))
-    return gaps
-
-
-def _fill_small_internal_gaps(updated_df: pd.DataFrame, base_symbol: str) -> pd.DataFrame:
-    """소규모 내부 결손(<=7일)을 감지해 해당 범위만 빌드/병합한다."""
+    ds = np.unique(pd.to_datetime(dates).dt.normalize().to_numpy(dtype="datetime64[D]"))
+    diffs = np.diff(ds).astype(int)
+    mask = (diffs > 1) & (diffs - 1 <= max_gap_days)
+    one_day = np.timedelta64(1, "D")
+    starts = ds[:-1][mask] + one_day
+    ends = ds[1:][mask] - one_day
+    return [(pd.Timestamp(g0), pd.Timestamp(g1)) for g0, g1 in zip(starts, ends)]
+
+
+def _fill_small_internal_gaps(updated_df: pd.DataFrame, base_symbol: str, builder: Callable[..., pd.DataFrame] = None) -> pd.DataFrame:
+    """소규모 내부 결손(<=7일)을 감지해 해당 범위만 빌드/병합한다.
+    갭 장부(gap_ledger)에 시도를 기록해, 채워지지 않는 갭은 백오프 시각 전까지 다시 빌드하지 않는다.
+    """
+    builder = builder or build_dataset
     gaps = _detect_small_gaps(updated_df["date"]) if not updated_df.empty else []
+    ledger = get_gap_ledger()
+    ledger.prune(base_symbol, gaps)
     for (g0, g1) in gaps:
+        if not ledger.should_attempt(base_symbol, g0, g1):
+            continue
         g_start = g0.strftime("%Y-%m-%d")
         g_end = g1.strftime("%Y-%m-%d")
-        gap_df = build_dataset(g_start, g_end, base_symbol=base_symbol)
-        if not gap_df.empty:
+        gap_df = builder(g_start, g_end, base_symbol=base_symbol)
+        filled = not gap_df.empty and bool(((gap_df["date"] >= g0) & (gap_df["date"] <= g1)).any())
+        if filled:
             updated_df = pd.concat([updated_df, gap_df], ignore_index=True)
             updated_df = updated_df.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
-    return updated_df
\ No newline at end of file
+        ledger.record(base_symbol, g0, g1, filled=filled)
+    return updated_df
@@ -0,0 +1,248 @@
+import threading
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from analytics import first_change
+
+
+DEFAULT_PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def _prefix(values: np.ndarray, start: int, base: Optional[np.ndarray]) -> np.ndarray:
+    """누적합 배열(길이 n+1). base[:start+1]을 재사용하고 start 이후만 다시 누적한다."""
+    out = np.empty(len(values) + 1, dtype="float64")
+    if base is None or start == 0:
+        out[0] = 0.0
+        out[1:] = np.cumsum(values)
+    else:
+        out[: start + 1] = base[: start + 1]
+        out[start + 1:] = base[start] + np.cumsum(values[start:])
+    return out
+
+
+class RangeStatsIndex:
+    """한 심볼의 kimchi_pct/greed 시계열에 대한 구간 통계 인덱스.
+    - 누적합(개수, 합, 제곱합, greed와의 곱 등): 평균/표준편차/상관계수 O(1)
+    - sparse table: 최소/최대 O(1)
+    - merge-sort tree(2^k 정렬 블록): 백분위수 O(log^3 n)
+    - update: 처음 바뀐 행 p 이후에 걸친 항목만 다시 계산 (일일 append, 최근 3일 덮어쓰기)
+    """
+
+    def __init__(self):
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.source: Optional[pd.DataFrame] = None
+        self._prefix: dict[str, np.ndarray] = {}
+        self._min: list[np.ndarray] = []
+        self._max: list[np.ndarray] = []
+        self._sorted: list[np.ndarray] = []
+
+    def update(self, frame: pd.DataFrame) -> int:
+        """새 프레임 반영. 다시 계산한 시작 행 위치를 반환 (len(frame)이면 변경 없음)."""
+        source = frame[["date", "kimchi_pct", "greed"]].reset_index(drop=True)
+        p = first_change(self.source, source) if self.source is not None else 0
+        n = len(source)
+        if self.source is not None and p == n == len(self.source):
+            return n
+        if self.source is not None and len(self.source) > n:
+            # 행이 줄어든 경우(재작성) 잘린 지점부터 다시 계산
+            p = min(p, n)
+
+        x = source["kimchi_pct"].to_numpy(dtype="float64")
+        g = source["greed"].to_numpy(dtype="float64")
+        xv = ~np.isnan(x)
+        both = xv & ~np.isnan(g)
+        x0 = np.where(xv, x, 0.0)
+        xb = np.where(both, x, 0.0)
+        gb = np.where(both, g, 0.0)
+        series = {
+            "n": xv.astype("float64"),
+            "sum": x0,
+            "sumsq": x0 * x0,
+            "g_n": both.astype("float64"),
+            "g_x": xb,
+            "g_sum": gb,
+            "g_xx": xb * xb,
+            "g_gg": gb * gb,
+            "g_xg": xb * gb,
+        }
+        self._prefix = {name: _prefix(vals, p, self._prefix.get(name)) for name, vals in series.items()}
+
+        # sparse table: level k의 i번째 = x[i : i+2^k] 의 min/max. i+2^k-1 >= p 인 항목만 재계산
+        lo_vals = np.where(xv, x, np.inf)
+        hi_vals = np.where(xv, x, -np.inf)
+        mins, maxs = [lo_vals], [hi_vals]
+        k = 1
+        while (1 << k) <= n:
+            half = 1 << (k - 1)
+            length = n - (1 << k) + 1
+            keep = min(max(0, p - (1 << k) + 1), length)
+            new_min = np.empty(length)
+            new_max = np.empty(length)
+            if keep > 0 and k < len(self._min):
+                new_min[:keep] = self._min[k][:keep]
+                new_max[:keep] = self._max[k][:keep]
+            else:
+                keep = 0
+            new_min[keep:] = np.minimum(mins[k - 1][keep:length], mins[k - 1][keep + half:length + half])
+            new_max[keep:] = np.maximum(maxs[k - 1][keep:length], maxs[k - 1][keep + half:length + half])
+            mins.append(new_min)
+            maxs.append(new_max)
+            k += 1
+        self._min, self._max = mins, maxs
+
+        # merge-sort tree: level k는 길이 2^k 정렬 블록들을 이어 놓은 배열. p가 속한 블록부터 재정렬
+        sorted_levels = []
+        k = 0
+        while True:
+            size = 1 << k
+            start = (p // size) * size
+            level = np.empty(n)
+            if start > 0 and k < len(self._sorted):
+                level[:start] = self._sorted[k][:start]
+            else:
+                start = 0
+            tail = np.where(xv, x, np.nan)[start:]
+            full = (len(tail) // size) * size
+            if full:
+                level[start:start + full] = np.sort(tail[:full].reshape(-1, size), axis=1).ravel()
+            if full < len(tail):
+                level[start + full:] = np.sort(tail[full:])
+            sorted_levels.append(level)
+            if size >= n:
+                break
+            k += 1
+        self._sorted = sorted_levels
+
+        self.dates = source["date"].to_numpy(dtype="datetime64[ns]")
+        self.source = source
+        return p
+
+    def _bounds(self, start, end) -> tuple[int, int]:
+        lo = int(self.dates.searchsorted(pd.Timestamp(start).normalize().to_datetime64(), side="left"))
+        hi = int(self.dates.searchsorted(pd.Timestamp(end).normalize().to_datetime64(), side="right"))
+        # start > end면 빈 구간
+        return lo, max(lo, hi)
+
+    def _range_sum(self, name: str, lo: int, hi: int) -> float:
+        arr = self._prefix[name]
+        return float(arr[hi] - arr[lo])
+
+    def _range_minmax(self, lo: int, hi: int) -> tuple[float, float]:
+        k = (hi - lo).bit_length() - 1
+        span = 1 << k
+        mn = min(self._min[k][lo], self._min[k][hi - span])
+        mx = max(self._max[k][lo], self._max[k][hi - span])
+        return float(mn), float(mx)
+
+    def _blocks(self, lo: int, hi: int) -> list[np.ndarray]:
+        """[lo, hi)를 정렬된 2^k 정렬 블록들로 분해 (O(log n)개)."""
+        out = []
+        i = lo
+        top = len(self._sorted) - 1
+        while i < hi:
+            k = min((i & -i).bit_length() - 1 if i else top, (hi - i).bit_length() - 1, top)
+            size = 1 << k
+            out.append(self._sorted[k][i:i + size])
+            i += size
+        return out
+
+    def _kth_many(self, blocks: list[np.ndarray], ks: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+        """블록들 합집합에서 ks번째(0부터) 작은 값들. 정렬된 후보값에서 모든 k를 동시에 이분 탐색."""
+        lo = np.zeros(len(ks), dtype=int)
+        hi = np.full(len(ks), len(candidates) - 1)
+        while (lo < hi).any():
+            mid = (lo + hi) // 2
+            cnt = np.zeros(len(ks), dtype=int)
+            vals = candidates[mid]
+            for b in blocks:
+                cnt += b.searchsorted(vals, side="right")
+            ok = cnt >= ks + 1
+            hi = np.where(ok, mid, hi)
+            lo = np.where(ok, lo, mid + 1)
+        return candidates[lo]
+
+    def query(self, start, end, percentiles: list[float] = DEFAULT_PERCENTILES) -> dict:
+        lo, hi = self._bounds(start, end)
+        rows = hi - lo
+        count = int(round(self._range_sum("n", lo, hi))) if rows > 0 else 0
+        result = {
+            "start": pd.Timestamp(self.dates[lo]).strftime("%Y-%m-%d") if rows > 0 else None,
+            "end": pd.Timestamp(self.dates[hi - 1]).strftime("%Y-%m-%d") if rows > 0 else None,
+            "rows": rows,
+            "count": count,
+            "kimchi_pct": None,
+            "greed": None,
+        }
+        if count == 0:
+            return result
+
+        total = self._range_sum("sum", lo, hi)
+        mean = total / count
+        var = (self._range_sum("sumsq", lo, hi) - count * mean * mean) / (count - 1) if count > 1 else None
+        mn, mx = self._range_minmax(lo, hi)
+
+        blocks = self._blocks(lo, hi)
+        # 후보값: 전체를 한 블록으로 가진 최상위 레벨(정렬, NaN은 끝)에서 [min, max] 구간만
+        top = self._sorted[-1]
+        candidates = top[np.searchsorted(top, mn, side="left"):np.searchsorted(top, mx, side="right")]
+        # numpy 기본(linear) 보간과 같은 방식: pos = q/100*(count-1), 인접한 두 순위값을 보간
+        pos = np.asarray(percentiles, dtype="float64") / 100.0 * (count - 1)
+        k0 = np.floor(pos).astype(int)
+        k1 = np.minimum(k0 + 1, count - 1)
+        values = self._kth_many(blocks, np.concatenate([k0, k1]), candidates)
+        v0, v1 = values[: len(k0)], values[len(k0):]
+        interp = v0 + (v1 - v0) * (pos - k0)
+        pct = {f"p{q:g}": float(v) for q, v in zip(percentiles, interp)}
+
+        result["kimchi_pct"] = {
+            "mean": mean,
+            "std": float(np.sqrt(max(var, 0.0))) if var is not None else None,
+            "min": mn,
+            "max": mx,
+            **pct,
+        }
+
+        gn = self._range_sum("g_n", lo, hi)
+        if gn > 0:
+            sx, sg = self._range_sum("g_x", lo, hi), self._range_sum("g_sum", lo, hi)
+            cov = self._range_sum("g_xg", lo, hi) - sx * sg / gn
+            vx = self._range_sum("g_xx", lo, hi) - sx * sx / gn
+            vg = self._range_sum("g_gg", lo, hi) - sg * sg / gn
+            corr = cov / np.sqrt(vx * vg) if vx > 0 and vg > 0 else None
+            result["greed"] = {
+                "mean": sg / gn,
+                "corr_kimchi_pct": float(corr) if corr is not None else None,
+            }
+        return result
+
+
+class RangeStatsRegistry:
+    """심볼별 인덱스를 데이터셋 버전이 바뀔 때만 증분 갱신한다."""
+
+    def __init__(self):
+        self._indexes: dict[str, tuple[Optional[str], RangeStatsIndex]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, version: Optional[str], frame: pd.DataFrame) -> RangeStatsIndex:
+        symbol = symbol.upper()
+        with self._lock:
+            entry = self._indexes.get(symbol)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            # 진행 중인 조회가 쓰는 인덱스를 건드리지 않도록 갱신은 새 객체에 한다
+            index = RangeStatsIndex()
+            if entry is not None:
+                prev = entry[1]
+                index.__dict__.update(prev.__dict__)
+            index.update(frame)
+            self._indexes[symbol] = (version, index)
+            return index
+
+
+_REGISTRY = RangeStatsRegistry()
+
+
+def get_range_stats(symbol: str, version: Optional[str], frame: pd.DataFrame) -> RangeStatsIndex:
+    return _REGISTRY.get(symbol, version, frame)
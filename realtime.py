@@ -0,0 +1,237 @@
+import os
+import asyncio
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import pyupbit
+
+from dataset_store import get_dataset_store
+from dollar_scraper import get_usd_rates_df
+from exchange_clients import get_binance_usdm
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# 스냅샷에 항상 포함할 심볼 (모든 클라이언트가 같은 스냅샷을 공유)
+REALTIME_SYMBOLS = [s.strip().upper() for s in os.getenv("REALTIME_SYMBOLS", "BTC,ETH,SOL,DOGE,XRP,ADA").split(",") if s.strip()]
+# 스냅샷 재사용 시간(초). 이 시간 안의 요청은 업스트림 호출 없이 같은 스냅샷으로 응답
+REALTIME_TTL_SECONDS = float(os.getenv("REALTIME_TTL", "1.0"))
+
+
+def latest_usdkrw() -> float:
+    """실시간 김프 계산용 USDKRW.
+    1) 심볼 CSV 캐시의 마지막 usdkrw (BTC 우선)
+    2) 최근 14일 구간 스크래핑 후 가장 최근 값 (주말/휴일 ffill 허용)
+    3) 최종 폴백 1300.0 (비상용)
+    """
+    store = get_dataset_store()
+    for sym in ["BTC"] + [s for s in REALTIME_SYMBOLS if s != "BTC"]:
+        path = os.path.join(DATA_DIR, f"kimchi_premium_daily_{sym}.csv")
+        try:
+            df = store.get(sym, path)
+            if df is not None and "usdkrw" in df.columns and not df.empty:
+                return float(df["usdkrw"].iloc[-1])  # 마지막 행
+        except Exception:
+            continue
+    try:
+        today = date.today()
+        df = get_usd_rates_df((today - timedelta(days=14)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d"))
+        if not df.empty:
+            return float(df.iloc[-1]["usd_rate"])  # 마지막 가용값(주말이면 ffill된 값)
+    except Exception:
+        pass
+    return 1300.0
+
+
+def compute_kimchi_pct(upbit_krw: float, binance_usdt: float, usdkrw: float) -> float:
+    return (upbit_krw / (binance_usdt * usdkrw) - 1.0) * 100.0
+
+
+def fetch_quotes(symbols: list[str]) -> dict[str, dict]:
+    """Binance fetch_tickers 1회 + Upbit 다중 마켓 현재가 1회로 여러 심볼 시세를 가져온다.
+    반환: {SYM: {binance_usdt, upbit_krw}} (한쪽 가격이라도 없는 심볼은 제외)
+    """
+    client = get_binance_usdm()
+    market_by_symbol = {}
+    for sym in symbols:
+        try:
+            market_by_symbol[sym] = client.resolve_symbol(sym)
+        except ValueError:
+            continue
+    tickers = client.exchange.fetch_tickers(list(market_by_symbol.values())) if market_by_symbol else {}
+    upbit_markets = [f"KRW-{sym}" for sym in symbols]
+    upbit_prices = pyupbit.get_current_price(upbit_markets) if upbit_markets else {}
+    if upbit_prices is not None and not isinstance(upbit_prices, dict):
+        # 단일 마켓 요청은 float로 반환됨
+        upbit_prices = {upbit_markets[0]: upbit_prices}
+    upbit_prices = upbit_prices or {}
+
+    quotes = {}
+    for sym, market in market_by_symbol.items():
+        last = (tickers.get(market) or {}).get("last")
+        upbit_krw = upbit_prices.get(f"KRW-{sym}")
+        if last is None or upbit_krw is None:
+            continue
+        quotes[sym] = {"binance_usdt": float(last), "upbit_krw": float(upbit_krw)}
+    return quotes
+
+
+class RealtimeSnapshotCache:
+    """설정된 전체 심볼 시세를 짧은 TTL 동안 공유하는 스냅샷 캐시.
+    TTL이 지난 뒤 동시에 들어온 요청들 중 하나만 업스트림을 호출한다.
+    """
+
+    def __init__(self, symbols: list[str], ttl_seconds: float = REALTIME_TTL_SECONDS, fetcher=fetch_quotes):
+        self.symbols = list(symbols)
+        self.ttl_seconds = ttl_seconds
+        self._fetcher = fetcher
+        self._snapshot: Optional[dict] = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> dict:
+        snap = self._snapshot
+        if snap is not None and time.monotonic() - self._fetched_at < self.ttl_seconds:
+            return snap
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._fetched_at < self.ttl_seconds:
+                return self._snapshot
+            self._snapshot = self._build()
+            self._fetched_at = time.monotonic()
+            return self._snapshot
+
+    def _build(self) -> dict:
+        raw = self._fetcher(self.symbols)
+        usdkrw = latest_usdkrw()
+        quotes = {}
+        for sym, q in raw.items():
+            quotes[sym] = {
+                "binance_usdt": q["binance_usdt"],
+                "upbit_krw": q["upbit_krw"],
+                "kimchi_pct": compute_kimchi_pct(q["upbit_krw"], q["binance_usdt"], usdkrw),
+            }
+        return {"timestamp": datetime.utcnow().isoformat(), "usdkrw": usdkrw, "quotes": quotes}
+
+
+_SNAPSHOTS = RealtimeSnapshotCache(REALTIME_SYMBOLS)
+
+
+def get_realtime_snapshot() -> dict:
+    return _SNAPSHOTS.get()
+
+
+def get_realtime_quote(symbol: str) -> dict:
+    """단일 심볼 실시간 김프. 설정된 심볼은 공유 스냅샷에서, 그 외는 직접 조회."""
+    symbol = symbol.upper()
+    if symbol in _SNAPSHOTS.symbols:
+        snap = get_realtime_snapshot()
+        q = snap["quotes"].get(symbol)
+        timestamp, usdkrw = snap["timestamp"], snap["usdkrw"]
+    else:
+        q = fetch_quotes([symbol]).get(symbol)
+        timestamp, usdkrw = datetime.utcnow().isoformat(), latest_usdkrw()
+        if q is not None:
+            q = dict(q, kimchi_pct=compute_kimchi_pct(q["upbit_krw"], q["binance_usdt"], usdkrw))
+    if q is None:
+        raise ValueError(f"realtime price unavailable for {symbol}")
+    return {
+        "timestamp": timestamp,
+        "binance_usdt": q["binance_usdt"],
+        "upbit_krw": q["upbit_krw"],
+        "usdkrw": usdkrw,
+        "kimchi_pct": q["kimchi_pct"],
+    }
+
+
+# --- Push 스트림 (SSE): 심볼당 폴러 1개가 모든 구독자에게 브로드캐스트 ---
+STREAM_INTERVAL_SECONDS = float(os.getenv("REALTIME_STREAM_INTERVAL", "2.0"))
+# 구독자별 대기 틱 수 상한. 느린 클라이언트는 오래된 틱부터 버리고 최신 틱을 받는다
+STREAM_QUEUE_SIZE = int(os.getenv("REALTIME_STREAM_QUEUE", "16"))
+
+
+class Subscription:
+    def __init__(self, symbols: list[str], queue_size: int):
+        self.symbols = symbols
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, tick: dict) -> None:
+        """큐가 가득 차면 가장 오래된 틱을 버리고 새 틱을 넣는다 (폴러가 막히지 않도록)."""
+        while True:
+            try:
+                self.queue.put_nowait(tick)
+                return
+            except asyncio.QueueFull:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except asyncio.QueueEmpty:
+                    pass
+
+
+class RealtimeHub:
+    """심볼별 백그라운드 폴러가 get_realtime_quote와 같은 방식으로 틱을 계산해 구독자에게 fan-out.
+    업스트림 호출량은 구독자 수와 무관하게 심볼당 interval마다 1회 (스냅샷 TTL로 추가 병합).
+    quote_fn을 바꿔 끼우면 Binance/Upbit 없이 로컬 스텁으로 동작한다.
+    """
+
+    def __init__(self, quote_fn=None, interval: float = STREAM_INTERVAL_SECONDS, queue_size: int = STREAM_QUEUE_SIZE):
+        self._quote_fn = quote_fn or get_realtime_quote
+        self.interval = interval
+        self.queue_size = queue_size
+        self._subs: dict[str, set[Subscription]] = {}
+        self._pollers: dict[str, asyncio.Task] = {}
+        self._last_tick: dict[str, dict] = {}
+
+    def subscribe(self, symbols: list[str]) -> Subscription:
+        sub = Subscription([s.upper() for s in symbols], self.queue_size)
+        for sym in sub.symbols:
+            self._subs.setdefault(sym, set()).add(sub)
+            # 새 구독자는 마지막 틱을 바로 받는다
+            if sym in self._last_tick:
+                sub.offer(self._last_tick[sym])
+            if sym not in self._pollers:
+                self._pollers[sym] = asyncio.create_task(self._poll(sym))
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        for sym in sub.symbols:
+            subs = self._subs.get(sym)
+            if subs is None:
+                continue
+            subs.discard(sub)
+            if not subs:
+                # 마지막 구독자가 떠나면 폴러 중단
+                self._subs.pop(sym, None)
+                self._last_tick.pop(sym, None)
+                task = self._pollers.pop(sym, None)
+                if task is not None:
+                    task.cancel()
+
+    def subscriber_count(self, symbol: str) -> int:
+        return len(self._subs.get(symbol.upper(), ()))
+
+    async def _poll(self, symbol: str) -> None:
+        while True:
+            try:
+                quote = await asyncio.to_thread(self._quote_fn, symbol)
+                tick = dict(quote, symbol=symbol)
+            except Exception as e:
+                tick = {"symbol": symbol, "timestamp": datetime.utcnow().isoformat(), "error": str(e)}
+            else:
+                self._last_tick[symbol] = tick
+            for sub in list(self._subs.get(symbol, ())):
+                sub.offer(tick)
+            await asyncio.sleep(self.interval)
+
+
+_HUB: Optional[RealtimeHub] = None
+
+
+def get_realtime_hub() -> RealtimeHub:
+    global _HUB
+    if _HUB is None:
+        _HUB = RealtimeHub()
+    return _HUB
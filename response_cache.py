@@ -0,0 +1,217 @@
+import io
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, Iterator, Optional
+
+import pandas as pd
+
+try:
+    import orjson
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+try:
+    import pyarrow as pa
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+try:
+    import brotli
+    _HAS_BROTLI = True
+except ImportError:
+    _HAS_BROTLI = False
+
+
+# 직렬화 결과를 보관할 최대 항목 수 (LRU)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+# 브라우저가 재검증 없이 재사용할 시간(초). 이후에는 ETag로 304 재검증
+RESPONSE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", "60"))
+CACHE_CONTROL = f"public, max-age={RESPONSE_MAX_AGE}"
+# 이보다 작은 본문은 압축하지 않음(바이트)
+COMPRESS_MIN_BYTES = int(os.getenv("RESPONSE_COMPRESS_MIN_BYTES", "1024"))
+RESPONSE_FORMATS = ("records", "columnar", "arrow")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def dumps(content) -> bytes:
+    """JSON 직렬화. orjson이 있으면 사용 (NaN은 null), 없으면 표준 json."""
+    if _HAS_ORJSON:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def serialize_frame(df: pd.DataFrame, fmt: str = "records", decimals: Optional[int] = None) -> bytes:
+    """데이터셋 응답 본문.
+    - records: [{col: value, ...}, ...] (기존 형식)
+    - columnar: {col: [values...], ...} (키 반복 없이 컬럼별 배열)
+    - datetime 컬럼은 YYYY-MM-DD 문자열, decimals가 주어지면 float 컬럼 반올림, NaN은 null
+    """
+    out = df.copy()
+    for col in out.columns:
+        series = out[col]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            out[col] = series.dt.strftime("%Y-%m-%d")
+        elif pd.api.types.is_float_dtype(series):
+            if decimals is not None:
+                series = series.round(decimals)
+            out[col] = series.astype(object).where(series.notna(), None) if series.isna().any() else series
+        elif series.isna().any():
+            # nullable 정수(Int64) 등의 NA도 null로
+            out[col] = series.astype(object).where(series.notna(), None)
+    if fmt == "columnar":
+        return dumps({col: out[col].tolist() for col in out.columns})
+    return dumps(out.to_dict(orient="records"))
+
+
+def arrow_available() -> bool:
+    return _HAS_PYARROW
+
+
+def wants_arrow(fmt: str, accept: Optional[str]) -> bool:
+    """format=arrow 이거나 Accept에 Arrow 스트림 MIME이 있으면 Arrow로 응답."""
+    return fmt == "arrow" or (accept is not None and ARROW_MEDIA_TYPE in accept)
+
+
+def _round_floats(df: pd.DataFrame, decimals: Optional[int]) -> pd.DataFrame:
+    if decimals is None:
+        return df
+    cols = [c for c in df.columns if pd.api.types.is_float_dtype(df[c])]
+    return df.assign(**{c: df[c].round(decimals) for c in cols})
+
+
+def arrow_table(df: pd.DataFrame, decimals: Optional[int] = None, symbol: Optional[str] = None) -> "pa.Table":
+    """메모리 프레임을 텍스트 변환 없이 Arrow 테이블로 (date는 date32, symbol 컬럼은 dictionary)."""
+    table = pa.Table.from_pandas(_round_floats(df, decimals), preserve_index=False)
+    if "date" in table.column_names:
+        idx = table.column_names.index("date")
+        table = table.set_column(idx, "date", table.column("date").cast(pa.date32()))
+    if symbol is not None:
+        sym = pa.array([symbol] * table.num_rows, type=pa.string()).dictionary_encode()
+        table = table.add_column(0, "symbol", sym)
+    return table
+
+
+def serialize_arrow(df: pd.DataFrame, decimals: Optional[int] = None) -> bytes:
+    """단일 프레임 → Arrow IPC 스트림 바이트."""
+    table = arrow_table(df, decimals)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def iter_arrow_stream(frames: Iterable[tuple[str, pd.DataFrame]], decimals: Optional[int] = None) -> Iterator[bytes]:
+    """여러 심볼 프레임을 하나의 Arrow IPC 스트림으로 (심볼당 레코드 배치 1개씩 순서대로 흘려보냄).
+    스키마는 첫 프레임 기준이며 이후 프레임은 같은 스키마로 캐스팅한다.
+    """
+    buf = io.BytesIO()
+    writer = None
+    schema = None
+    for symbol, df in frames:
+        table = arrow_table(df, decimals, symbol=symbol)
+        if writer is None:
+            schema = table.schema
+            writer = pa.ipc.new_stream(buf, schema)
+        else:
+            table = table.select(schema.names).cast(schema)
+        writer.write_table(table)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if writer is not None:
+        writer.close()
+        yield buf.getvalue()
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Accept-Encoding에서 사용할 압축 방식 선택 (br > gzip). q=0은 제외."""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    if _HAS_BROTLI and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def make_etag(key: Hashable) -> str:
+    """캐시 키(데이터셋 버전 포함)에서 결정되는 강한 ETag. 본문 없이도 304 판단 가능."""
+    return '"' + hashlib.blake2b(repr(key).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 약한 비교: W/ 접두사는 무시
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return etag in tags
+
+
+class ResponseCache:
+    """(엔드포인트, 심볼, 유효 구간, 데이터셋 버전) → 직렬화된 응답 바이트 LRU 캐시.
+    버전이 키에 포함되므로 파일이 갱신되면 자연히 새 항목이 만들어지고 옛 항목은 LRU로 밀려난다.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], bytes]) -> bytes:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                return body
+        body = build()
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def get_encoded(self, key: Hashable, build: Callable[[], bytes], encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+        """압축본도 키+인코딩별로 캐시한다. 작은 본문은 압축하지 않고 (body, None) 반환."""
+        body = self.get_or_build(key, build)
+        if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+            return body, None
+        return self.get_or_build((key, encoding), lambda: compress(body, encoding)), encoding
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_CACHE = ResponseCache()
+
+
+def get_response_cache() -> ResponseCache:
+    return _CACHE
@@ -0,0 +1,135 @@
+import os
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+import pandas as pd
+
+from locks import file_write_lock
+
+
+class Snapshot:
+    __slots__ = ("frame", "built_at", "source_version")
+
+    def __init__(self, frame: pd.DataFrame, built_at: str, source_version: Optional[str]):
+        self.frame = frame
+        self.built_at = built_at
+        self.source_version = source_version
+
+
+class PinnedRangeSnapshots:
+    """고정 구간(start~end) 응답 프레임을 심볼별로 한 번 만들어 메모리 + JSON 파일로 보관한다.
+    - 구간 끝까지 데이터가 채워진 스냅샷은 데이터셋이 갱신되어도 다시 만들지 않음 (pinned)
+    - 아직 끝까지 채워지지 않은 스냅샷은 원본 데이터셋 버전이 바뀌면 재생성
+    - refresh=True면 항상 재생성 후 파일도 교체
+    - 파일: data/dataset_{SYM}_{name}.json ({start, end, built_at, source_version, dtypes, records})
+    """
+
+    def __init__(
+        self,
+        name: str,
+        start: str,
+        end: str,
+        source: Callable[[str, str, str], tuple[pd.DataFrame, Optional[str]]],
+        to_frame: Callable[[pd.DataFrame], pd.DataFrame],
+        version_fn: Callable[[str], Optional[str]],
+        data_dir: str,
+        date_col: str = "date",
+    ):
+        self.name = name
+        self.start = start
+        self.end = end
+        self._source = source
+        self._to_frame = to_frame
+        self._version_fn = version_fn
+        self.data_dir = data_dir
+        self.date_col = date_col
+        self._snapshots: dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+
+    def _cache_json_path(self, symbol: str) -> str:
+        return os.path.join(self.data_dir, f"dataset_{symbol.upper()}_{self.name}.json")
+
+    def _load_cache_json(self, path: str):
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception:
+                return None
+        return None
+
+    def _save_cache_json(self, path: str, content) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _is_complete(self, snap: Snapshot) -> bool:
+        dates = snap.frame[self.date_col]
+        return not dates.empty and dates.iloc[-1] >= pd.to_datetime(self.end)
+
+    def _from_file(self, symbol: str) -> Optional[Snapshot]:
+        content = self._load_cache_json(self._cache_json_path(symbol))
+        # 구간이 다르거나 예전 형식(레코드 배열)이면 무시하고 다시 만든다
+        if not isinstance(content, dict) or content.get("start") != self.start or content.get("end") != self.end:
+            return None
+        try:
+            frame = pd.DataFrame(content["records"], columns=list(content["dtypes"]))
+            frame = frame.astype(content["dtypes"])
+        except Exception:
+            return None
+        return Snapshot(frame, content["built_at"], content.get("source_version"))
+
+    def _build(self, symbol: str) -> Snapshot:
+        # 원본 프레임과 그 버전은 source가 같은 읽기에서 함께 돌려준다
+        source_df, source_version = self._source(symbol, self.start, self.end)
+        frame = self._to_frame(source_df).reset_index(drop=True)
+        snap = Snapshot(frame, datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"), source_version)
+        records = frame.copy()
+        records[self.date_col] = records[self.date_col].dt.strftime("%Y-%m-%d")
+        records = records.astype(object).where(records.notna(), None)
+        self._save_cache_json(self._cache_json_path(symbol), {
+            "start": self.start,
+            "end": self.end,
+            "built_at": snap.built_at,
+            "source_version": snap.source_version,
+            "dtypes": {col: str(dtype) for col, dtype in frame.dtypes.items()},
+            "records": records.to_dict(orient="records"),
+        })
+        return snap
+
+    def get(self, symbol: str, refresh: bool = False) -> Snapshot:
+        symbol = symbol.upper()
+        if not refresh:
+            with self._lock:
+                snap = self._snapshots.get(symbol)
+            if snap is not None and self._is_complete(snap):
+                return snap
+        path = self._cache_json_path(symbol)
+        # 같은 심볼의 동시 재생성/파일 교체는 파일별 락으로 직렬화
+        with file_write_lock(path):
+            with self._lock:
+                snap = self._snapshots.get(symbol)
+            if snap is None and not refresh:
+                snap = self._from_file(symbol)
+            stale = (
+                snap is None
+                or refresh
+                or (not self._is_complete(snap) and snap.source_version != self._version_fn(symbol))
+            )
+            if stale:
+                snap = self._build(symbol)
+            with self._lock:
+                self._snapshots[symbol] = snap
+            return snap
+
+    def headers(self, snap: Snapshot) -> dict:
+        headers = {"X-Data-As-Of": snap.built_at}
+        dates = snap.frame[self.date_col]
+        if not dates.empty:
+            headers["X-Data-Latest-Date"] = dates.iloc[-1].strftime("%Y-%m-%d")
+        headers["X-Data-Stale"] = "false" if self._is_complete(snap) else "true"
+        return headers
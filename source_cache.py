@@ -0,0 +1,203 @@
+import os
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import pandas as pd
+
+from dataset_store import slice_by_date
+from locks import file_write_lock
+from storage import diff_rows, get_storage
+
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+WATERMARKS_PATH = os.path.join(DATA_DIR, "raw_watermarks.json")
+
+
+def last_final_date(now: Optional[datetime] = None) -> pd.Timestamp:
+    """확정된 마지막 일봉 날짜. D일 캔들은 D+1 00:00 UTC(업비트 09:00 KST)에 마감되므로 어제(UTC)."""
+    now = now or datetime.now(timezone.utc)
+    return pd.Timestamp(now.date()) - pd.Timedelta(days=1)
+
+
+class _Watermarks:
+    """원본 시계열별 수집 범위 {"binance:BTC": {"first": 날짜, "final_through": 날짜}} (data/raw_watermarks.json).
+    first~final_through 구간은 한 번 받아 둔 확정 캔들이므로 다시 조회하지 않는다 (빈 날짜 포함)."""
+
+    def __init__(self, path: str = WATERMARKS_PATH):
+        self.path = path
+        self._entries: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def get(self, key: str) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        with self._lock:
+            entry = self._load().get(key, {})
+        first, final_through = entry.get("first"), entry.get("final_through")
+        return (
+            pd.Timestamp(first) if first else None,
+            pd.Timestamp(final_through) if final_through else None,
+        )
+
+    def set(self, key: str, first: Optional[pd.Timestamp], final_through: Optional[pd.Timestamp]) -> None:
+        with self._lock:
+            entries = self._load()
+            entries[key] = {
+                "first": first.strftime("%Y-%m-%d") if first is not None else None,
+                "final_through": final_through.strftime("%Y-%m-%d") if final_through is not None else None,
+            }
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with file_write_lock(self.path):
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False, indent=1, sort_keys=True)
+                os.replace(tmp_path, self.path)
+
+
+_WATERMARKS = _Watermarks()
+
+
+# fetch(start, end, base) -> (프레임, listed_from)
+# - 페이지 실패(레이트 리밋, 타임아웃, 5xx 등)는 예외로 알린다
+# - listed_from: 거래소가 이 날짜 이전에는 캔들이 없다고 확인해 준 경우 그 날짜(상장일), 모르면 None
+SourceFetch = Callable[[str, str, str], tuple[pd.DataFrame, Optional[pd.Timestamp]]]
+
+
+class RawSeriesCache:
+    """한 소스(거래소)의 심볼별 원본 일별 시계열 [date, value_col] 캐시 (data/raw_{source}_{SYM}.csv).
+    - 확정 캔들(수집 당시 어제 이전)은 불변: 워터마크(first~final_through) 안은 네트워크 없이 캐시에서 응답
+    - 오늘 캔들은 잠정값: 저장은 하되 final_through 이후이므로 다음 조회에서 다시 받아 덮어씀
+    - 요청이 워터마크 밖으로 나가는 부분(앞쪽 / final_through 이후)만 fetch(start, end, base)로 받는다
+    - 워터마크는 거래소가 실제로 돌려준 마지막 날짜까지, 또는 상장 전으로 확인된 빈 구간만 덮는다
+      (fetch 예외면 아무것도 기록하지 않음)
+    """
+
+    def __init__(self, source: str, value_col: str, fetch: SourceFetch, data_dir: str = DATA_DIR):
+        self.source = source
+        self.value_col = value_col
+        self._fetch = fetch
+        self.data_dir = data_dir
+        self._frames: dict[str, tuple[Optional[tuple[int, int]], pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def path(self, base: str) -> str:
+        return os.path.join(self.data_dir, f"raw_{self.source}_{base.upper()}.csv")
+
+    def _key(self, base: str) -> str:
+        return f"{self.source}:{base.upper()}"
+
+    def _empty(self) -> pd.DataFrame:
+        return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), self.value_col: pd.Series(dtype="float64")})
+
+    def _read(self, base: str) -> pd.DataFrame:
+        path = self.path(base)
+        storage = get_storage()
+        sig = storage.signature(path)
+        with self._lock:
+            memo = self._frames.get(base)
+            if memo is not None and sig is not None and memo[0] == sig:
+                return memo[1]
+        if sig is None:
+            return self._empty()
+        try:
+            df = storage.read(path)[["date", self.value_col]]
+            df["date"] = pd.to_datetime(df["date"]).dt.normalize()
+            df = df.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
+        except Exception:
+            return self._empty()
+        with self._lock:
+            self._frames[base] = (sig, df)
+        return df
+
+    def _write(self, base: str, df: pd.DataFrame, prev: pd.DataFrame) -> None:
+        path = self.path(base)
+        storage = get_storage()
+        changed = diff_rows(prev if not prev.empty else None, df)
+        if changed is None:
+            storage.write(df, path)
+        else:
+            storage.upsert(changed, path)
+        with self._lock:
+            self._frames[base] = (storage.signature(path), df)
+
+    def covered_from(self, base: str) -> Optional[pd.Timestamp]:
+        """워터마크 시작일: 이 날짜부터 final_through까지는 받아 두었거나 상장 전으로 확인됨. 워터마크가 없으면 None."""
+        first, final_through = _WATERMARKS.get(self._key(base.upper()))
+        return first if final_through is not None else None
+
+    def _missing_ranges(self, start: pd.Timestamp, end: pd.Timestamp, first, final_through) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+        if first is None or final_through is None:
+            return [(min(start, first) if first is not None else start, end)]
+        ranges = []
+        if start < first:
+            ranges.append((start, first - pd.Timedelta(days=1)))
+        if end > final_through:
+            # 워터마크를 이어 붙이기 위해 final_through 다음 날부터 받는다
+            ranges.append((final_through + pd.Timedelta(days=1), end))
+        return ranges
+
+    def get(self, start_date: str, end_date: str, base: str, now: Optional[datetime] = None) -> pd.DataFrame:
+        """[start_date, end_date] 구간 [date, value_col]. 워터마크 밖 구간만 원격 조회 후 캐시에 반영."""
+        base = base.upper()
+        start = pd.to_datetime(start_date).normalize()
+        end = pd.to_datetime(end_date).normalize()
+        key = self._key(base)
+        first, final_through = _WATERMARKS.get(key)
+        ranges = self._missing_ranges(start, end, first, final_through)
+        if not ranges:
+            return slice_by_date(self._read(base), start, end)
+
+        # 같은 소스/심볼의 동시 갱신은 파일별 락으로 직렬화 (락 안에서 워터마크 재확인)
+        with file_write_lock(self.path(base)):
+            first, final_through = _WATERMARKS.get(key)
+            ranges = self._missing_ranges(start, end, first, final_through)
+            prev = self._read(base)
+            if not ranges:
+                return slice_by_date(prev, start, end)
+
+            final_cut = last_final_date(now)
+            parts = [prev]
+            new_first, new_final = first, final_through
+            for r0, r1 in ranges:
+                fetched, listed_from = self._fetch(r0.strftime("%Y-%m-%d"), r1.strftime("%Y-%m-%d"), base)
+                if not fetched.empty:
+                    fetched = fetched[["date", self.value_col]].copy()
+                    fetched["date"] = pd.to_datetime(fetched["date"]).dt.normalize()
+                    parts.append(fetched)
+                # 거래소가 답한 범위: 받은 마지막 날짜까지 (그 이전의 빈 날짜는 캔들이 없는 날).
+                # 빈 결과는 구간 전체가 상장 전으로 확인된 경우만 인정하고, 확정된 날짜(final_cut)까지만 덮는다.
+                # 짧게 온 응답(자정 직후 반영 지연 등)의 나머지는 다음 조회에서 다시 받는다
+                if not fetched.empty:
+                    through = fetched["date"].max()
+                elif listed_from is not None and listed_from > r1:
+                    through = r1
+                else:
+                    continue
+                through = min(through, final_cut)
+                if through < r0:
+                    continue
+                if first is not None and final_through is not None and r1 < first:
+                    # 앞쪽 구간은 기존 first까지 빈틈없이 이어질 때만 first를 당긴다
+                    if through >= r1:
+                        new_first = min(new_first, r0)
+                    continue
+                new_first = r0 if new_first is None else min(new_first, r0)
+                new_final = through if new_final is None else max(new_final, through)
+
+            merged = pd.concat(parts, ignore_index=True)
+            merged = merged.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
+            merged[self.value_col] = merged[self.value_col].astype("float64")
+            if len(parts) > 1:
+                self._write(base, merged, prev)
+            if (new_first, new_final) != (first, final_through):
+                _WATERMARKS.set(key, new_first, new_final)
+            return slice_by_date(merged, start, end)
@@ -0,0 +1,360 @@
+import abc
+import io
+import os
+import glob
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from locks import file_write_lock
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    _HAS_PYARROW = True
+except ImportError:
+    _HAS_PYARROW = False
+
+
+# csv | parquet | auto(pyarrow가 있으면 parquet)
+STORAGE_BACKEND = os.getenv("DATA_STORAGE_BACKEND", "auto").lower()
+# 저널(append-only 변경분)이 이 행 수를 넘으면 본 파일로 압축(compaction)
+JOURNAL_MAX_ROWS = int(os.getenv("STORAGE_JOURNAL_MAX_ROWS", "128"))
+# 저널 첫 줄: 이 저널이 올라탈 본 파일 세대
+_GENERATION_PREFIX = b"#generation="
+
+
+def _coerce_types(df: pd.DataFrame) -> pd.DataFrame:
+    """date는 datetime64, *_ffill 플래그는 bool로 맞춘다 (CSV 텍스트 'True'/'False' 대비)."""
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"])
+    for col in df.columns:
+        if col.endswith("_ffill") and df[col].dtype != bool:
+            df[col] = df[col].map({True: True, False: False, "True": True, "False": False}).fillna(False).astype(bool)
+    return df
+
+
+def diff_rows(prev: Optional[pd.DataFrame], new: pd.DataFrame, key: str = "date") -> Optional[pd.DataFrame]:
+    """prev 대비 new에서 추가/변경된 행만 반환한다.
+    - 빈 프레임이면 변경 없음
+    - prev가 없거나, 컬럼 구성이 다르거나, prev의 키가 new에서 사라졌으면 None (전체 저장 필요)
+    """
+    if prev is None or prev.empty or list(prev.columns) != list(new.columns):
+        return None
+    prev_idx = prev.set_index(key)
+    new_idx = new.set_index(key)
+    if not prev_idx.index.isin(new_idx.index).all():
+        return None
+    old = prev_idx.reindex(new_idx.index)
+    same = (old == new_idx) | (old.isna() & new_idx.isna())
+    changed = ~same.all(axis=1).to_numpy()
+    return new.loc[changed].reset_index(drop=True)
+
+
+class _JournaledStorage(abc.ABC):
+    """본 파일 + append-only 저널(CSV 행 추가) 구조의 공통 부분.
+    - upsert: 바뀐 행만 저널 끝에 추가하고 fsync → 갱신 I/O는 변경 행 수에 비례
+    - read: 본 파일 위에 저널을 순서대로 덮어씀 (같은 date는 나중 행 우선)
+    - 저널이 JOURNAL_MAX_ROWS를 넘으면 본 파일로 압축 후 저널 삭제
+    - 비정상 종료로 마지막 줄이 잘려 있으면 그 줄은 무시 (줄 단위로만 기록하므로 이전 행은 온전)
+    - 본 파일을 쓸 때마다 세대(generation) 카운터를 올리고, 저널 첫 줄에 만들 당시의 세대를 적는다.
+      세대가 다른 저널은 이미 본 파일에 반영(또는 전체 저장으로 대체)된 것이므로 읽지 않는다
+      → 본 파일 교체 → 세대 증가 → 저널 삭제 순서 중 어디서 중단되어도 변경분을 잃거나 되돌리지 않음
+    """
+
+    def __init__(self):
+        self._journal_rows: dict[str, int] = {}
+
+    # 하위 클래스 구현: 본 파일 시그니처/읽기/쓰기, 저널/세대 파일 위치 (빠지면 인스턴스 생성 시 TypeError)
+    @abc.abstractmethod
+    def journal_path(self, path: str) -> str:
+        ...
+
+    @abc.abstractmethod
+    def generation_path(self, path: str) -> str:
+        ...
+
+    @abc.abstractmethod
+    def _base_signature(self, path: str) -> Optional[tuple[int, int]]:
+        ...
+
+    @abc.abstractmethod
+    def _read_base(self, path: str) -> pd.DataFrame:
+        ...
+
+    @abc.abstractmethod
+    def _write_base(self, df: pd.DataFrame, path: str, years: Optional[set] = None) -> None:
+        ...
+
+    def _read_generation(self, path: str) -> Optional[int]:
+        try:
+            with open(self.generation_path(path), "r", encoding="utf-8") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _bump_generation(self, path: str) -> None:
+        """본 파일 교체 직후 호출. 이전 세대 저널은 이후 읽기/추가에서 무시된다."""
+        gen_path = self.generation_path(path)
+        tmp_path = f"{gen_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str((self._read_generation(path) or 0) + 1))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, gen_path)
+
+    def _journal_body(self, path: str) -> Optional[bytes]:
+        """현재 세대 저널의 온전한 줄들 (세대 줄 제외, 헤더 포함). 저널이 없거나 다른 세대면 None."""
+        try:
+            with open(self.journal_path(path), "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return None
+        raw = raw[: raw.rfind(b"\n") + 1]
+        generation = None
+        if raw.startswith(_GENERATION_PREFIX):
+            line, _, raw = raw.partition(b"\n")
+            try:
+                generation = int(line[len(_GENERATION_PREFIX):])
+            except ValueError:
+                return None
+        if generation != self._read_generation(path):
+            return None
+        return raw
+
+    def _read_journal(self, path: str) -> Optional[pd.DataFrame]:
+        raw = self._journal_body(path)
+        if raw is None or raw.count(b"\n") < 2:
+            return None
+        return _coerce_types(pd.read_csv(io.BytesIO(raw), parse_dates=["date"], float_precision="round_trip"))
+
+    def _journal_header(self, path: str) -> Optional[str]:
+        raw = self._journal_body(path)
+        if not raw:
+            return None
+        return raw[: raw.find(b"\n")].decode("utf-8")
+
+    def _count_journal_rows(self, path: str) -> int:
+        n = self._journal_rows.get(path)
+        if n is None:
+            raw = self._journal_body(path)
+            n = max(0, raw.count(b"\n") - 1) if raw is not None else 0
+            self._journal_rows[path] = n
+        return n
+
+    def _drop_journal(self, path: str) -> None:
+        try:
+            os.remove(self.journal_path(path))
+        except FileNotFoundError:
+            pass
+        self._journal_rows[path] = 0
+
+    def signature(self, path: str) -> Optional[tuple[int, int]]:
+        sig = self._base_signature(path)
+        if sig is None:
+            return None
+        try:
+            st = os.stat(self.journal_path(path))
+        except OSError:
+            return sig
+        return (max(sig[0], st.st_mtime_ns), sig[1] + st.st_size)
+
+    def exists(self, path: str) -> bool:
+        return self.signature(path) is not None
+
+    def read(self, path: str) -> pd.DataFrame:
+        df = self._read_base(path)
+        journal = self._read_journal(path)
+        if journal is None or journal.empty:
+            return df
+        df = pd.concat([df, journal], ignore_index=True)
+        return df.drop_duplicates(subset=["date"], keep="last").sort_values("date").reset_index(drop=True)
+
+    def write(self, df: pd.DataFrame, path: str) -> None:
+        """전체 저장. 본 파일을 원자적으로 교체하고 세대를 올린 뒤 저널을 지운다
+        (교체 전 중단이면 이전 본 파일+저널이 그대로, 이후면 이전 세대 저널은 무시됨)."""
+        with file_write_lock(path):
+            self._write_base(df, path)
+            self._bump_generation(path)
+            self._drop_journal(path)
+
+    def upsert(self, rows: pd.DataFrame, path: str) -> None:
+        """rows(추가/변경 행)만 저널에 기록. 본 파일이 없으면 전체 저장."""
+        if rows.empty:
+            return
+        with file_write_lock(path):
+            if self._base_signature(path) is None:
+                self.write(rows, path)
+                return
+            if self._journal_body(path) is None:
+                # 이전 세대 저널(이미 반영됨)이나 첫 줄이 잘린 저널 위에 이어 쓰지 않는다
+                self._drop_journal(path)
+            header = self._journal_header(path)
+            if header is not None and header != ",".join(map(str, rows.columns)):
+                # 컬럼 구성이 바뀌면 기존 저널을 먼저 압축
+                self.compact(path)
+                header = None
+            pending = self._count_journal_rows(path)
+            data = rows.to_csv(index=False, header=header is None).encode("utf-8")
+            generation = self._read_generation(path)
+            if header is None and generation is not None:
+                data = _GENERATION_PREFIX + str(generation).encode("ascii") + b"\n" + data
+            fd = os.open(self.journal_path(path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._journal_rows[path] = pending + len(rows)
+            if self._journal_rows[path] > JOURNAL_MAX_ROWS:
+                self.compact(path)
+
+    def compact(self, path: str) -> None:
+        """저널을 본 파일에 반영. 본 파일을 먼저 원자적으로 교체하고 세대를 올린 뒤 저널을 지운다
+        (세대 증가 전 중단이면 저널 재적용은 같은 결과라 안전)."""
+        with file_write_lock(path):
+            journal = self._read_journal(path)
+            if journal is None or journal.empty:
+                self._drop_journal(path)
+                return
+            years = set(journal["date"].dt.year.astype(int))
+            self._write_base(self.read(path), path, years=years)
+            self._bump_generation(path)
+            self._drop_journal(path)
+
+
+class CsvStorage(_JournaledStorage):
+    """기존 CSV 파일 한 개에 저장 (원자적 교체). 저널은 data/foo.csv.journal, 세대는 data/foo.csv.generation"""
+
+    name = "csv"
+
+    def journal_path(self, path: str) -> str:
+        return f"{path}.journal"
+
+    def generation_path(self, path: str) -> str:
+        return f"{path}.generation"
+
+    def _base_signature(self, path: str) -> Optional[tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if st.st_size == 0:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read_base(self, path: str) -> pd.DataFrame:
+        return _coerce_types(pd.read_csv(path, parse_dates=["date"], float_precision="round_trip"))
+
+    def _write_base(self, df: pd.DataFrame, path: str, years: Optional[set] = None) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with file_write_lock(path):
+            df.to_csv(tmp_path, index=False)
+            try:
+                os.replace(tmp_path, path)
+            except Exception:
+                # 교체 실패 시라도 최후 수단으로 직접 저장
+                df.to_csv(path, index=False)
+
+
+class PartitionedParquetStorage(_JournaledStorage):
+    """연도별로 분할한 Parquet 파일에 저장한다.
+    - 논리 경로 data/foo.csv → data/foo.parquet/year=YYYY.parquet (hive 스타일, pyarrow/polars로 바로 읽기 가능)
+    - 파티션 디렉토리가 없고 기존 CSV가 있으면 최초 접근 시 1회 변환 (CSV 원본은 그대로 둠)
+    - 저널은 data/foo.parquet/_journal.csv(세대는 _generation), 압축 시 저널에 등장한 연도 파티션만 다시 쓴다
+    """
+
+    name = "parquet"
+
+    def __init__(self):
+        super().__init__()
+        self._migrated: set[str] = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def root(path: str) -> str:
+        base, _ = os.path.splitext(path)
+        return f"{base}.parquet"
+
+    def journal_path(self, path: str) -> str:
+        return os.path.join(self.root(path), "_journal.csv")
+
+    def generation_path(self, path: str) -> str:
+        return os.path.join(self.root(path), "_generation")
+
+    def _partitions(self, path: str) -> list[str]:
+        return sorted(glob.glob(os.path.join(self.root(path), "year=*.parquet")))
+
+    def _maybe_migrate(self, path: str) -> None:
+        with self._lock:
+            if path in self._migrated:
+                return
+        if not os.path.isdir(self.root(path)) and os.path.exists(path) and os.path.getsize(path) > 0:
+            with file_write_lock(path):
+                if not os.path.isdir(self.root(path)):
+                    self._write_base(CsvStorage()._read_base(path), path)
+        with self._lock:
+            self._migrated.add(path)
+
+    def _base_signature(self, path: str) -> Optional[tuple[int, int]]:
+        self._maybe_migrate(path)
+        parts = self._partitions(path)
+        if not parts:
+            return None
+        mtime, size = 0, 0
+        for p in parts:
+            st = os.stat(p)
+            mtime = max(mtime, st.st_mtime_ns)
+            size += st.st_size
+        return (mtime, size + len(parts))
+
+    def _read_base(self, path: str) -> pd.DataFrame:
+        self._maybe_migrate(path)
+        parts = self._partitions(path)
+        if not parts:
+            raise FileNotFoundError(self.root(path))
+        # 파티션을 Arrow 테이블로 이어 붙인 뒤 한 번만 pandas로 변환
+        return pa.concat_tables([pq.read_table(p) for p in parts]).to_pandas()
+
+    def _write_base(self, df: pd.DataFrame, path: str, years: Optional[set] = None) -> None:
+        """years가 주어지면 해당 연도 파티션만 다시 쓴다 (압축 시)."""
+        root = self.root(path)
+        os.makedirs(root, exist_ok=True)
+        df = _coerce_types(df.copy())
+        df_years = df["date"].dt.year if not df.empty else pd.Series(dtype="int64")
+        with file_write_lock(path):
+            keep = set()
+            for year, part in df.groupby(df_years, sort=True):
+                if years is not None and int(year) not in years:
+                    continue
+                part_path = os.path.join(root, f"year={int(year)}.parquet")
+                tmp_path = f"{part_path}.tmp"
+                part.reset_index(drop=True).to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, part_path)
+                keep.add(part_path)
+            if years is not None:
+                return
+            # 더 이상 데이터가 없는 연도 파티션 제거
+            for p in self._partitions(path):
+                if p not in keep:
+                    os.remove(p)
+
+
+def _make_storage():
+    if STORAGE_BACKEND == "parquet" or (STORAGE_BACKEND == "auto" and _HAS_PYARROW):
+        if not _HAS_PYARROW:
+            raise RuntimeError("DATA_STORAGE_BACKEND=parquet 에는 pyarrow가 필요합니다.")
+        return PartitionedParquetStorage()
+    return CsvStorage()
+
+
+_STORAGE = None
+
+
+def get_storage():
+    global _STORAGE
+    if _STORAGE is None:
+        _STORAGE = _make_storage()
+    return _STORAGE
@@ -0,0 +1,29 @@
+"""_has_front_gap: 상장 전으로 확인된 앞쪽 공백은 결손(stale)으로 보지 않는다."""
+import pandas as pd
+import pytest
+
+import main
+
+
+@pytest.fixture
+def cached():
+    return pd.DataFrame({"date": pd.date_range("2021-10-15", periods=5, freq="D")})
+
+
+def test_pre_listing_front_is_not_a_gap(cached, monkeypatch):
+    monkeypatch.setattr(main, "raw_covered_from", lambda sym: pd.Timestamp("2021-01-01"))
+    assert not main._has_front_gap("SOL", cached, "2021-01-01")
+
+
+def test_unconfirmed_front_is_a_gap(cached, monkeypatch):
+    monkeypatch.setattr(main, "raw_covered_from", lambda sym: None)
+    assert main._has_front_gap("SOL", cached, "2021-01-01")
+    # 원본 확인이 요청 시작일보다 늦게 시작하면 그 앞은 아직 모름
+    monkeypatch.setattr(main, "raw_covered_from", lambda sym: pd.Timestamp("2021-06-01"))
+    assert main._has_front_gap("SOL", cached, "2021-01-01")
+
+
+def test_cache_starting_on_or_before_start_has_no_gap(cached, monkeypatch):
+    monkeypatch.setattr(main, "raw_covered_from", lambda sym: None)
+    assert not main._has_front_gap("SOL", cached, "2021-10-15")
+    assert not main._has_front_gap("SOL", cached, "2021-11-01")
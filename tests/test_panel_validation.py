@@ -0,0 +1,25 @@
+"""/dataset/panel 입력 검증: 지원하지 않는 심볼/컬럼은 저장소를 건드리기 전에 400."""
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def _unexpected(*args, **kwargs):
+        raise AssertionError("validation should reject the request before serving data")
+    monkeypatch.setattr(main, "_serve_dataset", _unexpected)
+    return TestClient(main.app)
+
+
+def test_unknown_symbols_are_rejected(client):
+    resp = client.get("/dataset/panel?start=2024-01-01&end=2024-02-01&symbols=BTC,FOO,eth,BAR")
+    assert resp.status_code == 400
+    assert resp.json()["error"].startswith("unsupported symbols: FOO, BAR")
+
+
+def test_unknown_fields_are_rejected(client):
+    resp = client.get("/dataset/panel?start=2024-01-01&end=2024-02-01&symbols=BTC&fields=kimchi_pct,nope")
+    assert resp.status_code == 400
+    assert "nope" in resp.json()["error"]
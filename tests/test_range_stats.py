@@ -0,0 +1,93 @@
+"""RangeStatsIndex.query 를 구간별 numpy 직접 계산과 비교 (무작위 구간, 증분 갱신 포함)."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from range_stats import DEFAULT_PERCENTILES, RangeStatsIndex
+
+
+def _frame(n: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    x = rng.normal(2.0, 3.0, n).round(4)
+    g = rng.integers(5, 95, n).astype("float64")
+    x[rng.random(n) < 0.05] = np.nan
+    g[rng.random(n) < 0.1] = np.nan
+    # 같은 값이 여러 번 나오는 경우(백분위 순위 동률)도 포함
+    x[rng.random(n) < 0.05] = 1.5
+    return pd.DataFrame({"date": pd.date_range("2021-03-01", periods=n, freq="D"), "kimchi_pct": x, "greed": g})
+
+
+def _brute(df: pd.DataFrame, start, end, percentiles) -> dict:
+    part = df[(df["date"] >= pd.Timestamp(start)) & (df["date"] <= pd.Timestamp(end))]
+    x = part["kimchi_pct"].to_numpy()
+    valid = x[~np.isnan(x)]
+    out = {"rows": len(part), "count": len(valid), "kimchi_pct": None, "greed": None}
+    if len(valid) == 0:
+        return out
+    out["kimchi_pct"] = {
+        "mean": valid.mean(),
+        "std": valid.std(ddof=1) if len(valid) > 1 else None,
+        "min": valid.min(),
+        "max": valid.max(),
+        **{f"p{q:g}": np.percentile(valid, q) for q in percentiles},
+    }
+    both = part.dropna(subset=["kimchi_pct", "greed"])
+    if len(both):
+        bx, bg = both["kimchi_pct"].to_numpy(), both["greed"].to_numpy()
+        corr = np.corrcoef(bx, bg)[0, 1] if len(both) > 1 and bx.std() > 0 and bg.std() > 0 else None
+        out["greed"] = {"mean": bg.mean(), "corr_kimchi_pct": corr}
+    return out
+
+
+def _assert_close(got: dict, expected: dict) -> None:
+    assert got["rows"] == expected["rows"]
+    assert got["count"] == expected["count"]
+    for section in ("kimchi_pct", "greed"):
+        if expected[section] is None:
+            assert got[section] is None
+            continue
+        for name, value in expected[section].items():
+            if value is None:
+                assert got[section][name] is None, name
+            else:
+                assert got[section][name] == pytest.approx(value, rel=1e-9, abs=1e-9), name
+
+
+def _random_ranges(df: pd.DataFrame, count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    first = df["date"].iloc[0] - pd.Timedelta(days=10)
+    span = len(df) + 20
+    for _ in range(count):
+        a, b = sorted(rng.integers(0, span, 2))
+        yield first + pd.Timedelta(days=int(a)), first + pd.Timedelta(days=int(b))
+
+
+def test_random_ranges_match_brute_force():
+    df = _frame(700, seed=7)
+    index = RangeStatsIndex()
+    index.update(df)
+    percentiles = DEFAULT_PERCENTILES + [0, 1, 99.5, 100]
+    for start, end in _random_ranges(df, 600, seed=11):
+        _assert_close(index.query(start, end, percentiles), _brute(df, start, end, percentiles))
+
+
+def test_incremental_update_matches_rebuild():
+    full = _frame(400, seed=3)
+    index = RangeStatsIndex()
+    index.update(full.iloc[:350])
+    # 최근 3일 덮어쓰기 + 일일 append
+    changed = full.copy()
+    changed.loc[347:349, "kimchi_pct"] += 0.5
+    assert index.update(changed) == 347
+    for start, end in _random_ranges(changed, 100, seed=5):
+        _assert_close(index.query(start, end), _brute(changed, start, end, DEFAULT_PERCENTILES))
+
+
+def test_inverted_range_is_empty():
+    df = _frame(50, seed=1)
+    index = RangeStatsIndex()
+    index.update(df)
+    result = index.query(df["date"].iloc[30], df["date"].iloc[10])
+    assert result["rows"] == 0
+    assert result["count"] == 0
+    assert result["start"] is None and result["kimchi_pct"] is None
@@ -0,0 +1,93 @@
+"""RawSeriesCache 워터마크: 거래소가 돌려준 날짜 / 상장 전으로 확인된 구간만 확정으로 기록한다."""
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+import source_cache
+from source_cache import RawSeriesCache, _Watermarks
+
+
+NOW = datetime(2024, 3, 31, 12, tzinfo=timezone.utc)  # 확정 마지막 날 = 2024-03-30
+
+
+class _Exchange:
+    """listing부터 2024-03-31까지 매일 캔들이 있는 거래소. fail이면 예외, short_through 이후는 빠진 응답."""
+
+    def __init__(self, listing: str, short_through=None):
+        self.listing = pd.Timestamp(listing)
+        self.short_through = pd.Timestamp(short_through) if short_through else None
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, start: str, end: str, base: str):
+        self.calls.append((start, end))
+        if self.fail:
+            raise RuntimeError("HTTP 429")
+        last = min(pd.Timestamp(end), pd.Timestamp("2024-03-31"))
+        if self.short_through is not None:
+            last = min(last, self.short_through)
+        dates = pd.date_range(max(pd.Timestamp(start), self.listing), last, freq="D")
+        listed_from = self.listing if self.listing > pd.Timestamp(start) else None
+        return pd.DataFrame({"date": dates, "close": [float(i) for i in range(len(dates))]}), listed_from
+
+
+@pytest.fixture
+def watermarks(tmp_path, monkeypatch):
+    marks = _Watermarks(str(tmp_path / "raw_watermarks.json"))
+    monkeypatch.setattr(source_cache, "_WATERMARKS", marks)
+    return marks
+
+
+def _cache(tmp_path, exchange) -> RawSeriesCache:
+    return RawSeriesCache("test", "close", exchange, data_dir=str(tmp_path))
+
+
+def test_failed_fetch_leaves_watermark(tmp_path, watermarks):
+    ex = _Exchange("2020-01-01")
+    cache = _cache(tmp_path, ex)
+    cache.get("2024-01-01", "2024-03-10", "BTC", now=NOW)
+    assert watermarks.get("test:BTC") == (pd.Timestamp("2024-01-01"), pd.Timestamp("2024-03-10"))
+
+    ex.fail = True
+    with pytest.raises(RuntimeError):
+        cache.get("2023-06-01", "2024-03-31", "BTC", now=NOW)
+    assert watermarks.get("test:BTC") == (pd.Timestamp("2024-01-01"), pd.Timestamp("2024-03-10"))
+
+
+def test_short_response_advances_only_through_returned_dates(tmp_path, watermarks):
+    ex = _Exchange("2020-01-01", short_through="2024-03-20")
+    cache = _cache(tmp_path, ex)
+    got = cache.get("2024-03-01", "2024-03-31", "BTC", now=NOW)
+    assert got["date"].max() == pd.Timestamp("2024-03-20")
+    assert watermarks.get("test:BTC")[1] == pd.Timestamp("2024-03-20")
+
+    ex.short_through = None
+    got = cache.get("2024-03-01", "2024-03-31", "BTC", now=NOW)
+    assert ex.calls[-1] == ("2024-03-21", "2024-03-31")
+    assert len(got) == 31
+    # 오늘(잠정) 캔들은 확정으로 기록하지 않는다
+    assert watermarks.get("test:BTC")[1] == pd.Timestamp("2024-03-30")
+
+
+def test_empty_range_needs_listing_confirmation(tmp_path, watermarks):
+    def _unconfirmed(start, end, base):
+        return pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]"), "close": pd.Series(dtype="float64")}), None
+
+    cache = _cache(tmp_path, _unconfirmed)
+    assert cache.get("2024-01-01", "2024-01-31", "BTC", now=NOW).empty
+    assert watermarks.get("test:BTC") == (None, None)
+
+
+def test_pre_listing_front_range_is_recorded(tmp_path, watermarks):
+    ex = _Exchange("2024-02-15")
+    cache = _cache(tmp_path, ex)
+    cache.get("2024-03-01", "2024-03-10", "SOL", now=NOW)
+    cache.get("2023-12-01", "2024-03-10", "SOL", now=NOW)
+    assert ex.calls[-1] == ("2023-12-01", "2024-02-29")
+    assert watermarks.get("test:SOL") == (pd.Timestamp("2023-12-01"), pd.Timestamp("2024-03-10"))
+
+    n = len(ex.calls)
+    got = cache.get("2023-12-01", "2024-03-10", "SOL", now=NOW)
+    assert len(ex.calls) == n
+    assert got["date"].min() == pd.Timestamp("2024-02-15")
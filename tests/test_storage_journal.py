@@ -0,0 +1,93 @@
+"""저널 저장소의 세대 태깅: 본 파일 교체와 저널 삭제 사이에서 중단되어도 변경분을 잃거나 되돌리지 않는다."""
+import pandas as pd
+import pytest
+
+import storage
+from storage import CsvStorage, PartitionedParquetStorage
+
+
+def _frame(days: int, offset: float = 0.0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": pd.date_range("2024-12-28", periods=days, freq="D"),
+        "kimchi_pct": [0.1 * i + offset for i in range(days)],
+        "usd_ffill": [False] * days,
+    })
+
+
+def _backends():
+    out = [CsvStorage]
+    if storage._HAS_PYARROW:
+        out.append(PartitionedParquetStorage)
+    return out
+
+
+@pytest.fixture(params=_backends(), ids=lambda cls: cls.name)
+def backend(request, tmp_path):
+    return request.param(), str(tmp_path / "data" / "foo.csv")
+
+
+def test_upsert_survives_crash_before_full_write(backend, monkeypatch):
+    st, path = backend
+    st.write(_frame(5), path)
+    changed = _frame(6, offset=1.0).iloc[[4, 5]]
+    st.upsert(changed, path)
+
+    # 본 파일 교체 직전에 중단 → 이전 본 파일 + 저널이 그대로 읽혀야 함
+    def _crash(*args, **kwargs):
+        raise RuntimeError("crash")
+    monkeypatch.setattr(st, "_write_base", _crash)
+    with pytest.raises(RuntimeError):
+        st.write(_frame(3), path)
+    monkeypatch.undo()
+
+    got = st.read(path)
+    assert len(got) == 6
+    assert got["kimchi_pct"].iloc[-2:].tolist() == changed["kimchi_pct"].tolist()
+
+
+def test_stale_journal_ignored_after_base_replaced(backend, monkeypatch):
+    st, path = backend
+    st.write(_frame(5), path)
+    st.upsert(_frame(5, offset=1.0).iloc[[1]], path)
+
+    # 본 파일 교체 + 세대 증가 후, 저널 삭제 전에 중단
+    monkeypatch.setattr(st, "_drop_journal", lambda p: None)
+    st.write(_frame(3, offset=2.0), path)
+    monkeypatch.undo()
+
+    got = st.read(path)
+    pd.testing.assert_series_equal(got["kimchi_pct"], _frame(3, offset=2.0)["kimchi_pct"])
+
+    # 남은 이전 세대 저널 위에 이어 쓰지 않고 새 저널을 시작
+    st.upsert(_frame(4, offset=3.0).iloc[[3]], path)
+    got = st.read(path)
+    assert got["kimchi_pct"].tolist() == _frame(3, offset=2.0)["kimchi_pct"].tolist() + [0.3 + 3.0]
+
+
+def test_compaction_round_trips_floats(backend, monkeypatch):
+    st, path = backend
+    monkeypatch.setattr(storage, "JOURNAL_MAX_ROWS", 1)
+    df = _frame(5)
+    df["kimchi_pct"] = [0.1 + 0.2, 1 / 3, 2 / 3, 1e-17, 123456.789012345678]
+    st.write(df.iloc[:3], path)
+    st.upsert(df.iloc[3:], path)
+    got = st.read(path)
+    assert got["kimchi_pct"].tolist() == df["kimchi_pct"].tolist()
+
+
+def test_backend_missing_a_hook_fails_at_construction():
+    class _NoGeneration(storage._JournaledStorage):
+        def journal_path(self, path):
+            return f"{path}.journal"
+
+        def _base_signature(self, path):
+            return None
+
+        def _read_base(self, path):
+            return pd.DataFrame()
+
+        def _write_base(self, df, path, years=None):
+            pass
+
+    with pytest.raises(TypeError, match="generation_path"):
+        _NoGeneration()
@@ -0,0 +1,71 @@
+"""Upbit 페이지 수집: None 페이지는 상장 전일 때만 버리고, 그 외에는 재시도 후 예외."""
+import pandas as pd
+import pytest
+
+import pipeline
+
+
+class _FakeUpbit:
+    """listing~2024-06-30 매일 캔들. pyupbit처럼 빈 응답/실패 모두 None, failures[to]회만큼 실패."""
+
+    def __init__(self, listing: str, failures=None):
+        self.closes = pd.Series(1.0, index=pd.date_range(listing, "2024-06-30", freq="D"))
+        self.failures = dict(failures or {})
+        self.calls = []
+
+    def __call__(self, ticker, interval="day", count=200, to=None, period=0.1):
+        self.calls.append(to[:10])
+        if self.failures.get(to[:10], 0) > 0:
+            self.failures[to[:10]] -= 1
+            return None
+        closes = self.closes[self.closes.index < pd.Timestamp(to)].iloc[-count:]
+        if closes.empty:
+            return None
+        return pd.DataFrame({"close": closes.to_numpy()}, index=(closes.index + pd.Timedelta(hours=9)).rename(None))
+
+
+@pytest.fixture
+def upbit(monkeypatch):
+    monkeypatch.setattr(pipeline, "UPBIT_RETRY_BACKOFF", 0.0)
+
+    def _install(fake):
+        monkeypatch.setattr(pipeline.pyupbit, "get_ohlcv", fake)
+        return fake
+    return _install
+
+
+def test_pre_listing_pages_are_dropped_without_retry(upbit):
+    fake = upbit(_FakeUpbit("2023-09-10"))
+    df, listed_from = pipeline._fetch_upbit_closes("2023-01-01", "2024-03-31", "SOL")
+    assert listed_from == pd.Timestamp("2023-09-10")
+    assert df["date"].iloc[0] == pd.Timestamp("2023-09-10")
+    assert df["date"].iloc[-1] == pd.Timestamp("2024-03-31")
+    assert len(fake.calls) == 3
+
+
+def test_transient_none_page_is_retried(upbit):
+    # 두 번째 페이지(2023-07-20~2024-02-04) 첫 호출 실패
+    fake = upbit(_FakeUpbit("2020-01-01", failures={"2024-02-05": 1}))
+    df, _ = pipeline._fetch_upbit_closes("2023-01-01", "2024-03-31", "BTC")
+    assert len(df) == (pd.Timestamp("2024-03-31") - pd.Timestamp("2023-01-01")).days + 1
+    assert fake.calls.count("2024-02-05") == 2
+
+
+def test_persistent_none_page_raises(upbit):
+    upbit(_FakeUpbit("2020-01-01", failures={"2024-02-05": 10}))
+    with pytest.raises(RuntimeError, match="2023-07-20~2024-02-04"):
+        pipeline._fetch_upbit_closes("2023-01-01", "2024-03-31", "BTC")
+
+
+def test_failed_first_page_is_not_mistaken_for_pre_listing(upbit):
+    upbit(_FakeUpbit("2020-01-01", failures={"2023-07-20": 10}))
+    with pytest.raises(RuntimeError, match="2023-01-01~2023-07-19"):
+        pipeline._fetch_upbit_closes("2023-01-01", "2024-03-31", "BTC")
+
+
+def test_range_before_listing_probes_forward(upbit):
+    fake = upbit(_FakeUpbit("2024-02-01"))
+    df, listed_from = pipeline._fetch_upbit_closes("2023-01-01", "2023-06-30", "SOL")
+    assert df.empty
+    assert listed_from == pd.Timestamp("2024-02-01")
+    assert len(fake.calls) == 1 + 2
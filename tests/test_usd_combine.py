@@ -0,0 +1,129 @@
+"""_combine_usd_sources 가 벡터화 이전 구현(merge+apply, iterrows)과 같은 결과를 내는지 확인."""
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from dollar_scraper import _combine_usd_sources
+
+
+START = datetime.date(2024, 1, 1)
+
+
+def _baseline_merge(rows: list, fb_all: pd.DataFrame) -> pd.DataFrame:
+    """기존 구현 (Fixer 누락 구간별 폴백 → merge + 행 단위 apply)."""
+    fix_df = pd.DataFrame(rows, columns=["date", "usd_rate", "usd_ffill"])
+    fix_df["date"] = pd.to_datetime(fix_df["date"])
+    fix_df = fix_df.sort_values("date").reset_index(drop=True)
+    merged = fix_df.merge(fb_all, on="date", how="left", suffixes=("_fix", "_fb"))
+
+    def _pick_rate(row):
+        return row["usd_rate_fix"] if pd.notna(row["usd_rate_fix"]) else row["usd_rate_fb"]
+
+    def _pick_ffill(row):
+        if pd.notna(row.get("usd_ffill_fix")):
+            return bool(row["usd_ffill_fix"]) if not pd.isna(row["usd_ffill_fix"]) else False
+        if pd.notna(row.get("usd_ffill_fb")):
+            return bool(row["usd_ffill_fb"]) if not pd.isna(row["usd_ffill_fb"]) else False
+        return False
+
+    merged["usd_rate"] = merged.apply(_pick_rate, axis=1)
+    merged["usd_ffill"] = merged.apply(_pick_ffill, axis=1)
+    out = merged[["date", "usd_rate", "usd_ffill"]].copy()
+    out["date"] = pd.to_datetime(out["date"])
+    return out
+
+
+def _baseline_iterrows(df: pd.DataFrame, fb_data: pd.DataFrame) -> pd.DataFrame:
+    """기존 구현 (폴백 행마다 전체 프레임 마스킹)."""
+    df = df.copy()
+    for _, fb_row in fb_data.iterrows():
+        fb_date = fb_row["date"].date()
+        mask = df["date"].dt.date == fb_date
+        if mask.any() and df.loc[mask, "usd_rate"].isna().any():
+            df.loc[mask, "usd_rate"] = fb_row["usd_rate"]
+            df.loc[mask, "usd_ffill"] = fb_row["usd_ffill"]
+    return df
+
+
+def _finish(df: pd.DataFrame) -> pd.DataFrame:
+    """_scrape_usd_rates_range_fixer 의 후처리 (남은 빈 칸 ffill/bfill → usd_ffill=True)."""
+    df = df.copy()
+    df["usd_rate"] = df["usd_rate"].astype("float64")
+    if df["usd_rate"].isna().any():
+        original_nan_mask = df["usd_rate"].isna()
+        df["usd_rate"] = df["usd_rate"].ffill().bfill()
+        df.loc[original_nan_mask, "usd_ffill"] = True
+    df = df.dropna(subset=["usd_rate"])
+    df["usd_ffill"] = df["usd_ffill"].astype(bool)
+    return df.sort_values("date").reset_index(drop=True)
+
+
+# Fixer 결과 패턴: "." 성공, "h" 성공(휴일, api date 과거 → ffill), "x" 실패
+# 폴백 패턴: "." 값, "h" 값(ffill), "-" 없음
+PATTERNS = [
+    ("....x....", "....h...."),
+    ("xxxxxxxxx", "........."),
+    ("xxxxxxxxx", "-------h-"),
+    ("x..h..xxh", "h-----.-."),
+    ("xx.....xx", ".h-----h-"),
+    ("..xxhxx..", "--.--h---"),
+    (".h.h.h.h.", "........."),
+    ("x.x.x.x", "-h-.-h-"),
+    ("x", "h"),
+    ("xhxhxhxhxhxh", "hh--..--hh.."),
+]
+
+
+def _make(fix_pattern: str, fb_pattern: str) -> tuple[list, pd.DataFrame]:
+    rows, fb = [], []
+    for i, (fx, fbc) in enumerate(zip(fix_pattern, fb_pattern)):
+        day = START + datetime.timedelta(days=i)
+        if fx == "x":
+            rows.append([day, None, None])
+        else:
+            rows.append([day, 1300.0 + i, fx == "h"])
+        if fbc != "-":
+            fb.append([pd.Timestamp(day), 1400.0 + i + 0.25, fbc == "h"])
+    fb_df = pd.DataFrame(fb, columns=["date", "usd_rate", "usd_ffill"])
+    fb_df["date"] = pd.to_datetime(fb_df["date"])
+    fb_df["usd_rate"] = fb_df["usd_rate"].astype("float64")
+    fb_df["usd_ffill"] = fb_df["usd_ffill"].astype(bool)
+    return rows, fb_df
+
+
+@pytest.mark.parametrize("fix_pattern,fb_pattern", PATTERNS)
+def test_matches_merge_apply(fix_pattern, fb_pattern):
+    rows, fb_df = _make(fix_pattern, fb_pattern)
+    # 누락 구간별 폴백을 모아 날짜순 정렬한 뒤 병합
+    fb_all = fb_df.sort_values("date").reset_index(drop=True)
+    expected = _baseline_merge(rows, fb_all)
+    got = _combine_usd_sources(pd.DataFrame(rows, columns=["date", "usd_rate", "usd_ffill"]), fb_all)
+    pd.testing.assert_frame_equal(
+        got.reset_index(drop=True).astype({"usd_rate": "float64", "usd_ffill": bool}),
+        expected.astype({"usd_rate": "float64", "usd_ffill": bool}),
+    )
+
+
+@pytest.mark.parametrize("fix_pattern,fb_pattern", PATTERNS)
+def test_matches_iterrows_fill(fix_pattern, fb_pattern):
+    rows, fb_df = _make(fix_pattern, fb_pattern)
+    df = pd.DataFrame(rows, columns=["date", "usd_rate", "usd_ffill"])
+    df["date"] = pd.to_datetime(df["date"])
+    expected = _finish(_baseline_iterrows(df, fb_df))
+    got = _finish(_combine_usd_sources(df, fb_df))
+    pd.testing.assert_frame_equal(got, expected)
+
+
+def test_fallback_duplicates_use_first_value():
+    rows = [[START, None, None]]
+    fb = pd.DataFrame({
+        "date": pd.to_datetime([START, START]),
+        "usd_rate": [1400.0, 1500.0],
+        "usd_ffill": [False, True],
+    })
+    got = _combine_usd_sources(pd.DataFrame(rows, columns=["date", "usd_rate", "usd_ffill"]), fb)
+    assert got["usd_rate"].tolist() == [1400.0]
+    assert got["usd_ffill"].tolist() == [False]
+    assert np.issubdtype(got["date"].dtype, np.datetime64)